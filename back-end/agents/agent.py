@@ -1,30 +1,27 @@
-from google.adk.agents import SequentialAgent, ParallelAgent
+from .scheduler import DagAgent
 from .subagents.regional_context.agent import regional_context_agent
 from .subagents.financial_context.agent import energy_billing_agent
 from .subagents.solar_context.agent import SolarContextAgent
 from .subagents.solar_calculator.agent import solar_monthly_bill_calculator_agent, solar_potential_setter
 
 
-def build_root_agent(lat: float, lon: float):
-    """Factory to build a root agent graph with a SolarContextAgent seeded with lat/lon.
+def build_root_agent():
+    """Build the root agent graph.
 
-    This allows per-request dynamic coordinates instead of a static global instance.
+    Agents keep no per-request state (coordinates and every other input are read from
+    session state), so one graph is built at startup and shared by concurrent runs.
+    The shared module-level agents are cloned since an agent can only have one parent.
+    Execution order is derived from each agent's state inputs/outputs by DagAgent.
     """
-    solar_context_agent = SolarContextAgent(name="solar_context_agent", lat=lat, lon=lon)
+    solar_context_agent = SolarContextAgent(name="solar_context_agent")
 
-    search_data_agent = ParallelAgent(
-        name="search_data_agent",
+    return DagAgent(
+        name='root_agent',
         sub_agents=[
-            energy_billing_agent,
+            regional_context_agent.clone(),
+            energy_billing_agent.clone(),
             solar_context_agent,
+            solar_potential_setter.clone(),
+            solar_monthly_bill_calculator_agent.clone(),
         ]
     )
-    return SequentialAgent(
-        name='root_agent',
-        sub_agents=[
-            regional_context_agent,
-            search_data_agent,
-            solar_potential_setter,
-            solar_monthly_bill_calculator_agent,
-        ]
-    )
\ No newline at end of file
@@ -0,0 +1,290 @@
+import asyncio
+import inspect
+import json
+import logging
+import os
+import time
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, Hashable, Optional, Tuple, Union
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from typing_extensions import override
+
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+FAST_PATH_STATE_PREFIX = "fast_path:"
+
+StateDelta = dict
+Compute = Callable[[dict], Union[StateDelta, Awaitable[StateDelta]]]
+Lookup = Callable[[dict], Union[Optional[StateDelta], Awaitable[Optional[StateDelta]]]]
+Store = Callable[[dict], Union[None, Awaitable[None]]]
+
+
+def fast_path_enabled() -> bool:
+    return os.getenv("AGENT_FAST_PATH", "true").lower() not in ("0", "false", "no")
+
+
+def parse_json_output(value: Any) -> Any:
+    """Decode an LLM text output (tolerating markdown code fences) into JSON; pass dicts through."""
+    if isinstance(value, str):
+        text = value.strip()
+        if text.startswith("```"):
+            text = text.split("\n", 1)[1] if "\n" in text else ""
+            text = text.rsplit("```", 1)[0]
+        return json.loads(text)
+    return value
+
+
+def fast_path_report(state: dict) -> dict:
+    """Collect which path (code / cache / coalesced / llm) every fast-path agent took in this session."""
+    return {
+        key[len(FAST_PATH_STATE_PREFIX):]: value
+        for key, value in state.items()
+        if key.startswith(FAST_PATH_STATE_PREFIX)
+    }
+
+
+class CodeSetterAgent(BaseAgent):
+    """Deterministic stand-in for an LLM agent that only moves or extracts session state.
+
+    `compute` reads the session state and returns the state delta the LLM agent would
+    have written, validating with the pydantic schemas on the way. If it raises, the
+    original LLM agent runs as a fallback. The path taken is recorded in state under
+    `fast_path:<name>`.
+    """
+
+    model_config = {"arbitrary_types_allowed": True}
+    compute: Compute
+    escalate_if: Optional[Callable[[StateDelta], bool]] = None
+
+    def __init__(
+        self,
+        name: str,
+        compute: Compute,
+        fallback: BaseAgent,
+        escalate_if: Optional[Callable[[StateDelta], bool]] = None,
+    ):
+        super().__init__(
+            name=name,
+            description=fallback.description,
+            sub_agents=[fallback],
+            compute=compute,
+            escalate_if=escalate_if,
+        )
+
+    @property
+    def fallback(self) -> BaseAgent:
+        return self.sub_agents[0]
+
+    @override
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        delta = None
+        if fast_path_enabled():
+            try:
+                delta = self.compute(ctx.session.state)
+                if inspect.isawaitable(delta):
+                    delta = await delta
+            except Exception as e:
+                logger.info(f"[{self.name}] Fast path failed ({e!r}); falling back to {self.fallback.name}.")
+                delta = None
+
+        if delta is None:
+            async for event in self.fallback.run_async(ctx):
+                yield event
+            yield self._report(ctx, "llm")
+            return
+
+        escalate = bool(self.escalate_if and self.escalate_if(delta))
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=EventActions(
+                state_delta={**delta, f"{FAST_PATH_STATE_PREFIX}{self.name}": "code"},
+                escalate=escalate or None,
+            ),
+        )
+
+    def _report(self, ctx: InvocationContext, path: str) -> Event:
+        return Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=EventActions(state_delta={f"{FAST_PATH_STATE_PREFIX}{self.name}": path}),
+        )
+
+
+async def _maybe_await(value):
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+
+class LookupStats:
+    """Hit/miss counters of a CachedLookupAgent, plus the fallback latency hits avoided.
+
+    Latency saved per hit is the moving average of recent fallback runs minus the
+    lookup's own time, so it is only counted once a miss has been timed.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.latency_saved_seconds = 0.0
+        self.fallback_seconds_avg: Optional[float] = None
+
+    def record_hit(self, lookup_seconds: float) -> None:
+        self.hits += 1
+        if self.fallback_seconds_avg is not None:
+            self.latency_saved_seconds += max(0.0, self.fallback_seconds_avg - lookup_seconds)
+
+    def record_miss(self, fallback_seconds: float) -> None:
+        self.misses += 1
+        if self.fallback_seconds_avg is None:
+            self.fallback_seconds_avg = fallback_seconds
+        else:
+            self.fallback_seconds_avg = 0.8 * self.fallback_seconds_avg + 0.2 * fallback_seconds
+
+    def as_dict(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "latency_saved_seconds": round(self.latency_saved_seconds, 3),
+            "fallback_seconds_avg": (
+                round(self.fallback_seconds_avg, 3) if self.fallback_seconds_avg is not None else None
+            ),
+        }
+
+
+# Keyed by agent name so clones of one module-level agent share counters and in-flight runs
+_lookup_stats: Dict[str, LookupStats] = {}
+_fallbacks_in_flight: Dict[Tuple[str, Hashable], asyncio.Future] = {}
+
+
+def lookup_stats() -> dict:
+    return {name: stats.as_dict() for name, stats in _lookup_stats.items()}
+
+
+class CachedLookupAgent(BaseAgent):
+    """Skips an expensive agent (usually an LLM search chain) when a local store has the answer.
+
+    `lookup` reads the session state and returns the state delta the fallback would have
+    produced, or None on a miss. On a miss the fallback runs and `store` is called with
+    the resulting state to write its answer back. The path taken is recorded in state
+    under `fast_path:<name>` as "cache" or "llm"; hit rate and latency saved are
+    available from `lookup_stats()`.
+
+    With a `key` (e.g. the region a tariff is for), a miss while another session is
+    already running the fallback for the same key waits for that run and retries the
+    lookup instead of searching again; those are recorded as "coalesced".
+    """
+
+    model_config = {"arbitrary_types_allowed": True}
+    lookup: Lookup
+    store: Optional[Store] = None
+    key: Optional[Callable[[dict], Hashable]] = None
+
+    def __init__(
+        self,
+        name: str,
+        lookup: Lookup,
+        fallback: BaseAgent,
+        store: Optional[Store] = None,
+        key: Optional[Callable[[dict], Hashable]] = None,
+    ):
+        super().__init__(
+            name=name,
+            description=fallback.description,
+            sub_agents=[fallback],
+            lookup=lookup,
+            store=store,
+            key=key,
+        )
+
+    @property
+    def fallback(self) -> BaseAgent:
+        return self.sub_agents[0]
+
+    @property
+    def stats(self) -> LookupStats:
+        return _lookup_stats.setdefault(self.name, LookupStats())
+
+    async def _lookup(self, state: dict) -> Optional[StateDelta]:
+        try:
+            return await _maybe_await(self.lookup(state))
+        except Exception as e:
+            logger.warning(f"[{self.name}] Lookup failed ({e!r}); running {self.fallback.name}.")
+            return None
+
+    def _flight_key(self, state: dict) -> Optional[Tuple[str, Hashable]]:
+        if self.key is None:
+            return None
+        try:
+            return (self.name, self.key(state))
+        except Exception:
+            return None
+
+    def _hit(self, ctx: InvocationContext, delta: StateDelta, path: str) -> Event:
+        return Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=EventActions(state_delta={**delta, f"{FAST_PATH_STATE_PREFIX}{self.name}": path}),
+        )
+
+    @override
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        flight_key = None
+        if fast_path_enabled():
+            started = time.perf_counter()
+            delta = await self._lookup(ctx.session.state)
+            if delta is not None:
+                self.stats.record_hit(time.perf_counter() - started)
+                metrics.record_cache(self.name, "hit")
+                yield self._hit(ctx, delta, "cache")
+                return
+
+            flight_key = self._flight_key(ctx.session.state)
+            leader = _fallbacks_in_flight.get(flight_key) if flight_key else None
+            if leader is not None:
+                await asyncio.shield(leader)
+                delta = await self._lookup(ctx.session.state)
+                if delta is not None:
+                    self.stats.coalesced += 1
+                    metrics.record_cache(self.name, "coalesced")
+                    yield self._hit(ctx, delta, "coalesced")
+                    return
+                flight_key = None
+
+        done = None
+        if flight_key is not None and flight_key not in _fallbacks_in_flight:
+            done = asyncio.get_running_loop().create_future()
+            _fallbacks_in_flight[flight_key] = done
+        try:
+            started = time.perf_counter()
+            async for event in self.fallback.run_async(ctx):
+                yield event
+            self.stats.record_miss(time.perf_counter() - started)
+            metrics.record_cache(self.name, "miss")
+            if self.store is not None:
+                try:
+                    await _maybe_await(self.store(ctx.session.state))
+                except Exception as e:
+                    logger.warning(f"[{self.name}] Could not store fallback result: {e!r}")
+        finally:
+            if done is not None:
+                _fallbacks_in_flight.pop(flight_key, None)
+                done.set_result(None)
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=EventActions(state_delta={f"{FAST_PATH_STATE_PREFIX}{self.name}": "llm"}),
+        )
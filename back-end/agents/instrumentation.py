@@ -0,0 +1,141 @@
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.adk.agents import BaseAgent, LoopAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.tool_context import ToolContext
+from typing_extensions import override
+
+from services import metrics
+
+
+class MetricsPlugin(BasePlugin):
+    """Times every agent run, model call and function tool call made through the Runner.
+
+    Records go to the Prometheus histograms in services.metrics and to the running
+    request's RunTimings. Model calls carry the model name and prompt/response token
+    counts; google_search runs inside the model call, so it is counted there. LoopAgent
+    iterations are counted as starts of the loop's first sub-agent.
+
+    ADK calls the before/after hooks with fresh context objects, so start times are kept
+    here, stacked per (invocation, agent) to allow the same agent to run again in a loop.
+    """
+
+    def __init__(self, name: str = "metrics"):
+        super().__init__(name=name)
+        self._agent_starts: Dict[Tuple[str, str], List[float]] = defaultdict(list)
+        self._model_starts: Dict[Tuple[str, str], List[Tuple[float, str]]] = defaultdict(list)
+        self._tool_starts: Dict[Tuple[str, str], float] = {}
+        self._loop_iterations: Dict[Tuple[str, str], int] = defaultdict(int)
+
+    @staticmethod
+    def _pop(starts: dict, key) -> Optional[Any]:
+        stack = starts.get(key)
+        if not stack:
+            return None
+        value = stack.pop()
+        if not stack:
+            del starts[key]
+        return value
+
+    @override
+    async def after_run_callback(self, *, invocation_context: InvocationContext) -> None:
+        # Drop starts left open by agents that ended early (escalation, errors)
+        invocation_id = invocation_context.invocation_id
+        for starts in (self._agent_starts, self._model_starts, self._tool_starts, self._loop_iterations):
+            for key in [k for k in starts if k[0] == invocation_id]:
+                del starts[key]
+
+    @override
+    async def before_agent_callback(self, *, agent: BaseAgent, callback_context: CallbackContext) -> None:
+        invocation_id = callback_context.invocation_id
+        self._agent_starts[(invocation_id, agent.name)].append(time.perf_counter())
+        parent = agent.parent_agent
+        if isinstance(parent, LoopAgent) and parent.sub_agents and parent.sub_agents[0] is agent:
+            self._loop_iterations[(invocation_id, parent.name)] += 1
+        return None
+
+    @override
+    async def after_agent_callback(self, *, agent: BaseAgent, callback_context: CallbackContext) -> None:
+        key = (callback_context.invocation_id, agent.name)
+        started = self._pop(self._agent_starts, key)
+        if started is not None:
+            metrics.record_agent(agent.name, time.perf_counter() - started)
+        if isinstance(agent, LoopAgent):
+            metrics.record_loop(agent.name, self._loop_iterations.pop(key, 0))
+        return None
+
+    @override
+    async def before_model_callback(
+        self, *, callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> Optional[LlmResponse]:
+        key = (callback_context.invocation_id, callback_context.agent_name)
+        self._model_starts[key].append((time.perf_counter(), llm_request.model or "unknown"))
+        return None
+
+    @override
+    async def after_model_callback(
+        self, *, callback_context: CallbackContext, llm_response: LlmResponse
+    ) -> Optional[LlmResponse]:
+        if llm_response.partial:
+            return None
+        agent_name = callback_context.agent_name
+        start = self._pop(self._model_starts, (callback_context.invocation_id, agent_name))
+        if start is None:
+            return None
+        started, model = start
+        usage = llm_response.usage_metadata
+        response_tokens = None
+        if usage is not None and (usage.candidates_token_count is not None or usage.thoughts_token_count is not None):
+            response_tokens = (usage.candidates_token_count or 0) + (usage.thoughts_token_count or 0)
+        metrics.record_llm(
+            agent_name,
+            model,
+            time.perf_counter() - started,
+            outcome="error" if llm_response.error_code else "ok",
+            prompt_tokens=usage.prompt_token_count if usage is not None else None,
+            response_tokens=response_tokens,
+        )
+        return None
+
+    @override
+    async def on_model_error_callback(
+        self, *, callback_context: CallbackContext, llm_request: LlmRequest, error: Exception
+    ) -> Optional[LlmResponse]:
+        agent_name = callback_context.agent_name
+        start = self._pop(self._model_starts, (callback_context.invocation_id, agent_name))
+        if start is not None:
+            started, model = start
+            metrics.record_llm(agent_name, model, time.perf_counter() - started, outcome="error")
+        return None
+
+    @override
+    async def before_tool_callback(
+        self, *, tool: BaseTool, tool_args: dict[str, Any], tool_context: ToolContext
+    ) -> Optional[dict]:
+        self._tool_starts[(tool_context.invocation_id, tool_context.function_call_id)] = time.perf_counter()
+        return None
+
+    @override
+    async def after_tool_callback(
+        self, *, tool: BaseTool, tool_args: dict[str, Any], tool_context: ToolContext, result: dict
+    ) -> Optional[dict]:
+        started = self._tool_starts.pop((tool_context.invocation_id, tool_context.function_call_id), None)
+        if started is not None:
+            metrics.record_tool(tool.name, time.perf_counter() - started)
+        return None
+
+    @override
+    async def on_tool_error_callback(
+        self, *, tool: BaseTool, tool_args: dict[str, Any], tool_context: ToolContext, error: Exception
+    ) -> Optional[dict]:
+        started = self._tool_starts.pop((tool_context.invocation_id, tool_context.function_call_id), None)
+        if started is not None:
+            metrics.record_tool(tool.name, time.perf_counter() - started, outcome="error")
+        return None
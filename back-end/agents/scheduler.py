@@ -0,0 +1,291 @@
+import asyncio
+import contextvars
+import logging
+import re
+import time
+from typing import AsyncGenerator, Dict, Iterable, Iterator, List, Optional, Set
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.adk.utils.context_utils import Aclosing
+from pydantic import PrivateAttr
+from typing_extensions import override
+
+logger = logging.getLogger(__name__)
+
+CRITICAL_PATH_STATE_KEY = "critical_path_report"
+
+# Same placeholder syntax ADK uses when injecting state into instructions
+_PLACEHOLDER = re.compile(r"{+[^{}]*}+")
+_STATE_PREFIXES = ("app:", "user:", "temp:")
+
+_active_run: contextvars.ContextVar[Optional["_DagRun"]] = contextvars.ContextVar(
+    "dag_active_run", default=None
+)
+# Name of the DAG node whose task is running (set in that node's task only)
+_active_node: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "dag_active_node", default=None
+)
+
+
+def _is_state_name(name: str) -> bool:
+    for prefix in _STATE_PREFIXES:
+        if name.startswith(prefix):
+            return name[len(prefix):].isidentifier()
+    return name.isidentifier()
+
+
+def _instruction_inputs(agent: BaseAgent) -> Set[str]:
+    if not isinstance(agent, LlmAgent) or not isinstance(agent.instruction, str):
+        return set()
+    inputs = set()
+    for match in _PLACEHOLDER.findall(agent.instruction):
+        name = match.lstrip("{").rstrip("}").strip()
+        if name.endswith("?") or name.startswith("artifact."):
+            continue
+        if _is_state_name(name):
+            inputs.add(name)
+    return inputs
+
+
+def _walk(agent: BaseAgent) -> Iterator[BaseAgent]:
+    """Yield an agent and everything it can run: sub_agents plus agents held in custom fields."""
+    seen = set()
+    stack = [agent]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        yield current
+        stack.extend(current.sub_agents)
+        for field_name in current.__class__.model_fields:
+            if field_name in ("sub_agents", "parent_agent"):
+                continue
+            value = getattr(current, field_name, None)
+            if isinstance(value, BaseAgent):
+                stack.append(value)
+
+
+def declared_outputs(agent: BaseAgent) -> Set[str]:
+    """State keys an agent writes: every `output_key` in its subtree plus `state_outputs`."""
+    outputs = set()
+    for node in _walk(agent):
+        output_key = getattr(node, "output_key", None)
+        if output_key:
+            outputs.add(output_key)
+        outputs.update(getattr(node, "state_outputs", ()) or ())
+    return outputs
+
+
+def declared_inputs(agent: BaseAgent) -> Set[str]:
+    """State keys an agent needs before it can start.
+
+    Custom agents may pin this with a `state_inputs` class attribute; otherwise it is
+    every `{placeholder}` in the subtree's instructions not produced inside the subtree.
+    """
+    explicit = getattr(agent, "state_inputs", None)
+    if explicit is not None:
+        return set(explicit)
+    inputs = set()
+    for node in _walk(agent):
+        inputs |= _instruction_inputs(node)
+        inputs.update(getattr(node, "state_inputs", ()) or ())
+    return inputs - declared_outputs(agent)
+
+
+async def wait_for_state(*keys: str) -> None:
+    """Block a running DAG node until every agent producing `keys` has finished.
+
+    Producers that cannot finish before the caller does (the caller itself, or nodes
+    that depend on it) are not waited for. Outside a DagAgent (e.g. a plain
+    SequentialAgent) this returns immediately.
+    """
+    run = _active_run.get()
+    if run is not None:
+        await run.wait_for_producers(keys)
+
+
+class _DagRun:
+    """Per-invocation scheduling state of a DagAgent."""
+
+    def __init__(self, agent: "DagAgent"):
+        self.agent = agent
+        self.origin = time.perf_counter()
+        self.done: Dict[str, asyncio.Event] = {node.name: asyncio.Event() for node in agent.sub_agents}
+        self.started: Dict[str, float] = {}
+        self.finished: Dict[str, float] = {}
+
+    def now(self) -> float:
+        return time.perf_counter() - self.origin
+
+    def is_ready(self, node: BaseAgent) -> bool:
+        return all(self.done[p].is_set() for p in self.agent.dependencies_of(node.name))
+
+    async def wait_for_producers(self, keys: Iterable[str]) -> None:
+        producers = set()
+        for key in keys:
+            producers |= self.agent.producers_of(key)
+        caller = _active_node.get()
+        if caller is not None:
+            # Waiting on these would deadlock: they only start once the caller is done
+            blocked = {name for name in producers if name == caller or caller in self.agent.ancestors_of(name)}
+            if blocked:
+                logger.warning(
+                    f"[{self.agent.name}] {caller} waits for {sorted(keys)} from {sorted(blocked)},"
+                    " which run after it; not waiting for them"
+                )
+            producers -= blocked
+        for name in producers:
+            await self.done[name].wait()
+
+    def report(self) -> dict:
+        nodes = {
+            name: {
+                "start": round(self.started[name], 4),
+                "end": round(self.finished[name], 4),
+                "duration": round(self.finished[name] - self.started[name], 4),
+                "depends_on": sorted(self.agent.dependencies_of(name)),
+            }
+            for name in self.finished
+        }
+        path: List[str] = []
+        current = max(self.finished, key=self.finished.get, default=None)
+        while current is not None:
+            path.append(current)
+            # A forced-start cycle would otherwise walk back forever
+            deps = [d for d in self.agent.dependencies_of(current) if d in self.finished and d not in path]
+            current = max(deps, key=self.finished.get, default=None)
+        path.reverse()
+        return {
+            "total_seconds": round(self.now(), 4),
+            "critical_path": path,
+            "critical_path_seconds": {name: nodes[name]["duration"] for name in path},
+            "nodes": nodes,
+        }
+
+
+class DagAgent(BaseAgent):
+    """Runs sub-agents as a dependency graph instead of a fixed sequence.
+
+    Each sub-agent's inputs and outputs are read from the agents themselves (see
+    `declared_inputs` / `declared_outputs`). A sub-agent starts as soon as every
+    other sub-agent producing one of its inputs has finished, so independent
+    branches overlap. Like ParallelAgent, each sub-agent runs on its own branch and
+    does not move past an event until the runner has processed it.
+
+    When done, a per-request report with node timings and the critical path is
+    written to session state under `critical_path_report`.
+    """
+
+    _inputs: Dict[str, Set[str]] = PrivateAttr(default_factory=dict)
+    _outputs: Dict[str, Set[str]] = PrivateAttr(default_factory=dict)
+
+    def model_post_init(self, __context) -> None:
+        super().model_post_init(__context)
+        for node in self.sub_agents:
+            self._inputs[node.name] = declared_inputs(node)
+            self._outputs[node.name] = declared_outputs(node)
+        for node in self.sub_agents:
+            logger.debug(
+                f"[{self.name}] {node.name}: inputs={sorted(self._inputs[node.name])} "
+                f"depends_on={sorted(self.dependencies_of(node.name))}"
+            )
+
+    def producers_of(self, key: str, exclude: Optional[str] = None) -> Set[str]:
+        return {name for name, outputs in self._outputs.items() if key in outputs and name != exclude}
+
+    def dependencies_of(self, name: str) -> Set[str]:
+        deps = set()
+        for key in self._inputs.get(name, ()):
+            deps |= self.producers_of(key, exclude=name)
+        return deps
+
+    def ancestors_of(self, name: str) -> Set[str]:
+        """Every node `name` transitively depends on."""
+        ancestors: Set[str] = set()
+        stack = [name]
+        while stack:
+            for dep in self.dependencies_of(stack.pop()):
+                if dep not in ancestors:
+                    ancestors.add(dep)
+                    stack.append(dep)
+        return ancestors
+
+    def _branch_ctx(self, node: BaseAgent, ctx: InvocationContext) -> InvocationContext:
+        branch_ctx = ctx.model_copy()
+        suffix = f"{self.name}.{node.name}"
+        branch_ctx.branch = f"{ctx.branch}.{suffix}" if ctx.branch else suffix
+        return branch_ctx
+
+    @override
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        run = _DagRun(self)
+        token = _active_run.set(run)
+        try:
+            async for event in self._schedule(run, ctx):
+                yield event
+        finally:
+            try:
+                _active_run.reset(token)
+            except ValueError:
+                # Generator finalized from another context (e.g. client disconnect)
+                pass
+
+        report = run.report()
+        logger.info(
+            f"[{self.name}] Finished in {report['total_seconds']}s; critical path: "
+            + " -> ".join(f"{n} ({report['critical_path_seconds'][n]}s)" for n in report["critical_path"])
+        )
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=EventActions(state_delta={CRITICAL_PATH_STATE_KEY: report}),
+        )
+
+    async def _schedule(self, run: _DagRun, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        finished = object()
+        queue: asyncio.Queue = asyncio.Queue()
+        pending = list(self.sub_agents)
+        running: Set[str] = set()
+
+        async def run_node(node: BaseAgent):
+            _active_node.set(node.name)
+            run.started[node.name] = run.now()
+            try:
+                async with Aclosing(node.run_async(self._branch_ctx(node, ctx))) as agen:
+                    async for event in agen:
+                        resume_signal = asyncio.Event()
+                        await queue.put((node, event, resume_signal))
+                        # Wait for upstream to consume event before generating new events.
+                        await resume_signal.wait()
+            finally:
+                run.finished[node.name] = run.now()
+                await queue.put((node, finished, None))
+
+        async with asyncio.TaskGroup() as tg:
+
+            def start_ready():
+                for node in [n for n in pending if run.is_ready(n)]:
+                    pending.remove(node)
+                    running.add(node.name)
+                    tg.create_task(run_node(node))
+                if pending and not running:
+                    # Unsatisfiable dependencies (cycle): fall back to declaration order.
+                    node = pending.pop(0)
+                    logger.warning(f"[{self.name}] Dependency cycle; forcing start of {node.name}")
+                    running.add(node.name)
+                    tg.create_task(run_node(node))
+
+            start_ready()
+            while running:
+                node, event, resume_signal = await queue.get()
+                if event is finished:
+                    running.discard(node.name)
+                    run.done[node.name].set()
+                    start_ready()
+                    continue
+                yield event
+                resume_signal.set()
@@ -1,18 +1,24 @@
 from google.adk.agents import Agent, BaseAgent, SequentialAgent, ParallelAgent
 from google.adk.agents.invocation_context import InvocationContext
-from google.adk.events import Event
-from typing import AsyncGenerator, override
+from google.adk.events import Event, EventActions
+from typing import AsyncGenerator, ClassVar, override
 import json
-from .helper import total_monthly_cost
+from .tariff_compiler import compile_tariff
+from agents.fast_path import CachedLookupAgent
 from .electricity_rate.agent import (
     electricity_rate_agent,
-    conversion_rate_agent,
-    usd_converted_electricity_rates_agent,
-    usd_electricity_rates_setter
+    convert_rates_to_usd,
+    usd_electricity_rates_setter,
+    stored_usd_rates,
+    store_usd_rates,
+    usd_rates_key,
 )
 from .typical_usage.agent import (
     typical_energy_usage_agent,
     energy_setter,
+    stored_energy_usage,
+    store_energy_usage,
+    energy_usage_key,
 )
 
 import logging
@@ -22,31 +28,45 @@ logger = logging.getLogger(__name__)
 
 class EnergyBillingAgent(BaseAgent):
     final_agent: ParallelAgent
+    # Written in code after the sub-agents finish (declared for the DAG scheduler)
+    state_outputs: ClassVar[tuple] = ("average_monthly_expense_usd",)
 
     model_config = {"arbitrary_types_allowed": True}
     def __init__(
         self,
         name: str,
         electricity_rate_agent: Agent,
-        conversion_rate_agent: Agent,
-        usd_converted_electricity_rates_agent: Agent,
+        convert_rates_to_usd: BaseAgent,
         usd_electricity_rates_setter: Agent,
         typical_energy_usage_agent: Agent,
         energy_setter: Agent
     ):
-        sequential_agent = SequentialAgent(
+        # Same tariff for every household of a utility: search only when the local store misses
+        sequential_agent = CachedLookupAgent(
             name="get_usd_converted_rates",
-            sub_agents=[
-                electricity_rate_agent,
-                conversion_rate_agent,
-                usd_converted_electricity_rates_agent,
-                usd_electricity_rates_setter,
-            ],
+            lookup=stored_usd_rates,
+            store=store_usd_rates,
+            key=usd_rates_key,
+            fallback=SequentialAgent(
+                name="search_usd_converted_rates",
+                sub_agents=[
+                    electricity_rate_agent,
+                    convert_rates_to_usd,
+                    usd_electricity_rates_setter,
+                ],
+            ),
         )
         
-        sequential_agent2 = SequentialAgent(
+        # Depends only on region and building type: search only when the usage table misses
+        sequential_agent2 = CachedLookupAgent(
             name="set_typical_energy_usage",
-            sub_agents=[typical_energy_usage_agent, energy_setter],
+            lookup=stored_energy_usage,
+            store=store_energy_usage,
+            key=energy_usage_key,
+            fallback=SequentialAgent(
+                name="search_typical_energy_usage",
+                sub_agents=[typical_energy_usage_agent, energy_setter],
+            ),
         )
         
         final_agent = ParallelAgent(
@@ -77,21 +97,30 @@ class EnergyBillingAgent(BaseAgent):
         typical_usage = ctx.session.state.get("energy_kWh")
 
         try:
-            average_monthly_expense_usd = total_monthly_cost(usd_rates, typical_usage)
+            # Compiled once per distinct plan; same result as helper.total_monthly_cost
+            average_monthly_expense_usd = compile_tariff(usd_rates).cost(typical_usage.get("energy_kWh", 0))
 
-            ctx.session.state['average_monthly_expense_usd'] = round(average_monthly_expense_usd, 2)
+            state_delta = {'average_monthly_expense_usd': round(average_monthly_expense_usd, 2)}
 
         except (json.JSONDecodeError, TypeError, ValueError) as e:
             logger.error(f"[{self.name}] Error processing financial data: {e}")
-            ctx.session.state['error'] = "Failed to calculate average expense."
-            ctx.session.state['average_monthly_expense_usd'] = 0.0
-        logger.info(f"[{self.name}] Calculated average monthly expense: {ctx.session.state.get('average_monthly_expense_usd')}")
+            state_delta = {
+                'error': "Failed to calculate average expense.",
+                'average_monthly_expense_usd': 0.0,
+            }
+        logger.info(f"[{self.name}] Calculated average monthly expense: {state_delta['average_monthly_expense_usd']}")
+        # Written through the event so it is persisted and visible to stream consumers
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=EventActions(state_delta=state_delta),
+        )
        
 energy_billing_agent = EnergyBillingAgent(
     name="energy_billing_agent",
     electricity_rate_agent=electricity_rate_agent,
-    conversion_rate_agent=conversion_rate_agent,
-    usd_converted_electricity_rates_agent=usd_converted_electricity_rates_agent,
+    convert_rates_to_usd=convert_rates_to_usd,
     usd_electricity_rates_setter=usd_electricity_rates_setter,
     typical_energy_usage_agent=typical_energy_usage_agent,
     energy_setter=energy_setter,
@@ -1,9 +1,13 @@
 import json
-from google.adk.agents import LlmAgent, Agent
+from google.adk.agents import LlmAgent, Agent, SequentialAgent
 from google.adk.tools import google_search
 
-from models.schemas import USDConvertedElectricityRatePlan
+from agents.fast_path import CodeSetterAgent, parse_json_output
+from models.schemas import RegionalIdentifiers, USDConvertedElectricityRatePlan
+from services.fx_rates import get_fx_rates
 from . import prompt
+from ..regions import country_key, norm, region_key
+from .tariff_store import get_tariff_store
 
 electricity_rate_agent = Agent(
     name="electricity_rate_agent",
@@ -63,8 +67,32 @@ usd_converted_electricity_rates_agent = Agent(
     output_key="usd_electricity_rates",
 )
 
-usd_electricity_rates_setter = Agent(
-    name="usd_electricity_rates_setter",
+async def _usd_rates_from_fx_table(state: dict) -> dict:
+    fx_rates = get_fx_rates()
+    if fx_rates is None:
+        raise LookupError("FX rate table disabled")
+    currency_code = str(state["currency_code"]).strip().strip("\"`")
+    rate = await fx_rates.rate_to_usd(currency_code)
+    if rate is None:
+        raise LookupError(f"No FX rate for {currency_code!r}")
+    local_rates = parse_json_output(state["local_electricity_rates"])
+    return {
+        "conversion_rate": rate,
+        "usd_electricity_rates": convert_plan_to_usd(local_rates, rate),
+    }
+
+# Rate lookup and conversion in code; the two LLM turns only run for unknown currencies
+convert_rates_to_usd = CodeSetterAgent(
+    name="convert_rates_to_usd",
+    compute=_usd_rates_from_fx_table,
+    fallback=SequentialAgent(
+        name="convert_rates_to_usd_llm",
+        sub_agents=[conversion_rate_agent, usd_converted_electricity_rates_agent],
+    ),
+)
+
+usd_electricity_rates_setter_llm = Agent(
+    name="usd_electricity_rates_setter_llm",
     description="Agent to set the final USD converted electricity rates.",
     model="gemini-2.0-flash",
     instruction="Extract and return only the JSON object representing the USD converted electricity rates from {usd_electricity_rates}.",
@@ -72,4 +100,40 @@ usd_electricity_rates_setter = Agent(
     output_schema=USDConvertedElectricityRatePlan,
     disallow_transfer_to_parent=True,
     disallow_transfer_to_peers=True,
-)
\ No newline at end of file
+)
+
+def _usd_rates_from_state(state: dict) -> dict:
+    plan = USDConvertedElectricityRatePlan.model_validate(parse_json_output(state["usd_electricity_rates"]))
+    return {"usd_electricity_rates": plan.model_dump(exclude_none=True)}
+
+usd_electricity_rates_setter = CodeSetterAgent(
+    name="usd_electricity_rates_setter",
+    compute=_usd_rates_from_state,
+    fallback=usd_electricity_rates_setter_llm,
+)
+
+def stored_usd_rates(state: dict):
+    """Tariff for the resolved region from the local store, as usd_electricity_rates_setter writes it."""
+    store = get_tariff_store()
+    if store is None:
+        return None
+    region = RegionalIdentifiers.model_validate(parse_json_output(state["regional_identifiers"]))
+    plan = store.find(region.country_code, region.state_or_region, region.city)
+    if plan is None:
+        return None
+    return {"usd_electricity_rates": plan.model_dump(exclude_none=True)}
+
+def usd_rates_key(state: dict) -> tuple:
+    """Sessions resolving the same place share one tariff search."""
+    region = RegionalIdentifiers.model_validate(parse_json_output(state["regional_identifiers"]))
+    country = country_key(region.country_code)
+    return (country, region_key(country, region.state_or_region), norm(region.city))
+
+def store_usd_rates(state: dict) -> None:
+    """Write a plan found by the LLM search chain back to the store for its city."""
+    store = get_tariff_store()
+    if store is None:
+        return
+    region = RegionalIdentifiers.model_validate(parse_json_output(state["regional_identifiers"]))
+    plan = USDConvertedElectricityRatePlan.model_validate(parse_json_output(state["usd_electricity_rates"]))
+    store.put(plan, country_code=region.country_code, region=region.state_or_region, city=region.city)
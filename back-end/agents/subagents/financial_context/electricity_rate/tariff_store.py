@@ -0,0 +1,351 @@
+"""Local SQLite store of USD electricity rate plans, indexed by country / region / city / utility.
+
+Seeded from OpenEI Utility Rate Database (URDB) exports and from plans found by the LLM
+search chain. Import a URDB JSON export (API `format=json&detail=full`, or a list of items):
+
+    python -m agents.subagents.financial_context.electricity_rate.tariff_store urdb.json --region CA
+"""
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Iterable, List, Optional, Tuple
+
+import logging
+
+from pydantic import ValidationError
+
+from models.schemas import USDConvertedElectricityRatePlan
+from ..regions import country_key, location_levels, norm, region_key
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_PATH = ".cache/tariffs.sqlite3"
+DEFAULT_LLM_TTL_SECONDS = 90 * 24 * 3600
+DAYS_PER_MONTH_AVG = 30.4
+
+SOURCE_URDB = "urdb"
+SOURCE_LLM = "llm"
+
+MEMO_MAX_ENTRIES = 10_000
+
+
+class TariffStore:
+    """Rate plans keyed by location, looked up from the most to the least specific match.
+
+    `find` tries (country, region, city), then (country, region), then (country). Within
+    a level the pick is deterministic: plans written back from LLM searches for that
+    exact place win (newest first), then plans flagged as their utility's default, then
+    plans of the utility with the most plans at that level, then the newest, then by
+    utility and plan name. Without a utility this keeps a state-level hit from landing
+    on an EV or low-income tariff just because it was imported last. Results are
+    memoized in process until the next write, so repeat lookups cost a dict access. LLM
+    write-backs expire after `llm_ttl_seconds`; imported plans do not.
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH, llm_ttl_seconds: float = DEFAULT_LLM_TTL_SECONDS):
+        self.path = path
+        self.llm_ttl_seconds = float(llm_ttl_seconds)
+        self.hits = 0
+        self.misses = 0
+        self._memo = {}
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tariffs ("
+            " id INTEGER PRIMARY KEY,"
+            " country_code TEXT NOT NULL,"
+            " region TEXT NOT NULL,"
+            " city TEXT NOT NULL,"
+            " utility TEXT NOT NULL,"
+            " plan_name TEXT NOT NULL,"
+            " plan TEXT NOT NULL,"
+            " source TEXT NOT NULL,"
+            " updated_at REAL NOT NULL,"
+            " is_default INTEGER NOT NULL DEFAULT 0,"
+            " UNIQUE (country_code, region, city, utility, plan_name, source))"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(tariffs)")}
+        if "is_default" not in columns:
+            self._conn.execute("ALTER TABLE tariffs ADD COLUMN is_default INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS tariffs_location ON tariffs (country_code, region, city)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS tariffs_utility ON tariffs (utility)")
+
+    @classmethod
+    def from_env(cls) -> "TariffStore":
+        return cls(
+            path=os.getenv("TARIFF_STORE_PATH", DEFAULT_STORE_PATH),
+            llm_ttl_seconds=float(os.getenv("TARIFF_STORE_LLM_TTL_SECONDS", DEFAULT_LLM_TTL_SECONDS)),
+        )
+
+    def find(
+        self,
+        country_code: str,
+        region: Optional[str] = None,
+        city: Optional[str] = None,
+        utility: Optional[str] = None,
+    ) -> Optional[USDConvertedElectricityRatePlan]:
+        country = country_key(country_code)
+        key = (country, region_key(country, region), norm(city), norm(utility))
+        with self._lock:
+            if key in self._memo:
+                plan = self._memo[key]
+            else:
+                plan = self._find_locked(*key)
+                if len(self._memo) >= MEMO_MAX_ENTRIES:
+                    self._memo.clear()
+                self._memo[key] = plan
+            if plan is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return plan
+
+    def _find_locked(self, country: str, region: str, city: str, utility: str):
+        if not country:
+            return None
+        expired_before = time.time() - self.llm_ttl_seconds
+        for level_region, level_city in location_levels(region, city):
+            query = (
+                "SELECT plan FROM tariffs AS t WHERE country_code = ? AND region = ? AND city = ?"
+                " AND (source != ? OR updated_at >= ?)"
+            )
+            params: List = [country, level_region, level_city, SOURCE_LLM, expired_before]
+            if utility:
+                query += " AND utility = ?"
+                params.append(utility)
+            query += (
+                " ORDER BY source = ? DESC, is_default DESC,"
+                " (SELECT COUNT(*) FROM tariffs AS u WHERE u.country_code = t.country_code"
+                "  AND u.region = t.region AND u.city = t.city AND u.utility = t.utility) DESC,"
+                " updated_at DESC, utility, plan_name LIMIT 1"
+            )
+            params.append(SOURCE_LLM)
+            row = self._conn.execute(query, params).fetchone()
+            if row is not None:
+                return USDConvertedElectricityRatePlan.model_validate_json(row[0])
+        return None
+
+    def put(
+        self,
+        plan: USDConvertedElectricityRatePlan,
+        *,
+        country_code: str,
+        region: Optional[str] = None,
+        city: Optional[str] = None,
+        source: str = SOURCE_LLM,
+        is_default: bool = False,
+    ) -> None:
+        self.put_many([(plan, country_code, region, city, is_default)], source=source)
+
+    def put_many(
+        self,
+        rows: Iterable[Tuple[USDConvertedElectricityRatePlan, str, Optional[str], Optional[str], bool]],
+        *,
+        source: str,
+    ) -> int:
+        """Write (plan, country_code, region, city, is_default) rows; is_default marks a utility's standard plan."""
+        now = time.time()
+        values = [
+            (
+                country_key(country_code),
+                region_key(country_code, region),
+                norm(city),
+                norm(plan.utility_name),
+                norm(plan.plan_name),
+                plan.model_dump_json(exclude_none=True),
+                source,
+                now,
+                int(bool(is_default)),
+            )
+            for plan, country_code, region, city, is_default in rows
+        ]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO tariffs"
+                " (country_code, region, city, utility, plan_name, plan, source, updated_at, is_default)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                values,
+            )
+            self._conn.execute("COMMIT")
+            self._memo.clear()
+        return len(values)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT source, COUNT(*) FROM tariffs GROUP BY source").fetchall())
+        lookups = self.hits + self.misses
+        return {
+            "entries": counts,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def _price(tier: dict) -> float:
+    return float(tier.get("rate") or 0.0) + float(tier.get("adj") or 0.0)
+
+
+def _tou_periods(item: dict, structure: list) -> List[dict]:
+    """Collapse URDB's 12x24 weekday schedule to daily hour ranges (most common period per hour).
+
+    `structure` is the full energyratestructure, since the schedule holds indices into
+    it; hours on a period without rates are left out.
+    """
+    schedule = item.get("energyweekdayschedule") or []
+    periods_by_hour = [
+        Counter(month[h] for month in schedule if len(month) == 24).most_common(1)[0][0]
+        for h in range(24)
+    ]
+    periods = []
+    start = 0
+    for h in range(1, 25):
+        if h == 24 or periods_by_hour[h] != periods_by_hour[start]:
+            index = periods_by_hour[start]
+            if index >= len(structure) or not structure[index]:
+                start = h
+                continue
+            periods.append({
+                "period_name": f"period_{index}",
+                "start_hour": start,
+                "end_hour": h % 24,
+                "price_per_kWh_usd": _price(structure[index][0]),
+            })
+            start = h
+    return periods
+
+
+def urdb_item_to_plan(item: dict) -> Optional[USDConvertedElectricityRatePlan]:
+    """Map one URDB rate to a USDConvertedElectricityRatePlan; None if it has no energy rates."""
+    structure = item.get("energyratestructure") or []
+    # Empty periods stay in place: the schedules index into the full list
+    priced = [period for period in structure if period]
+    if not priced:
+        return None
+    plan = {
+        "plan_name": item.get("name"),
+        "utility_name": item.get("utility"),
+        "currency_code": "USD",
+        "source_url": item.get("uri") or (
+            f"https://apps.openei.org/USURDB/rate/view/{item['label']}" if item.get("label") else None
+        ),
+        "notes": "Imported from the OpenEI Utility Rate Database",
+    }
+    schedule = item.get("energyweekdayschedule") or []
+    tou_periods = []
+    if len(priced) > 1 and any(len(month) == 24 for month in schedule):
+        tou_periods = _tou_periods(item, structure)
+    if tou_periods:
+        plan["plan_type"] = "tou"
+        plan["tou_periods"] = tou_periods
+    elif len(priced[0]) > 1:
+        plan["plan_type"] = "tiered"
+        tiers = []
+        start = 0.0
+        for tier in priced[0]:
+            end = tier.get("max")
+            if end is None:
+                # Open-ended top tier
+                tiers.append({"start_kWh": start, "price_per_kWh_usd": _price(tier)})
+                break
+            tiers.append({"start_kWh": start, "end_kWh": float(end), "price_per_kWh_usd": _price(tier)})
+            start = float(end)
+        plan["tiers"] = tiers
+    else:
+        plan["plan_type"] = "flat"
+        plan["price_per_kWh_usd"] = _price(priced[0][0])
+
+    fixed = item.get("fixedchargefirstmeter") or item.get("fixedmonthlycharge")
+    if fixed:
+        units = (item.get("fixedchargeunits") or "$/month").lower()
+        plan["fixed_monthly_fee_usd"] = float(fixed) * (DAYS_PER_MONTH_AVG if units == "$/day" else 1.0)
+
+    demand = []
+    for name, key in (("flat demand", "flatdemandstructure"), ("peak demand", "demandratestructure")):
+        rates = [_price(period[0]) for period in item.get(key) or [] if period]
+        if rates:
+            demand.append({"name": name, "price_per_kW_usd": max(rates)})
+    if demand:
+        plan["demand_charges"] = demand
+    return USDConvertedElectricityRatePlan.model_validate(plan)
+
+
+def import_urdb(
+    store: TariffStore,
+    items: Iterable[dict],
+    *,
+    region: Optional[str] = None,
+    country_code: str = "US",
+    sector: Optional[str] = "Residential",
+) -> int:
+    """Import URDB rate items; expired rates and other sectors are skipped."""
+    now = time.time()
+    rows = []
+    for item in items:
+        if sector and norm(item.get("sector")) != norm(sector):
+            continue
+        if item.get("enddate") and float(item["enddate"]) < now:
+            continue
+        try:
+            plan = urdb_item_to_plan(item)
+        except (ValidationError, ValueError, TypeError, KeyError, IndexError) as e:
+            logger.warning(f"Skipping URDB rate {item.get('label')}: {e}")
+            continue
+        if plan is not None:
+            # URDB gives ISO alpha-3 countries ("USA"); lookups use alpha-2
+            country = country_key(item.get("country") or country_code)
+            rows.append((plan, country, item.get("state") or region, None, bool(item.get("is_default"))))
+    return store.put_many(rows, source=SOURCE_URDB)
+
+
+_store: Optional[TariffStore] = None
+_store_lock = threading.Lock()
+
+
+def get_tariff_store() -> Optional[TariffStore]:
+    """Shared process-wide store; disabled when TARIFF_STORE_ENABLED is falsy."""
+    global _store
+    if os.getenv("TARIFF_STORE_ENABLED", "true").lower() in ("0", "false", "no"):
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = TariffStore.from_env()
+    return _store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import an OpenEI URDB JSON export into the tariff store.")
+    parser.add_argument("path", help="URDB export: {'items': [...]} or a list of rate items")
+    parser.add_argument("--region", help="State/region for items without a 'state' field, e.g. CA")
+    parser.add_argument("--country", default="US")
+    parser.add_argument("--sector", default="Residential", help="empty string imports every sector")
+    parser.add_argument("--store", default=os.getenv("TARIFF_STORE_PATH", DEFAULT_STORE_PATH))
+    args = parser.parse_args()
+
+    with open(args.path, encoding="utf-8") as f:
+        data = json.load(f)
+    items = data.get("items", []) if isinstance(data, dict) else data
+    count = import_urdb(
+        TariffStore(args.store),
+        items,
+        region=args.region,
+        country_code=args.country,
+        sector=args.sector or None,
+    )
+    print(f"Imported {count} of {len(items)} rates into {args.store}")
+
+
+if __name__ == "__main__":
+    main()
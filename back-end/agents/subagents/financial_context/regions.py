@@ -0,0 +1,51 @@
+from typing import Optional
+
+# Tariff and usage data identify US states by code, regional context by name
+US_STATE_CODES = {
+    "alabama": "al", "alaska": "ak", "arizona": "az", "arkansas": "ar", "california": "ca",
+    "colorado": "co", "connecticut": "ct", "delaware": "de", "district of columbia": "dc",
+    "florida": "fl", "georgia": "ga", "hawaii": "hi", "idaho": "id", "illinois": "il",
+    "indiana": "in", "iowa": "ia", "kansas": "ks", "kentucky": "ky", "louisiana": "la",
+    "maine": "me", "maryland": "md", "massachusetts": "ma", "michigan": "mi", "minnesota": "mn",
+    "mississippi": "ms", "missouri": "mo", "montana": "mt", "nebraska": "ne", "nevada": "nv",
+    "new hampshire": "nh", "new jersey": "nj", "new mexico": "nm", "new york": "ny",
+    "north carolina": "nc", "north dakota": "nd", "ohio": "oh", "oklahoma": "ok", "oregon": "or",
+    "pennsylvania": "pa", "rhode island": "ri", "south carolina": "sc", "south dakota": "sd",
+    "tennessee": "tn", "texas": "tx", "utah": "ut", "vermont": "vt", "virginia": "va",
+    "washington": "wa", "west virginia": "wv", "wisconsin": "wi", "wyoming": "wy",
+    "puerto rico": "pr",
+}
+
+# ISO 3166 alpha-3 codes seen in imported data (URDB uses "USA"); lookups use alpha-2
+ALPHA3_COUNTRY_CODES = {
+    "usa": "us", "can": "ca", "mex": "mx", "pri": "pr", "gum": "gu", "vir": "vi",
+    "asm": "as", "mnp": "mp",
+}
+
+
+def norm(value: Optional[str]) -> str:
+    """Lookup key form of a place or utility name."""
+    return (value or "").strip().lower()
+
+
+def country_key(value: Optional[str]) -> str:
+    """Normalized ISO alpha-2 country code; known alpha-3 codes are mapped to alpha-2."""
+    country = norm(value)
+    return ALPHA3_COUNTRY_CODES.get(country, country)
+
+
+def region_key(country: str, region: Optional[str]) -> str:
+    """Normalized region; US state names become their two-letter codes."""
+    region = norm(region)
+    if country_key(country) == "us":
+        return US_STATE_CODES.get(region, region)
+    return region
+
+
+def location_levels(region: str, city: str):
+    """(region, city) keys from the most to the least specific: city, region, country."""
+    levels = [(region, city)] if city else []
+    if region:
+        levels.append((region, ""))
+    levels.append(("", ""))
+    return levels
@@ -0,0 +1,157 @@
+import copy
+import hashlib
+import json
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple, Union
+
+import numpy as np
+from pydantic import BaseModel
+
+from .helper import total_monthly_cost
+
+COMPILED_CACHE_MAX_ENTRIES = 256
+
+_compiled: "OrderedDict[str, CompiledTariff]" = OrderedDict()
+
+
+@dataclass(frozen=True)
+class CompiledTariff:
+    """A rate plan reduced to a piecewise-linear monthly cost function of kWh.
+
+    Segment k starts at `breakpoints[k]`, costs `cum_cost[k]` there and rises at
+    `slopes[k]` $/kWh (per-kWh fees folded in). `fixed_usd` holds the fixed monthly
+    fee plus flat additional fees. Values below the first breakpoint extend the first
+    segment, like the tier walk in helper.py.
+    """
+
+    plan_hash: str
+    breakpoints: np.ndarray
+    cum_cost: np.ndarray
+    slopes: np.ndarray
+    fixed_usd: float
+    # Set when the plan cannot be expressed as ascending segments (negative tier spans)
+    fallback_plan: Optional[dict] = None
+
+    def cost(self, monthly_kwh):
+        """Monthly cost in USD; `monthly_kwh` may be a scalar or any array shape."""
+        kwh = np.asarray(monthly_kwh, dtype=np.float64)
+        if self.fallback_plan is not None:
+            scalar = np.frompyfunc(lambda v: total_monthly_cost(self.fallback_plan, {"energy_kWh": v}), 1, 1)
+            result = scalar(kwh).astype(np.float64)
+        else:
+            segment = np.maximum(np.searchsorted(self.breakpoints, kwh, side="right") - 1, 0)
+            result = self.cum_cost[segment] + (kwh - self.breakpoints[segment]) * self.slopes[segment] + self.fixed_usd
+        return float(result) if result.ndim == 0 else result
+
+
+def plan_hash(plan: dict) -> str:
+    payload = json.dumps(plan, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def additional_fee_rates(plan: dict) -> Tuple[float, float]:
+    """`additional_fees` split into (USD per month, USD per kWh), as helper.apply_additional_fees bills them."""
+    per_month = 0.0
+    per_kwh = 0.0
+    for f in plan.get("additional_fees") or []:
+        amount = float(f["amount_usd"])
+        if (f.get("unit") or "").lower() == "kwh":
+            per_kwh += amount
+        else:
+            per_month += amount
+    return per_month, per_kwh
+
+
+def _tier_segments(tiers: list):
+    """Breakpoints and prices of the tier walk in helper.compute_tiered_plan, or None."""
+    breakpoints = [0.0]
+    prices = []
+    for t in tiers:
+        start = t.get("start_kWh")
+        end = t.get("end_kWh")
+        prices.append(float(t["price_per_kWh_usd"]))
+        if end is None:
+            # Unbounded tier takes all remaining energy
+            return breakpoints, prices
+        span = end if start is None else end - start
+        if span < 0:
+            return None
+        breakpoints.append(breakpoints[-1] + span)
+    # Energy past the last bounded tier is billed at the last tier's price
+    prices.append(float(tiers[-1]["price_per_kWh_usd"]))
+    return breakpoints, prices
+
+
+def _tou_price(periods: list) -> Optional[float]:
+    """Effective $/kWh of helper.compute_tou_plan; None for an empty period list."""
+    if not periods:
+        return None
+    all_hours = all(p.get("start_hour") is not None and p.get("end_hour") is not None for p in periods)
+    if not all_hours:
+        return sum(float(p["price_per_kWh_usd"]) for p in periods) / len(periods)
+    total_hours = 0.0
+    weighted_sum = 0.0
+    for p in periods:
+        span = (int(p["end_hour"]) - int(p["start_hour"])) % 24
+        span = 24.0 if span == 0 else float(span)
+        total_hours += span
+        weighted_sum += float(p["price_per_kWh_usd"]) * span
+    return weighted_sum / total_hours if total_hours > 0 else 0.0
+
+
+def _compile(plan: dict, digest: str) -> CompiledTariff:
+    pt = (plan.get("plan_type")).lower()
+    if pt == "hybrid":
+        pt = "tiered" if plan.get("tiers") else "tou" if plan.get("tou_periods") else "flat"
+
+    breakpoints, prices = [0.0], None
+    fixed = float(plan.get("fixed_monthly_fee_usd", 0.0))
+    if pt == "tiered":
+        segments = _tier_segments(plan["tiers"])
+        if segments is None:
+            return CompiledTariff(digest, np.zeros(1), np.zeros(1), np.zeros(1), 0.0, fallback_plan=copy.deepcopy(plan))
+        breakpoints, prices = segments
+    elif pt == "tou":
+        price = _tou_price(plan["tou_periods"])
+        if price is None:
+            # No periods: the scalar path bills nothing, not even the fixed fee
+            price, fixed = 0.0, 0.0
+        prices = [price]
+    else:
+        prices = [float(plan["price_per_kWh_usd"])]
+
+    monthly_fees, per_kwh_fees = additional_fee_rates(plan)
+    fixed += monthly_fees
+
+    bp = np.asarray(breakpoints[: len(prices)], dtype=np.float64)
+    slopes = np.asarray(prices, dtype=np.float64) + per_kwh_fees
+    cum_cost = np.concatenate(([0.0], np.cumsum(np.diff(bp) * slopes[:-1])))
+    return CompiledTariff(
+        plan_hash=digest,
+        breakpoints=bp,
+        cum_cost=cum_cost,
+        slopes=slopes,
+        fixed_usd=fixed,
+    )
+
+
+def compile_tariff(plan: Union[dict, BaseModel]) -> CompiledTariff:
+    """Compile a USDConvertedElectricityRatePlan (model or dict), cached by content hash."""
+    if isinstance(plan, BaseModel):
+        plan = plan.model_dump(exclude_none=True)
+    digest = plan_hash(plan)
+    compiled = _compiled.get(digest)
+    if compiled is not None:
+        _compiled.move_to_end(digest)
+        return compiled
+    compiled = _compile(plan, digest)
+    _compiled[digest] = compiled
+    if len(_compiled) > COMPILED_CACHE_MAX_ENTRIES:
+        _compiled.popitem(last=False)
+    return compiled
+
+
+def monthly_costs(plan: Union[dict, BaseModel], monthly_kwh):
+    """Vectorized total_monthly_cost: evaluate one plan at many monthly kWh values."""
+    return compile_tariff(plan).cost(monthly_kwh)
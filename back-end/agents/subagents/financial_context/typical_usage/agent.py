@@ -1,8 +1,11 @@
 from google.adk import Agent
 from google.adk.tools import google_search
 
-from models.schemas import EnergyUsage
+from agents.fast_path import CodeSetterAgent, parse_json_output
+from models.schemas import EnergyUsage, RegionalIdentifiers
 from . import prompt
+from ..regions import country_key, norm, region_key
+from .usage_table import get_usage_table
 
 typical_energy_usage_agent = Agent(
     name="typical_energy_usage_agent",
@@ -13,8 +16,8 @@ typical_energy_usage_agent = Agent(
     output_key="typical_energy_usage",
 )
 
-energy_setter = Agent(
-    name="energy_setter",
+energy_setter_llm = Agent(
+    name="energy_setter_llm",
     description="Agent to set the energy usage value.",
     model="gemini-2.0-flash-lite",
     instruction="Extract and return only the numerical energy usage in kWh/month from {typical_energy_usage}.",
@@ -22,4 +25,58 @@ energy_setter = Agent(
     output_schema=EnergyUsage,
     disallow_transfer_to_parent=True,
     disallow_transfer_to_peers=True,
-)
\ No newline at end of file
+)
+
+def _energy_usage_from_state(state: dict) -> dict:
+    found = parse_json_output(state["typical_energy_usage"])
+    usage = EnergyUsage(
+        energy_kWh=found.get("kwh_per_month", found.get("energy_kWh")),
+        source_url=found.get("source_url"),
+    )
+    return {"energy_kWh": usage.model_dump(exclude_none=True)}
+
+energy_setter = CodeSetterAgent(
+    name="energy_setter",
+    compute=_energy_usage_from_state,
+    fallback=energy_setter_llm,
+)
+
+def stored_energy_usage(state: dict):
+    """Typical usage for the resolved region from the local table, as energy_setter writes it."""
+    table = get_usage_table()
+    if table is None:
+        return None
+    region = RegionalIdentifiers.model_validate(parse_json_output(state["regional_identifiers"]))
+    found = table.find(region.country_code, region.state_or_region, region.city, region.building_type)
+    if found is None:
+        return None
+    kwh_per_month, source_url = found
+    usage = EnergyUsage(energy_kWh=kwh_per_month, source_url=source_url)
+    return {"energy_kWh": usage.model_dump(exclude_none=True)}
+
+def energy_usage_key(state: dict) -> tuple:
+    """Sessions resolving the same place and building type share one usage search."""
+    region = RegionalIdentifiers.model_validate(parse_json_output(state["regional_identifiers"]))
+    country = country_key(region.country_code)
+    return (
+        country,
+        region_key(country, region.state_or_region),
+        norm(region.city),
+        norm(region.building_type),
+    )
+
+def store_energy_usage(state: dict) -> None:
+    """Write a usage figure found by the search back to the table."""
+    table = get_usage_table()
+    if table is None:
+        return
+    region = RegionalIdentifiers.model_validate(parse_json_output(state["regional_identifiers"]))
+    usage = EnergyUsage.model_validate(parse_json_output(state["energy_kWh"]))
+    table.put(
+        usage.energy_kWh,
+        country_code=region.country_code,
+        region=region.state_or_region,
+        city=region.city,
+        building_type=region.building_type,
+        source_url=usage.source_url,
+    )
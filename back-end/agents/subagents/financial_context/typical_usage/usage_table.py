@@ -0,0 +1,210 @@
+"""Typical monthly household electricity use by place and building type, in SQLite.
+
+Seeded from a CSV with columns country_code, region, city, building_type, kwh_per_month
+and source_url (region, city and building_type may be empty), and grown from LLM searches:
+
+    python -m agents.subagents.financial_context.typical_usage.usage_table usage.csv
+"""
+import argparse
+import csv
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterable, Optional, Tuple
+
+import logging
+
+from ..regions import country_key, location_levels, norm, region_key
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TABLE_PATH = ".cache/typical_usage.sqlite3"
+DEFAULT_BUILDING_TYPE = "residential"
+DEFAULT_LLM_TTL_SECONDS = 90 * 24 * 3600
+MEMO_MAX_ENTRIES = 10_000
+# Memoized lookups are re-read after this long, so expired searched rows drop out
+MEMO_TTL_SECONDS = 300
+
+SOURCE_SEED = "seed"
+SOURCE_LLM = "llm"
+
+# (kwh_per_month, source_url)
+Usage = Tuple[float, Optional[str]]
+
+
+class TypicalUsageTable:
+    """kWh/month keyed by (country, region, city, building type) with hierarchical fallback.
+
+    `find` tries city, then region, then country for the building type (residential
+    when none is given); another building type's figure is never used. `put` records a
+    searched value at the level that was searched only, since one city's figure says
+    little about the rest of its state or country. Searched rows expire after
+    `llm_ttl_seconds`; seeded rows do not. Lookups are memoized in process for up to
+    MEMO_TTL_SECONDS or until the next write.
+    """
+
+    def __init__(self, path: str = DEFAULT_TABLE_PATH, llm_ttl_seconds: float = DEFAULT_LLM_TTL_SECONDS):
+        self.path = path
+        self.llm_ttl_seconds = float(llm_ttl_seconds)
+        self.hits = 0
+        self.misses = 0
+        self._memo = {}
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS typical_usage ("
+            " country_code TEXT NOT NULL,"
+            " region TEXT NOT NULL,"
+            " city TEXT NOT NULL,"
+            " building_type TEXT NOT NULL,"
+            " kwh_per_month REAL NOT NULL,"
+            " source_url TEXT,"
+            " source TEXT NOT NULL,"
+            " updated_at REAL NOT NULL,"
+            " PRIMARY KEY (country_code, region, city, building_type))"
+        )
+
+    @classmethod
+    def from_env(cls) -> "TypicalUsageTable":
+        return cls(
+            path=os.getenv("TYPICAL_USAGE_PATH", DEFAULT_TABLE_PATH),
+            llm_ttl_seconds=float(os.getenv("TYPICAL_USAGE_LLM_TTL_SECONDS", DEFAULT_LLM_TTL_SECONDS)),
+        )
+
+    def find(
+        self,
+        country_code: str,
+        region: Optional[str] = None,
+        city: Optional[str] = None,
+        building_type: Optional[str] = None,
+    ) -> Optional[Usage]:
+        country = country_key(country_code)
+        key = (country, region_key(country, region), norm(city), norm(building_type) or DEFAULT_BUILDING_TYPE)
+        now = time.time()
+        with self._lock:
+            memo = self._memo.get(key)
+            if memo is not None and now - memo[1] < MEMO_TTL_SECONDS:
+                usage = memo[0]
+            else:
+                usage = self._find_locked(*key, now=now)
+                if len(self._memo) >= MEMO_MAX_ENTRIES:
+                    self._memo.clear()
+                self._memo[key] = (usage, now)
+            if usage is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return usage
+
+    def _find_locked(
+        self, country: str, region: str, city: str, building_type: str, now: float
+    ) -> Optional[Usage]:
+        if not country:
+            return None
+        for level_region, level_city in location_levels(region, city):
+            row = self._conn.execute(
+                "SELECT kwh_per_month, source_url FROM typical_usage"
+                " WHERE country_code = ? AND region = ? AND city = ? AND building_type = ?"
+                " AND (source != ? OR updated_at >= ?)",
+                (country, level_region, level_city, building_type, SOURCE_LLM, now - self.llm_ttl_seconds),
+            ).fetchone()
+            if row is not None:
+                return row[0], row[1]
+        return None
+
+    def put(
+        self,
+        kwh_per_month: float,
+        *,
+        country_code: str,
+        region: Optional[str] = None,
+        city: Optional[str] = None,
+        building_type: Optional[str] = None,
+        source_url: Optional[str] = None,
+        source: str = SOURCE_LLM,
+    ) -> None:
+        country = country_key(country_code)
+        # Most specific level known, i.e. the one the search was for
+        level_region, level_city = location_levels(region_key(country, region), norm(city))[0]
+        bt = norm(building_type) or DEFAULT_BUILDING_TYPE
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO typical_usage"
+                " (country_code, region, city, building_type, kwh_per_month, source_url, source, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (country, level_region, level_city, bt, float(kwh_per_month), source_url, source, time.time()),
+            )
+            self._memo.clear()
+
+    def seed(self, rows: Iterable[dict]) -> int:
+        count = 0
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            for row in rows:
+                country = country_key(row["country_code"])
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO typical_usage"
+                    " (country_code, region, city, building_type, kwh_per_month, source_url, source, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        country,
+                        region_key(country, row.get("region")),
+                        norm(row.get("city")),
+                        norm(row.get("building_type")) or DEFAULT_BUILDING_TYPE,
+                        float(row["kwh_per_month"]),
+                        row.get("source_url") or None,
+                        SOURCE_SEED,
+                        now,
+                    ),
+                )
+                count += 1
+            self._conn.execute("COMMIT")
+            self._memo.clear()
+        return count
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT source, COUNT(*) FROM typical_usage GROUP BY source").fetchall())
+        lookups = self.hits + self.misses
+        return {
+            "entries": counts,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+_table: Optional[TypicalUsageTable] = None
+_table_lock = threading.Lock()
+
+
+def get_usage_table() -> Optional[TypicalUsageTable]:
+    """Shared process-wide table; disabled when TYPICAL_USAGE_ENABLED is falsy."""
+    global _table
+    if os.getenv("TYPICAL_USAGE_ENABLED", "true").lower() in ("0", "false", "no"):
+        return None
+    if _table is None:
+        with _table_lock:
+            if _table is None:
+                _table = TypicalUsageTable.from_env()
+    return _table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed the typical usage table from a CSV file.")
+    parser.add_argument("path")
+    parser.add_argument("--table", default=os.getenv("TYPICAL_USAGE_PATH", DEFAULT_TABLE_PATH))
+    args = parser.parse_args()
+    with open(args.path, newline="", encoding="utf-8") as f:
+        count = TypicalUsageTable(args.table).seed(csv.DictReader(f))
+    print(f"Seeded {count} rows into {args.table}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,10 @@
 from google.adk.agents import Agent, SequentialAgent
 from google.adk.tools import google_search, google_maps_grounding
 
+from agents.fast_path import CachedLookupAgent, CodeSetterAgent, parse_json_output
+from models.schemas import RegionalIdentifiers
 from . import prompt
+from .cache import DEFAULT_PRECISION, geohash_encode, get_regional_cache
 
 regional_context_search_agent = Agent(
         name="regional_context_search_agent",
@@ -12,15 +15,65 @@ regional_context_search_agent = Agent(
         output_key="regional_identifiers",
 )
 
-currency_code_setter = Agent(
-        name="currency_code_setter",
+currency_code_setter_llm = Agent(
+        name="currency_code_setter_llm",
         description="Agent to set currency code.",
         model="gemini-2.0-flash-lite",
         instruction="Extract and return only the currency code as a string from {regional_identifiers}.",
         output_key="currency_code",
 )
 
-regional_context_agent = SequentialAgent(
+def _currency_code_from_state(state: dict) -> dict:
+    identifiers = RegionalIdentifiers.model_validate(parse_json_output(state["regional_identifiers"]))
+    return {"currency_code": identifiers.currency_code}
+
+currency_code_setter = CodeSetterAgent(
+    name="currency_code_setter",
+    compute=_currency_code_from_state,
+    fallback=currency_code_setter_llm,
+)
+
+def _request_point(state: dict) -> tuple:
+    """The address's own coordinates: `latitude`/`longitude` are moved to a proxy point
+    when the Solar API does not cover the address, possibly while the search runs."""
+    return (
+        state.get("request_latitude", state["latitude"]),
+        state.get("request_longitude", state["longitude"]),
+    )
+
+def _cached_regional_context(state: dict):
+    cache = get_regional_cache()
+    if cache is None:
+        return None
+    identifiers = cache.get(*_request_point(state))
+    if identifiers is None:
+        return None
+    identifiers = RegionalIdentifiers.model_validate(identifiers)
+    return {
+        "regional_identifiers": identifiers.model_dump(),
+        "currency_code": identifiers.currency_code,
+    }
+
+def _store_regional_context(state: dict) -> None:
+    cache = get_regional_cache()
+    if cache is None:
+        return
+    identifiers = RegionalIdentifiers.model_validate(parse_json_output(state["regional_identifiers"]))
+    cache.put(*_request_point(state), identifiers.model_dump())
+
+def _regional_context_key(state: dict) -> str:
+    cache = get_regional_cache()
+    precision = cache.precision if cache else DEFAULT_PRECISION
+    return geohash_encode(*_request_point(state), precision)
+
+# Same country/currency/admin levels for every address in an area: search only on a miss
+regional_context_agent = CachedLookupAgent(
     name="regional_context_agent",
-    sub_agents=[regional_context_search_agent, currency_code_setter],
+    lookup=_cached_regional_context,
+    store=_store_regional_context,
+    key=_regional_context_key,
+    fallback=SequentialAgent(
+        name="search_regional_context",
+        sub_agents=[regional_context_search_agent, currency_code_setter],
+    ),
 )
\ No newline at end of file
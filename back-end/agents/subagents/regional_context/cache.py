@@ -0,0 +1,186 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = ".cache/regional_context.sqlite3"
+DEFAULT_PRECISION = 5  # ~4.9 km x 4.9 km cells
+DEFAULT_TTL_SECONDS = 180 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 100_000
+
+# Points are stored at full precision; a stored point this close (~150 m cell) is
+# treated as the same address, so its address-level fields are reused as well.
+STORED_PRECISION = 9
+ADDRESS_PRECISION = 7
+ADDRESS_FIELDS = ("building_type", "neighborhood", "regional_level_1", "regional_level_2")
+REGION_FIELDS = ("city", "county_or_province", "state_or_region", "country_code", "currency_code")
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_encode(latitude: float, longitude: float, precision: int = STORED_PRECISION) -> str:
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        rng, value = (lon_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits <<= 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+
+def _common_prefix_len(a: str, b: str) -> int:
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
+
+class RegionalContextCache:
+    """Persistent RegionalIdentifiers keyed by geohash, learned from past lookups.
+
+    A lookup hits when a stored point shares the query's `precision`-character geohash
+    cell. Only the region-level fields are reused unless that point is within the same
+    ~150 m cell; address-level fields (building type, neighborhood) are cleared.
+    When the query cell is empty but every stored point in the enclosing, one character
+    shorter cell agrees on the region, that region is returned too, so the index grows
+    to cover a whole city from a few lookups.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        precision: int = DEFAULT_PRECISION,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.path = path
+        self.precision = int(precision)
+        self.ttl_seconds = float(ttl_seconds)
+        self.max_entries = int(max_entries)
+        self.hits = 0
+        self.prefix_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS regional_context ("
+            " geohash TEXT PRIMARY KEY,"
+            " identifiers TEXT NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS regional_context_created_at ON regional_context (created_at)"
+        )
+
+    @classmethod
+    def from_env(cls) -> "RegionalContextCache":
+        return cls(
+            path=os.getenv("REGIONAL_CACHE_PATH", DEFAULT_CACHE_PATH),
+            precision=int(os.getenv("REGIONAL_CACHE_GEOHASH_PRECISION", DEFAULT_PRECISION)),
+            ttl_seconds=float(os.getenv("REGIONAL_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS)),
+            max_entries=int(os.getenv("REGIONAL_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+        )
+
+    def _rows_with_prefix(self, prefix: str, now: float):
+        # The primary key index serves this range scan
+        return self._conn.execute(
+            "SELECT geohash, identifiers FROM regional_context"
+            " WHERE geohash >= ? AND geohash < ? AND created_at >= ?",
+            (prefix, prefix + "~", now - self.ttl_seconds),
+        ).fetchall()
+
+    def get(self, latitude: float, longitude: float) -> Optional[dict]:
+        point = geohash_encode(latitude, longitude)
+        now = time.time()
+        with self._lock:
+            rows = self._rows_with_prefix(point[: self.precision], now)
+            if rows:
+                geohash, identifiers = max(rows, key=lambda r: _common_prefix_len(point, r[0]))
+                identifiers = json.loads(identifiers)
+                if _common_prefix_len(point, geohash) < ADDRESS_PRECISION:
+                    identifiers.update(dict.fromkeys(ADDRESS_FIELDS))
+                self.hits += 1
+                return identifiers
+            if self.precision > 1:
+                rows = self._rows_with_prefix(point[: self.precision - 1], now)
+                regions = [json.loads(identifiers) for _, identifiers in rows]
+                keys = {tuple(r.get(f) for f in REGION_FIELDS) for r in regions}
+                if len(regions) >= 2 and len(keys) == 1:
+                    identifiers = regions[0]
+                    identifiers.update(dict.fromkeys(ADDRESS_FIELDS))
+                    self.prefix_hits += 1
+                    return identifiers
+            self.misses += 1
+        return None
+
+    def put(self, latitude: float, longitude: float, identifiers: dict) -> None:
+        geohash = geohash_encode(latitude, longitude)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO regional_context (geohash, identifiers, created_at)"
+                " VALUES (?, ?, ?)",
+                (geohash, json.dumps(identifiers, separators=(",", ":")), time.time()),
+            )
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM regional_context").fetchone()
+            overflow = count - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM regional_context WHERE geohash IN ("
+                    " SELECT geohash FROM regional_context ORDER BY created_at ASC LIMIT ?)",
+                    (overflow,),
+                )
+
+    def stats(self) -> dict:
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM regional_context").fetchone()
+        lookups = self.hits + self.prefix_hits + self.misses
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "prefix_hits": self.prefix_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.prefix_hits) / lookups if lookups else 0.0,
+        }
+
+
+_cache: Optional[RegionalContextCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_regional_cache() -> Optional[RegionalContextCache]:
+    """Shared process-wide cache; disabled when REGIONAL_CACHE_ENABLED is falsy."""
+    global _cache
+    if os.getenv("REGIONAL_CACHE_ENABLED", "true").lower() in ("0", "false", "no"):
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = RegionalContextCache.from_env()
+    return _cache
@@ -1,11 +1,27 @@
+import logging
+import os
+
 from google.adk.agents import Agent
 from google.adk.tools.tool_context import ToolContext
 
+from agents.fast_path import CodeSetterAgent, parse_json_output
 from models.schemas import SolarPotential
 from .calculator import calculate_monthly_bill_with_solar
+from .hourly import hourly_bill_analysis, needs_hourly_pricing
+from .panel_yield import PanelYieldCurve
+from .projection import project_cash_flows, scenario_grid, summary_table
 
-solar_potential_setter = Agent(
-	name="solar_potential_setter",
+logger = logging.getLogger(__name__)
+
+# Installed cost per panel; panel-count optimization and projections are skipped without it
+PANEL_COST_USD = os.getenv("SOLAR_PANEL_COST_USD")
+LIFETIME_YEARS = int(os.getenv("SOLAR_LIFETIME_YEARS", 25))
+MAX_PAYBACK_YEARS = float(os.getenv("SOLAR_MAX_PAYBACK_YEARS", 10))
+# Low / base / high tariff escalation for the multi-year projection
+PROJECTION_SCENARIOS = scenario_grid(tariff_escalation=(0.0, 0.025, 0.05))
+
+solar_potential_setter_llm = Agent(
+	name="solar_potential_setter_llm",
 	description="Extract only the minimal solar potential fields needed for billing calculations.",
 	model="gemini-2.0-flash-lite",
 	instruction=(
@@ -19,6 +35,17 @@ solar_potential_setter = Agent(
 	disallow_transfer_to_peers=True,
 )
 
+def _solar_potential_from_state(state: dict) -> dict:
+	insights = parse_json_output(state["solar_building_insights"])
+	potential = SolarPotential.model_validate(insights["solarPotential"])
+	return {"solar_potentials": potential.model_dump(exclude_none=True)}
+
+solar_potential_setter = CodeSetterAgent(
+	name="solar_potential_setter",
+	compute=_solar_potential_from_state,
+	fallback=solar_potential_setter_llm,
+)
+
 def _monthly_bill_with_solar_tool(
 	solar_potential: dict,
     average_monthly_expense_usd: float,
@@ -47,7 +74,57 @@ def _monthly_bill_with_solar_tool(
 		monthly_bill_usd=monthly_bill,
 		monthly_kwh_energy_consumption=usage,
 	)
-	tool_context.session.state["solar_monthly_bill_analysis"] = result
+	# A blended $/kWh misprices TOU and demand tariffs; add the hourly simulation for those
+	try:
+		plan = parse_json_output(tool_context.state.get("usd_electricity_rates"))
+		if "error" not in result and needs_hourly_pricing(plan):
+			result["hourly"] = hourly_bill_analysis(
+				solar_potential,
+				plan,
+				monthly_kwh=usage,
+				latitude=tool_context.state.get("latitude", 0.0),
+			)
+	except (KeyError, TypeError, ValueError) as e:
+		logger.warning(f"Hourly simulation skipped: {e}")
+	# Per-panel yields allow any panel count, not just the API's handful of configs
+	try:
+		insights = parse_json_output(tool_context.state.get("solar_building_insights"))
+		curve = PanelYieldCurve.from_building_insights(insights) if "error" not in result else None
+		if curve is not None and curve.max_panels and PANEL_COST_USD:
+			result["panel_count_optimization"] = curve.optimize(
+				monthly_bill_usd=monthly_bill,
+				monthly_kwh_energy_consumption=usage,
+				cost_per_panel_usd=float(PANEL_COST_USD),
+				lifetime_years=LIFETIME_YEARS,
+				max_payback_years=MAX_PAYBACK_YEARS,
+			)
+	except (KeyError, TypeError, ValueError) as e:
+		logger.warning(f"Panel count optimization skipped: {e}")
+	# Multi-year view of every config under every scenario in one array pass
+	try:
+		if "error" not in result and PANEL_COST_USD and result["per_config"]:
+			configs = result["per_config"]
+			panels = [c["panelsCount"] for c in configs]
+			plan = parse_json_output(tool_context.state.get("usd_electricity_rates"))
+			projection = project_cash_flows(
+				[c["yearlyEnergyDcKwh"] for c in configs],
+				system_cost_usd=[n * float(PANEL_COST_USD) for n in panels],
+				monthly_kwh_energy_consumption=usage,
+				monthly_bill_usd=monthly_bill,
+				plan=plan if isinstance(plan, dict) and plan.get("plan_type") else None,
+				scenarios=PROJECTION_SCENARIOS,
+				years=LIFETIME_YEARS,
+			)
+			# Rank by NPV under the base scenario; only the winner goes back to the model
+			best = int(projection["npv_usd"][:, 1].argmax())
+			result["projection"] = {
+				"years": LIFETIME_YEARS,
+				"best_npv_panelsCount": panels[best],
+				"scenarios": [r for r in summary_table(projection, panels) if r["config_index"] == best],
+			}
+	except (KeyError, TypeError, ValueError) as e:
+		logger.warning(f"Cash-flow projection skipped: {e}")
+	tool_context.state["solar_monthly_bill_analysis"] = result
 	return result
 
 solar_monthly_bill_calculator_agent = Agent(
@@ -0,0 +1,115 @@
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+from .calculator import DC_TO_AC_DERATE, DEFAULT_PANEL_WATTS, PERFORMANCE_RATIO
+
+
+def pack_solar_potentials(solar_potentials: Sequence[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+	"""Pack per-site solarPotential dicts into padded (sites x configs) arrays.
+
+	Applies the same config filtering and single-config synthesis as
+	calculate_monthly_bill_with_solar. Padding and unusable sites are NaN.
+	"""
+	rows = []
+	synthetic = np.zeros(len(solar_potentials), dtype=bool)
+	for i, sp in enumerate(solar_potentials):
+		row = []
+		raw_configs = sp.get("solarPanelConfigs")
+		if isinstance(raw_configs, list):
+			for c in raw_configs:
+				pc = c.get("panelsCount")
+				yd = c.get("yearlyEnergyDcKwh")
+				if pc is None or yd is None:
+					continue
+				row.append((pc, float(yd)))
+		if not row:
+			max_panels = sp.get("maxArrayPanelsCount")
+			sunshine = sp.get("maxSunshineHoursPerYear")
+			if isinstance(max_panels, (int, float)) and isinstance(sunshine, (int, float)):
+				panel_watts = sp.get("panelCapacityWatts")
+				if not isinstance(panel_watts, (int, float)):
+					panel_watts = DEFAULT_PANEL_WATTS
+				yearly_dc = float(max_panels) * float(panel_watts) * float(sunshine) / 1000.0 * PERFORMANCE_RATIO
+				row.append((int(max_panels), yearly_dc))
+				synthetic[i] = True
+		rows.append(row)
+
+	width = max([1] + [len(r) for r in rows])
+	panels_count = np.full((len(rows), width), np.nan)
+	yearly_dc_kwh = np.full((len(rows), width), np.nan)
+	for i, row in enumerate(rows):
+		if row:
+			panels_count[i, :len(row)], yearly_dc_kwh[i, :len(row)] = zip(*row)
+	return {"panels_count": panels_count, "yearly_dc_kwh": yearly_dc_kwh, "synthetic": synthetic}
+
+
+def calculate_monthly_bills_batch(
+	yearly_dc_kwh: np.ndarray,
+	*,
+	monthly_bill_usd: np.ndarray,
+	monthly_kwh_energy_consumption: np.ndarray,
+	panels_count: Optional[np.ndarray] = None,
+) -> Dict[str, np.ndarray]:
+	"""Vectorized calculate_monthly_bill_with_solar over (sites x configs) in one pass.
+
+	Inputs:
+	  - yearly_dc_kwh: (S, C) array with C >= 1, NaN where a site has fewer configs
+	  - monthly_bill_usd, monthly_kwh_energy_consumption: (S,) arrays
+	  - panels_count: optional (S, C) array, echoed back for the recommended config
+
+	Performs the same float64 operations in the same order as the scalar function, so
+	every per-config value is identical. Sites with a missing bill or zero/missing usage
+	get NaN rows and recommended_index -1, like the scalar function's error result.
+	"""
+	yearly_dc = np.asarray(yearly_dc_kwh, dtype=np.float64)
+	bill = np.asarray(monthly_bill_usd, dtype=np.float64)
+	usage = np.asarray(monthly_kwh_energy_consumption, dtype=np.float64)
+	valid_site = np.isfinite(bill) & np.isfinite(usage) & (usage != 0)
+
+	with np.errstate(divide="ignore", invalid="ignore"):
+		price_per_kwh = np.where(valid_site, bill / usage, np.nan)
+	annual_consumption = usage * 12.0
+
+	initial_ac = yearly_dc * DC_TO_AC_DERATE
+	remaining_annual = np.maximum(0.0, annual_consumption[:, None] - initial_ac)
+	annual_bill_after = remaining_annual * price_per_kwh[:, None]
+	monthly_after = annual_bill_after / 12.0
+
+	# np.argmin, like min(), returns the first of equal minima
+	ranked = np.where(np.isnan(monthly_after), np.inf, monthly_after)
+	has_config = np.isfinite(ranked).any(axis=1)
+	recommended_index = np.where(has_config, ranked.argmin(axis=1), -1)
+	sites = np.arange(len(bill))
+	pick = np.maximum(recommended_index, 0)
+
+	result = {
+		"price_per_kWh_usd": price_per_kwh,
+		"initialAcKwhPerYear": initial_ac,
+		"monthlyBillWithSolarUsd": monthly_after,
+		"recommended_index": recommended_index,
+		"recommended_monthlyBillWithSolarUsd": np.where(has_config, monthly_after[sites, pick], np.nan),
+	}
+	if panels_count is not None:
+		panels = np.asarray(panels_count, dtype=np.float64)
+		result["recommended_panelsCount"] = np.where(has_config, panels[sites, pick], np.nan)
+	return result
+
+
+def calculate_monthly_bills_for_sites(
+	solar_potentials: Sequence[Dict[str, Any]],
+	*,
+	monthly_bill_usd: Sequence[Optional[float]],
+	monthly_kwh_energy_consumption: Sequence[Optional[float]],
+) -> Dict[str, np.ndarray]:
+	"""Convenience wrapper: pack solarPotential dicts and run the batched engine."""
+	packed = pack_solar_potentials(solar_potentials)
+	to_array = lambda values: np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+	result = calculate_monthly_bills_batch(
+		packed["yearly_dc_kwh"],
+		monthly_bill_usd=to_array(monthly_bill_usd),
+		monthly_kwh_energy_consumption=to_array(monthly_kwh_energy_consumption),
+		panels_count=packed["panels_count"],
+	)
+	result["synthetic_config_used"] = packed["synthetic"]
+	return result
@@ -0,0 +1,184 @@
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from agents.subagents.financial_context.tariff_compiler import additional_fee_rates, compile_tariff
+from .batch import pack_solar_potentials
+from .calculator import DC_TO_AC_DERATE
+
+HOURS_PER_YEAR = 8760
+DAYS_PER_MONTH = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+# First hour of each month in a non-leap year, for np.add.reduceat
+MONTH_START_HOURS = np.cumsum((0,) + DAYS_PER_MONTH[:-1]) * 24
+
+# Relative residential load by hour of day: overnight trough, morning and evening peaks
+_DAILY_LOAD_SHAPE = np.array([
+	0.55, 0.50, 0.48, 0.47, 0.48, 0.55, 0.75, 0.95, 0.90, 0.80, 0.75, 0.75,
+	0.75, 0.75, 0.80, 0.90, 1.05, 1.30, 1.50, 1.55, 1.45, 1.25, 0.95, 0.70,
+])
+# Atmospheric transmittance used for the clear-sky irradiance shape (Meinel model)
+_CLEAR_SKY_TRANSMITTANCE = 0.7
+
+
+def _day_of_year() -> np.ndarray:
+	return np.repeat(np.arange(1, 366), 24)
+
+
+def _hour_of_day() -> np.ndarray:
+	return np.tile(np.arange(24), 365)
+
+
+def load_shape() -> np.ndarray:
+	"""8760-hour load shape summing to 1: daily curve times a winter/summer seasonal swing.
+
+	The seasonal term has a half-year period, so the shape holds in either hemisphere.
+	"""
+	day = _day_of_year()
+	seasonal = 1.0 + 0.15 * np.cos(4.0 * np.pi * (day - 20) / 365.0)
+	shape = _DAILY_LOAD_SHAPE[_hour_of_day()] * seasonal
+	return shape / shape.sum()
+
+
+@lru_cache(maxsize=256)
+def _generation_shape(latitude_rounded: float) -> np.ndarray:
+	day = _day_of_year()
+	hour = _hour_of_day()
+	phi = np.radians(latitude_rounded)
+	declination = np.radians(23.44) * np.sin(2.0 * np.pi * (284 + day) / 365.0)
+	hour_angle = np.radians(15.0 * (hour + 0.5 - 12.0))
+	cos_zenith = np.sin(phi) * np.sin(declination) + np.cos(phi) * np.cos(declination) * np.cos(hour_angle)
+	cos_zenith = np.clip(cos_zenith, 0.0, None)
+	with np.errstate(divide="ignore"):
+		air_mass = np.where(cos_zenith > 0.01, 1.0 / cos_zenith, np.inf)
+	irradiance = cos_zenith * _CLEAR_SKY_TRANSMITTANCE ** (air_mass ** 0.678)
+	shape = irradiance / irradiance.sum()
+	shape.setflags(write=False)
+	return shape
+
+
+def generation_shape(latitude: float) -> np.ndarray:
+	"""8760-hour clear-sky generation shape summing to 1, in local solar time.
+
+	Cached per 0.1 degree of latitude; the annual total comes from yearlyEnergyDcKwh.
+	"""
+	return _generation_shape(round(float(latitude), 1))
+
+
+def hourly_prices(plan: Dict[str, Any]) -> Optional[np.ndarray]:
+	"""Energy price for each hour of the day from `tou_periods`, or None if the plan is not hourly.
+
+	Periods follow helper.compute_tou_plan: [start_hour, end_hour) wrapping past midnight,
+	with start == end covering the whole day. Later periods override earlier ones; hours no
+	period covers get price_per_kWh_usd, or the mean period price if the plan has none.
+	"""
+	periods = plan.get("tou_periods") or []
+	pt = (plan.get("plan_type") or "").lower()
+	if not periods or pt not in ("tou", "hybrid") or (pt == "hybrid" and plan.get("tiers")):
+		return None
+	if any(p.get("start_hour") is None or p.get("end_hour") is None for p in periods):
+		return None
+	base = plan.get("price_per_kWh_usd")
+	if base is None:
+		base = sum(float(p["price_per_kWh_usd"]) for p in periods) / len(periods)
+	prices = np.full(24, float(base))
+	for p in periods:
+		start = int(p["start_hour"]) % 24
+		span = (int(p["end_hour"]) - start) % 24 or 24
+		prices[(start + np.arange(span)) % 24] = float(p["price_per_kWh_usd"])
+	return prices
+
+
+def simulate_hourly_bills(
+	plan: Dict[str, Any],
+	*,
+	monthly_kwh: float,
+	yearly_dc_kwh: np.ndarray,
+	latitude: float,
+	export_credit: float = 1.0,
+) -> Dict[str, np.ndarray]:
+	"""Price the hourly net load of every panel config for one year, all configs at once.
+
+	The load is `load_shape() * monthly_kwh * 12`; each config generates
+	`yearly_dc_kwh * DC_TO_AC_DERATE` spread over `generation_shape(latitude)`. Exported
+	hours are credited at `export_credit` times the import price (1.0 = net metering).
+
+	- TOU plans with hours: energy is priced hour by hour; per-kWh fees apply to the month's
+	  net kWh and the month's energy charge cannot go below zero.
+	- Other plans: the month's net kWh goes through the compiled tariff (tiers, fees).
+	- demand_charges: every price_per_kW_usd is billed on the month's peak hourly import.
+
+	Returns (configs x 12) arrays `monthly_bill_usd`, `energy_charge_usd`,
+	`demand_charge_usd`, a (12,) `baseline_monthly_bill_usd` without solar, and the
+	per-config `average_monthly_bill_usd`.
+	"""
+	yearly_dc = np.nan_to_num(np.atleast_1d(np.asarray(yearly_dc_kwh, dtype=np.float64)))
+	load = load_shape() * (float(monthly_kwh) * 12.0)
+	# Row 0 is the no-solar baseline
+	ac = np.concatenate(([0.0], yearly_dc * DC_TO_AC_DERATE))
+	net = load[None, :] - ac[:, None] * generation_shape(latitude)[None, :]
+	billed = np.maximum(net, 0.0) + export_credit * np.minimum(net, 0.0)
+
+	monthly_net = np.add.reduceat(billed, MONTH_START_HOURS, axis=1)
+	prices = hourly_prices(plan)
+	if prices is not None:
+		monthly_fees, per_kwh_fees = additional_fee_rates(plan)
+		energy = np.add.reduceat(billed * np.tile(prices, 365)[None, :], MONTH_START_HOURS, axis=1)
+		energy = np.maximum(energy + per_kwh_fees * monthly_net, 0.0)
+		energy += float(plan.get("fixed_monthly_fee_usd") or 0.0) + monthly_fees
+	else:
+		energy = compile_tariff(plan).cost(np.maximum(monthly_net, 0.0))
+
+	demand_rate = sum(float(c["price_per_kW_usd"]) for c in plan.get("demand_charges") or [])
+	peak_kw = np.maximum.reduceat(np.maximum(net, 0.0), MONTH_START_HOURS, axis=1)
+	demand = peak_kw * demand_rate
+
+	bills = energy + demand
+	return {
+		"baseline_monthly_bill_usd": bills[0],
+		"monthly_bill_usd": bills[1:],
+		"energy_charge_usd": energy[1:],
+		"demand_charge_usd": demand[1:],
+		"average_monthly_bill_usd": bills[1:].mean(axis=1),
+	}
+
+
+def needs_hourly_pricing(plan: Any) -> bool:
+	"""True when a blended $/kWh misprices the plan: TOU hours or demand charges."""
+	if not isinstance(plan, dict):
+		return False
+	return bool(plan.get("demand_charges")) or hourly_prices(plan) is not None
+
+
+def hourly_bill_analysis(
+	solar_potential: Dict[str, Any],
+	plan: Dict[str, Any],
+	*,
+	monthly_kwh: float,
+	latitude: float,
+) -> Dict[str, Any]:
+	"""JSON-ready summary of simulate_hourly_bills for the configs in a solarPotential."""
+	packed = pack_solar_potentials([solar_potential])
+	valid = ~np.isnan(packed["yearly_dc_kwh"][0])
+	if not valid.any():
+		return {"error": "No usable configs and cannot synthesize"}
+	panels = packed["panels_count"][0][valid]
+	sim = simulate_hourly_bills(
+		plan,
+		monthly_kwh=monthly_kwh,
+		yearly_dc_kwh=packed["yearly_dc_kwh"][0][valid],
+		latitude=latitude,
+	)
+	per_config = [
+		{
+			"panelsCount": int(panels[i]),
+			"monthlyBillWithSolarUsd": round(float(sim["average_monthly_bill_usd"][i]), 2),
+			"monthlyDemandChargeUsd": round(float(sim["demand_charge_usd"][i].mean()), 2),
+		}
+		for i in range(len(panels))
+	]
+	return {
+		"monthly_bill_baseline_usd": round(float(sim["baseline_monthly_bill_usd"].mean()), 2),
+		"per_config": per_config,
+		"recommended": min(per_config, key=lambda r: r["monthlyBillWithSolarUsd"]),
+	}
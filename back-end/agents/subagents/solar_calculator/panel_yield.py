@@ -0,0 +1,133 @@
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+from .calculator import DC_TO_AC_DERATE
+
+DEFAULT_LIFETIME_YEARS = 25
+DEFAULT_MAX_PAYBACK_YEARS = 10.0
+
+
+def panel_yields_from_insights(insights: Dict[str, Any]) -> Optional[np.ndarray]:
+	"""Per-panel yearlyEnergyDcKwh from buildingInsights, raw (`solarPanels`) or slim (`panelYieldsDcKwh`)."""
+	if not isinstance(insights, dict):
+		return None
+	yields = insights.get("panelYieldsDcKwh")
+	if yields is None:
+		panels = (insights.get("solarPotential") or {}).get("solarPanels")
+		if isinstance(panels, list):
+			yields = [p.get("yearlyEnergyDcKwh") for p in panels if isinstance(p, dict)]
+	if not yields:
+		return None
+	values = np.array([np.nan if y is None else y for y in yields], dtype=np.float64)
+	values = values[np.isfinite(values)]
+	return values if values.size else None
+
+
+class PanelYieldCurve:
+	"""Yield, bill and savings for any panel count from 1 to the roof's maximum.
+
+	Per-panel yields are sorted best first once and summed into a cumulative array, so
+	`yearly_dc_kwh(n)` is the best possible n-panel array in O(1), and whole-curve
+	queries are one vectorized pass. Bills use the same blended-price formula as
+	calculate_monthly_bill_with_solar, so they line up with its per_config values.
+	"""
+
+	def __init__(self, panel_yields_dc_kwh: Sequence[float], max_panels: Optional[int] = None):
+		yields = np.sort(np.asarray(panel_yields_dc_kwh, dtype=np.float64))[::-1]
+		if max_panels is not None:
+			yields = yields[:max(0, int(max_panels))]
+		self.panel_yields_dc_kwh = yields
+		self.cumulative_dc_kwh = np.concatenate(([0.0], np.cumsum(yields)))
+		self.cumulative_dc_kwh.setflags(write=False)
+
+	@classmethod
+	def from_building_insights(cls, insights: Dict[str, Any]) -> Optional["PanelYieldCurve"]:
+		yields = panel_yields_from_insights(insights)
+		if yields is None:
+			return None
+		max_panels = (insights.get("solarPotential") or {}).get("maxArrayPanelsCount")
+		return cls(yields, max_panels if isinstance(max_panels, (int, float)) else None)
+
+	@property
+	def max_panels(self) -> int:
+		return len(self.panel_yields_dc_kwh)
+
+	def yearly_dc_kwh(self, panels_count: int) -> float:
+		n = min(max(int(panels_count), 0), self.max_panels)
+		return float(self.cumulative_dc_kwh[n])
+
+	def monthly_bills(self, *, monthly_bill_usd: float, monthly_kwh_energy_consumption: float) -> np.ndarray:
+		"""Post-solar monthly bill for 0..max_panels panels (index = panel count)."""
+		price_per_kwh = float(monthly_bill_usd) / float(monthly_kwh_energy_consumption)
+		annual_consumption = float(monthly_kwh_energy_consumption) * 12.0
+		initial_ac = self.cumulative_dc_kwh * DC_TO_AC_DERATE
+		remaining_annual = np.maximum(0.0, annual_consumption - initial_ac)
+		return remaining_annual * price_per_kwh / 12.0
+
+	def evaluate(self, panels_count: int, *, monthly_bill_usd: float, monthly_kwh_energy_consumption: float) -> Dict[str, Any]:
+		"""Same fields as a calculate_monthly_bill_with_solar per_config record, for any n."""
+		n = min(max(int(panels_count), 0), self.max_panels)
+		yearly_dc = float(self.cumulative_dc_kwh[n])
+		initial_ac = yearly_dc * DC_TO_AC_DERATE
+		price_per_kwh = float(monthly_bill_usd) / float(monthly_kwh_energy_consumption)
+		remaining_annual = max(0.0, float(monthly_kwh_energy_consumption) * 12.0 - initial_ac)
+		monthly_after = remaining_annual * price_per_kwh / 12.0
+		return {
+			"panelsCount": n,
+			"yearlyEnergyDcKwh": yearly_dc,
+			"initialAcKwhPerYear": initial_ac,
+			"monthlyBillWithSolarUsd": monthly_after,
+			"monthlySavingsUsd": float(monthly_bill_usd) - monthly_after,
+		}
+
+	def optimize(
+		self,
+		*,
+		monthly_bill_usd: float,
+		monthly_kwh_energy_consumption: float,
+		cost_per_panel_usd: float,
+		lifetime_years: float = DEFAULT_LIFETIME_YEARS,
+		max_payback_years: float = DEFAULT_MAX_PAYBACK_YEARS,
+	) -> Dict[str, Any]:
+		"""Best panel counts for an installed cost per panel.
+
+		- optimal: maximizes lifetime savings minus installed cost (undiscounted).
+		- marginal_payback: the largest n whose last panel still pays for itself within
+		  `max_payback_years`. Panels are added best first and savings stop once usage is
+		  covered, so marginal savings never increase and every panel up to n qualifies.
+		"""
+		bills = self.monthly_bills(
+			monthly_bill_usd=monthly_bill_usd,
+			monthly_kwh_energy_consumption=monthly_kwh_energy_consumption,
+		)
+		annual_savings = (float(monthly_bill_usd) - bills) * 12.0
+		counts = np.arange(len(bills))
+		net_value = annual_savings * float(lifetime_years) - counts * float(cost_per_panel_usd)
+		optimal = int(net_value.argmax())
+
+		marginal_savings = np.diff(annual_savings)
+		with np.errstate(divide="ignore"):
+			marginal_payback = np.where(marginal_savings > 0, float(cost_per_panel_usd) / marginal_savings, np.inf)
+		marginal = int(np.count_nonzero(marginal_payback <= float(max_payback_years)))
+
+		def summary(n: int) -> Dict[str, Any]:
+			record = self.evaluate(
+				n,
+				monthly_bill_usd=monthly_bill_usd,
+				monthly_kwh_energy_consumption=monthly_kwh_energy_consumption,
+			)
+			cost = n * float(cost_per_panel_usd)
+			record["installedCostUsd"] = cost
+			record["lifetimeNetSavingsUsd"] = float(net_value[n])
+			record["simplePaybackYears"] = cost / float(annual_savings[n]) if annual_savings[n] > 0 else None
+			return record
+
+		return {
+			"cost_per_panel_usd": float(cost_per_panel_usd),
+			"lifetime_years": float(lifetime_years),
+			"max_payback_years": float(max_payback_years),
+			"max_panels": self.max_panels,
+			"optimal": summary(optimal),
+			"marginal_payback": summary(marginal),
+		}
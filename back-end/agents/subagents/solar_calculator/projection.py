@@ -0,0 +1,129 @@
+from itertools import product
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+from pydantic import BaseModel
+
+from agents.subagents.financial_context.tariff_compiler import compile_tariff
+from .calculator import DC_TO_AC_DERATE
+
+DEFAULT_YEARS = 25
+DEFAULT_DEGRADATION_RATE = 0.005
+DEFAULT_TARIFF_ESCALATION = 0.025
+DEFAULT_DISCOUNT_RATE = 0.05
+
+
+def scenario_grid(
+	degradation_rate: Sequence[float] = (DEFAULT_DEGRADATION_RATE,),
+	tariff_escalation: Sequence[float] = (DEFAULT_TARIFF_ESCALATION,),
+	discount_rate: Sequence[float] = (DEFAULT_DISCOUNT_RATE,),
+) -> Dict[str, np.ndarray]:
+	"""Every combination of the given rates as (K,) arrays, K = product of their lengths."""
+	combos = np.array(list(product(degradation_rate, tariff_escalation, discount_rate)), dtype=np.float64)
+	return {
+		"degradation_rate": combos[:, 0],
+		"tariff_escalation": combos[:, 1],
+		"discount_rate": combos[:, 2],
+	}
+
+
+def project_cash_flows(
+	yearly_dc_kwh: Sequence[float],
+	*,
+	system_cost_usd: Union[float, Sequence[float]],
+	monthly_kwh_energy_consumption: float,
+	monthly_bill_usd: Optional[float] = None,
+	plan: Optional[Union[dict, BaseModel]] = None,
+	scenarios: Optional[Dict[str, np.ndarray]] = None,
+	years: int = DEFAULT_YEARS,
+) -> Dict[str, np.ndarray]:
+	"""Multi-year savings, NPV and payback for C configs under K scenarios in one array pass.
+
+	Year-1 production is yearlyEnergyDcKwh * DC_TO_AC_DERATE, netted against usage as in
+	calculate_monthly_bill_with_solar, and falls by `degradation_rate` each year. The
+	post-solar bill is priced with the compiled tariff (`plan`, via total_monthly_cost's
+	piecewise-linear form) or, without one, at the blended price monthly_bill / usage.
+	Savings grow with `tariff_escalation` and are discounted at `discount_rate`
+	(end-of-year cash flows).
+
+	Returns (C, Y, K) arrays `annual_savings_usd` and `cumulative_cash_flow_usd`, and
+	(C, K) arrays `npv_usd`, `lifetime_savings_usd` and `payback_years` (NaN when the
+	system does not pay back within `years`).
+	"""
+	scenarios = scenarios or scenario_grid()
+	yearly_dc = np.asarray(yearly_dc_kwh, dtype=np.float64)
+	cost = np.broadcast_to(np.asarray(system_cost_usd, dtype=np.float64), yearly_dc.shape)
+	degradation = np.asarray(scenarios["degradation_rate"], dtype=np.float64)
+	escalation = np.asarray(scenarios["tariff_escalation"], dtype=np.float64)
+	discount = np.asarray(scenarios["discount_rate"], dtype=np.float64)
+	usage = float(monthly_kwh_energy_consumption)
+	year = np.arange(years, dtype=np.float64)
+
+	# (C, Y, K): configs x years x scenarios
+	production_ac = (
+		yearly_dc[:, None, None] * DC_TO_AC_DERATE * (1.0 - degradation[None, None, :]) ** year[None, :, None]
+	)
+	remaining_monthly = np.maximum(0.0, usage * 12.0 - production_ac) / 12.0
+	if plan is not None:
+		tariff = compile_tariff(plan)
+		baseline_monthly = tariff.cost(usage)
+		after_monthly = tariff.cost(remaining_monthly)
+	else:
+		price_per_kwh = float(monthly_bill_usd) / usage
+		baseline_monthly = usage * price_per_kwh
+		after_monthly = remaining_monthly * price_per_kwh
+
+	escalator = (1.0 + escalation[None, None, :]) ** year[None, :, None]
+	annual_savings = (baseline_monthly - after_monthly) * 12.0 * escalator
+	discounted = annual_savings / (1.0 + discount[None, None, :]) ** (year[None, :, None] + 1.0)
+	npv = discounted.sum(axis=1) - cost[:, None]
+
+	cumulative = np.cumsum(annual_savings, axis=1) - cost[:, None, None]
+	paid_back = cumulative >= 0.0
+	first = paid_back.argmax(axis=1)  # (C, K) index of the first non-negative year
+	ever = paid_back.any(axis=1)
+	c_idx, k_idx = np.indices(first.shape)
+	before = np.where(first > 0, cumulative[c_idx, np.maximum(first - 1, 0), k_idx], -cost[:, None])
+	# Linear within the payback year: years before it plus the fraction needed
+	savings_then = annual_savings[c_idx, first, k_idx]
+	with np.errstate(divide="ignore", invalid="ignore"):
+		fraction = np.where(savings_then > 0, -before / savings_then, 0.0)
+	payback = np.where(ever, first + np.clip(fraction, 0.0, 1.0), np.nan)
+
+	return {
+		"years": years,
+		"scenarios": scenarios,
+		"system_cost_usd": cost,
+		"annual_savings_usd": annual_savings,
+		"cumulative_cash_flow_usd": cumulative,
+		"npv_usd": npv,
+		"lifetime_savings_usd": annual_savings.sum(axis=1),
+		"payback_years": payback,
+	}
+
+
+def summary_table(
+	projection: Dict[str, np.ndarray],
+	panels_count: Optional[Sequence[int]] = None,
+) -> List[Dict[str, Any]]:
+	"""One record per config and scenario, for responses and sales exports."""
+	scenarios = projection["scenarios"]
+	rows = []
+	configs, scenario_count = projection["npv_usd"].shape
+	for c in range(configs):
+		for k in range(scenario_count):
+			payback = projection["payback_years"][c, k]
+			row = {
+				"config_index": c,
+				"degradation_rate": float(scenarios["degradation_rate"][k]),
+				"tariff_escalation": float(scenarios["tariff_escalation"][k]),
+				"discount_rate": float(scenarios["discount_rate"][k]),
+				"system_cost_usd": float(projection["system_cost_usd"][c]),
+				"npv_usd": float(projection["npv_usd"][c, k]),
+				"lifetime_savings_usd": float(projection["lifetime_savings_usd"][c, k]),
+				"payback_years": None if np.isnan(payback) else float(payback),
+			}
+			if panels_count is not None:
+				row["panelsCount"] = int(panels_count[c])
+			rows.append(row)
+	return rows
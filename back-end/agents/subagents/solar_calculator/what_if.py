@@ -0,0 +1,115 @@
+from typing import Any, Dict, Optional
+
+from agents.fast_path import parse_json_output
+from agents.subagents.financial_context.helper import total_monthly_cost
+from .calculator import calculate_monthly_bill_with_solar
+from .panel_yield import PanelYieldCurve
+
+# Session state a finished run resolved, which is all a what-if recomputation needs
+RESOLVED_INPUT_KEYS = ("solar_potentials", "usd_electricity_rates", "energy_kWh", "average_monthly_expense_usd")
+
+
+def resolved_inputs(state: dict) -> Optional[Dict[str, Any]]:
+	"""Decoded RESOLVED_INPUT_KEYS from a finished session, plus per-panel yields; None if any is missing."""
+	inputs = {}
+	for key in RESOLVED_INPUT_KEYS:
+		try:
+			value = parse_json_output(state.get(key))
+		except ValueError:
+			return None
+		if value is None:
+			return None
+		inputs[key] = value
+	# Per-panel yields let a what-if pick any panel count, not only the API's configs
+	try:
+		curve = PanelYieldCurve.from_building_insights(parse_json_output(state.get("solar_building_insights")))
+	except (TypeError, ValueError):
+		curve = None
+	inputs["panel_yields_dc_kwh"] = curve.panel_yields_dc_kwh.tolist() if curve is not None else None
+	return inputs
+
+
+def _usage_kwh(energy: Any) -> float:
+	if isinstance(energy, dict):
+		energy = energy.get("energy_kWh")
+	return float(energy or 0.0)
+
+
+def _check_plan(plan: dict) -> None:
+	"""ValueError unless `plan` has the fields total_monthly_cost reads for its plan_type."""
+	plan_type = str(plan.get("plan_type")).lower()
+	if plan_type == "tiered":
+		required = ("tiers",)
+	elif plan_type == "tou":
+		required = ("tou_periods",)
+	elif plan_type == "hybrid":
+		required = ("tiers", "tou_periods", "price_per_kWh_usd")
+	else:
+		# flat, demand and unknown types are priced as flat
+		required = ("price_per_kWh_usd",)
+	if not any(plan.get(field) not in (None, []) for field in required):
+		raise ValueError(f"A {plan_type} rate plan needs {' or '.join(required)}")
+
+
+def recompute(
+	inputs: Dict[str, Any],
+	*,
+	energy_kWh: Optional[float] = None,
+	average_monthly_expense_usd: Optional[float] = None,
+	panels_count: Optional[int] = None,
+	usd_electricity_rates: Optional[dict] = None,
+) -> Dict[str, Any]:
+	"""Re-run only the billing math of a finished run with some inputs overridden.
+
+	A new usage or rate plan re-prices the baseline bill with total_monthly_cost, as
+	energy_billing_agent does, unless the bill itself is given. `panels_count` fixes
+	the array size: with per-panel yields the best `panels_count` panels are used,
+	otherwise the largest returned config of at most that many panels (ValueError
+	when there is none). An overriding rate plan without the fields its plan_type is
+	priced from raises ValueError.
+	"""
+	if usd_electricity_rates is not None:
+		_check_plan(usd_electricity_rates)
+	plan = usd_electricity_rates if usd_electricity_rates is not None else inputs["usd_electricity_rates"]
+	stored_usage = _usage_kwh(inputs["energy_kWh"])
+	usage = float(energy_kWh) if energy_kWh is not None else stored_usage
+
+	if average_monthly_expense_usd is not None:
+		monthly_bill = float(average_monthly_expense_usd)
+	elif energy_kWh is None and usd_electricity_rates is None:
+		monthly_bill = float(inputs["average_monthly_expense_usd"])
+	elif isinstance(plan, dict) and plan.get("plan_type"):
+		monthly_bill = round(total_monthly_cost(plan, {"energy_kWh": usage}), 2)
+	elif stored_usage > 0:
+		# No usable plan: keep the run's blended price
+		monthly_bill = float(inputs["average_monthly_expense_usd"]) / stored_usage * usage
+	else:
+		monthly_bill = float(inputs["average_monthly_expense_usd"])
+
+	potential = dict(inputs["solar_potentials"])
+	if panels_count is not None:
+		yields = inputs.get("panel_yields_dc_kwh")
+		if yields:
+			curve = PanelYieldCurve(yields)
+			n = min(int(panels_count), curve.max_panels)
+			potential["solarPanelConfigs"] = [{"panelsCount": n, "yearlyEnergyDcKwh": curve.yearly_dc_kwh(n)}]
+		else:
+			configs = [
+				c for c in potential.get("solarPanelConfigs") or []
+				if c.get("panelsCount") is not None and c["panelsCount"] <= panels_count
+			]
+			if not configs:
+				raise ValueError(f"No solar panel config with at most {panels_count} panels")
+			potential["solarPanelConfigs"] = [max(configs, key=lambda c: c["panelsCount"])]
+
+	result = calculate_monthly_bill_with_solar(
+		potential,
+		monthly_bill_usd=monthly_bill,
+		monthly_kwh_energy_consumption=usage,
+	)
+	return {
+		"energy_kWh": usage,
+		"average_monthly_expense_usd": monthly_bill,
+		"panels_count": panels_count,
+		"solar_monthly_bill_analysis": result,
+	}
@@ -1,11 +1,14 @@
+import json
 import logging
-from typing import AsyncGenerator
+from typing import AsyncGenerator, ClassVar, Optional
 from google.adk.agents import BaseAgent, LoopAgent, Agent, SequentialAgent
-from pydantic import PrivateAttr
 from google.adk.agents.invocation_context import InvocationContext
-from google.adk.events import Event
+from google.adk.events import Event, EventActions
 from typing_extensions import override
 
+from agents.scheduler import wait_for_state
+from agents.subagents.solar_context.coverage_index import get_coverage_index
+from agents.subagents.solar_context.solar_insights import solar_api
 from agents.subagents.solar_context.solar_insights.agent import (
 	fetch_solar_insights_agent_1,
 	fetch_solar_insights_agent_2,
@@ -14,61 +17,85 @@ from agents.subagents.solar_context.similar_place.agent import (
 	solar_coverage_similarity_agent,
     proxy_coordinate_setter_agent,
 )
+from models.schemas import ProxyLocation
 
 logger = logging.getLogger(__name__)
 
 
+def _as_dict(value):
+	"""The fetch agents echo tool JSON as text; decode it (tolerating code fences) when needed."""
+	if isinstance(value, str):
+		text = value.strip().removeprefix("```json").removeprefix("```").removesuffix("```")
+		try:
+			return json.loads(text)
+		except ValueError:
+			return {}
+	return value or {}
+
+
 class SolarContextAgent(BaseAgent):
 	"""Fetch raw buildingInsights JSON; if no solarPotential, find proxy and retry.
 
 	Updated semantics (no synthetic coverage_status from API):
 	1. Initial fetch (store raw JSON under solar_building_insights).
 	2. If JSON contains solarPotential -> done.
-	3. Else run similarity + proxy setter.
-	4. Refetch; if solarPotential now present and proxy was used -> annotate FALLBACK info.
-	5. Pass-through setter preserves raw JSON; only adds proxy_location/FALLBACK if applicable.
+	3. Else try the nearest known-covered point from the coverage index (no LLM).
+	4. Else run similarity + proxy setter.
+	5. Refetch; if solarPotential now present and proxy was used -> annotate FALLBACK info.
+	6. Pass-through setter preserves raw JSON; only adds proxy_location/FALLBACK if applicable.
 	"""
 
 	model_config = {"arbitrary_types_allowed": True, "extra": "allow"}
+	# Only coordinates are needed to start; the proxy loop waits for regional_identifiers itself
+	state_inputs: ClassVar[tuple] = ("latitude", "longitude")
 	loop_agent: LoopAgent
 	seq_agent: SequentialAgent
-	_lat: float = PrivateAttr()
-	_lon: float = PrivateAttr()
 
-	def __init__(self, name: str, lat: float, lon: float):
+	def __init__(self, name: str):
 		# Include a proxy coordinate setter inside the loop so subsequent iterations use proxy lat/lon
 		seq_agent = SequentialAgent(
             name="solar_initial_sequence",
-            sub_agents=[solar_coverage_similarity_agent, proxy_coordinate_setter_agent],
+            sub_agents=[solar_coverage_similarity_agent.clone(), proxy_coordinate_setter_agent.clone()],
         )
 		loop_agent = LoopAgent(
 			name="solar_finalization_loop",
 			sub_agents=[
                 seq_agent,
-				fetch_solar_insights_agent_2,
+				fetch_solar_insights_agent_2.clone(),
 			],
 			max_iterations=4,
 		)
 		super().__init__(name=name, loop_agent=loop_agent, seq_agent=seq_agent)
-		# Store coordinates as private attrs (pydantic-safe)
-		self._lat = lat
-		self._lon = lon
 
 	@override
 	async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
 		logger.info(f"[{self.name}] Starting solar coverage workflow")
-		ctx.session.state["latitude"] = self._lat
-		ctx.session.state["longitude"] = self._lon
-		print(f"[{self.name}] Set initial lat={self._lat}, lon={self._lon}")
+		# The agent is shared by concurrent requests; the address only lives in session state
+		lat = float(ctx.session.state["latitude"])
+		lon = float(ctx.session.state["longitude"])
+		logger.info(f"[{self.name}] Initial lat={lat}, lon={lon}")
 
-        # First attempt outside the loop
-		async for event in fetch_solar_insights_agent_1.run_async(ctx):
-			yield event
-		first = ctx.session.state.get("solar_building_insights") or {}
-		if isinstance(first, dict) and first.get("solarPotential"):
-			logger.info(f"[{self.name}] solarPotential present on first attempt; normalizing.") 
+		index = get_coverage_index()
+		if index is not None and index.is_known_uncovered(lat, lon):
+			logger.info(f"[{self.name}] Coordinates known to be uncovered; skipping initial fetch.")
+		else:
+			# First attempt outside the loop
+			async for event in fetch_solar_insights_agent_1.run_async(ctx):
+				yield event
+			first = _as_dict(ctx.session.state.get("solar_building_insights"))
+			if isinstance(first, dict) and first.get("solarPotential"):
+				logger.info(f"[{self.name}] solarPotential present on first attempt; normalizing.") 
+
+				return
 
-			return
+		if index is not None:
+			state_delta = await self._nearest_covered_delta(index, lat, lon)
+			if state_delta is not None:
+				yield self._state_event(ctx, state_delta)
+				return
+
+		# The proxy search prompt needs regional context, which may still be resolving
+		await wait_for_state("regional_identifiers")
 
 		# Loop until coverage is achieved 
 		async for event in self.loop_agent.run_async(ctx):
@@ -76,9 +103,42 @@ class SolarContextAgent(BaseAgent):
 		insights = ctx.session.state.get("solar_building_insights") or {}
 		proxy = ctx.session.state.get("solar_proxy_location")
 		if isinstance(insights, dict) and insights.get("solarPotential"):
-			# Annotate fallback metadata without altering core solarPotential payload
-			insights["fallback_used"] = True
-			ctx.session.state["solar_building_insights"] = insights
-
+			# Annotate fallback metadata on a copy; the dict may be shared with concurrent lookups
+			insights = {**insights, "fallback_used": True}
+			yield self._state_event(ctx, {"solar_building_insights": insights})
 
+	def _state_event(self, ctx: InvocationContext, state_delta: dict) -> Event:
+		return Event(
+			invocation_id=ctx.invocation_id,
+			author=self.name,
+			branch=ctx.branch,
+			actions=EventActions(state_delta=state_delta),
+		)
 
+	async def _nearest_covered_delta(self, index, lat: float, lon: float) -> Optional[dict]:
+		"""Resolve a proxy from the coverage index in one lookup; None sends us to the LLM loop."""
+		nearest = index.nearest_covered(lat, lon)
+		if nearest is None:
+			return None
+		proxy_lat, proxy_lon, distance_km = nearest
+		insights = await solar_api.get_solar_insights_async(proxy_lat, proxy_lon)
+		if not (isinstance(insights, dict) and insights.get("solarPotential")):
+			return None
+		logger.info(f"[{self.name}] Using indexed covered point {distance_km:.2f} km away as proxy.")
+		proxy = ProxyLocation(
+			proxy_location_name=f"Nearest covered location ({proxy_lat:.5f}, {proxy_lon:.5f})",
+			proxy_latitude=proxy_lat,
+			proxy_longitude=proxy_lon,
+			reasoning=(
+				f"The original coordinates are not covered by the Solar API; this is the closest "
+				f"previously covered location, {distance_km:.2f} km away."
+			),
+		).model_dump()
+		# The insights dict may be shared with concurrent lookups; annotate a copy
+		insights = {**insights, "fallback_used": True}
+		return {
+			"latitude": proxy_lat,
+			"longitude": proxy_lon,
+			"solar_proxy_location": proxy,
+			"solar_building_insights": insights,
+		}
@@ -0,0 +1,179 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_PATH = ".cache/solar_coverage.sqlite3"
+DEFAULT_BUCKET_DEGREES = 0.1  # ~11 km buckets
+DEFAULT_PROXY_RADIUS_KM = 25.0
+DEFAULT_UNCOVERED_MATCH_KM = 0.05
+DEFAULT_UNCOVERED_TTL_SECONDS = 7 * 24 * 3600
+EARTH_RADIUS_KM = 6371.0088
+
+Point = Tuple[float, float, float]  # (latitude, longitude, recorded_at)
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class CoverageIndex:
+    """Grid-bucketed index of coordinates known to be covered / uncovered by the Solar API.
+
+    Points are persisted in SQLite and held in memory as buckets of `bucket_degrees`
+    squares, so a radius query only scans the handful of buckets overlapping the
+    search box. Uncovered points expire after `uncovered_ttl_seconds` since coverage
+    grows over time.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_INDEX_PATH,
+        bucket_degrees: float = DEFAULT_BUCKET_DEGREES,
+        proxy_radius_km: float = DEFAULT_PROXY_RADIUS_KM,
+        uncovered_match_km: float = DEFAULT_UNCOVERED_MATCH_KM,
+        uncovered_ttl_seconds: float = DEFAULT_UNCOVERED_TTL_SECONDS,
+    ):
+        self.bucket_degrees = float(bucket_degrees)
+        self.proxy_radius_km = float(proxy_radius_km)
+        self.uncovered_match_km = float(uncovered_match_km)
+        self.uncovered_ttl_seconds = float(uncovered_ttl_seconds)
+        self._covered: Dict[Tuple[int, int], List[Point]] = defaultdict(list)
+        self._uncovered: Dict[Tuple[int, int], List[Point]] = defaultdict(list)
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS solar_coverage ("
+            " latitude REAL NOT NULL,"
+            " longitude REAL NOT NULL,"
+            " covered INTEGER NOT NULL,"
+            " recorded_at REAL NOT NULL,"
+            " PRIMARY KEY (latitude, longitude, covered))"
+        )
+        self._load()
+
+    @classmethod
+    def from_env(cls) -> "CoverageIndex":
+        return cls(
+            path=os.getenv("SOLAR_COVERAGE_INDEX_PATH", DEFAULT_INDEX_PATH),
+            bucket_degrees=float(os.getenv("SOLAR_COVERAGE_BUCKET_DEGREES", DEFAULT_BUCKET_DEGREES)),
+            proxy_radius_km=float(os.getenv("SOLAR_PROXY_RADIUS_KM", DEFAULT_PROXY_RADIUS_KM)),
+            uncovered_match_km=float(os.getenv("SOLAR_UNCOVERED_MATCH_KM", DEFAULT_UNCOVERED_MATCH_KM)),
+            uncovered_ttl_seconds=float(
+                os.getenv("SOLAR_UNCOVERED_TTL_SECONDS", DEFAULT_UNCOVERED_TTL_SECONDS)
+            ),
+        )
+
+    def _bucket(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return (
+            math.floor(latitude / self.bucket_degrees),
+            math.floor(longitude / self.bucket_degrees),
+        )
+
+    def _load(self) -> None:
+        cutoff = time.time() - self.uncovered_ttl_seconds
+        self._conn.execute(
+            "DELETE FROM solar_coverage WHERE covered = 0 AND recorded_at < ?", (cutoff,)
+        )
+        rows = self._conn.execute(
+            "SELECT latitude, longitude, covered, recorded_at FROM solar_coverage"
+        ).fetchall()
+        for lat, lon, covered, recorded_at in rows:
+            buckets = self._covered if covered else self._uncovered
+            buckets[self._bucket(lat, lon)].append((lat, lon, recorded_at))
+        logger.info(f"[coverage_index] Loaded {len(rows)} known coverage points")
+
+    def _record(self, latitude: float, longitude: float, covered: bool) -> None:
+        latitude, longitude = float(latitude), float(longitude)
+        now = time.time()
+        buckets = self._covered if covered else self._uncovered
+        with self._lock:
+            bucket = buckets[self._bucket(latitude, longitude)]
+            bucket[:] = [p for p in bucket if (p[0], p[1]) != (latitude, longitude)]
+            bucket.append((latitude, longitude, now))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO solar_coverage (latitude, longitude, covered, recorded_at)"
+                " VALUES (?, ?, ?, ?)",
+                (latitude, longitude, int(covered), now),
+            )
+
+    def record_covered(self, latitude: float, longitude: float) -> None:
+        self._record(latitude, longitude, covered=True)
+
+    def record_uncovered(self, latitude: float, longitude: float) -> None:
+        self._record(latitude, longitude, covered=False)
+
+    def _nearest(
+        self,
+        buckets: Dict[Tuple[int, int], List[Point]],
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        min_recorded_at: float = 0.0,
+    ) -> Optional[Tuple[float, float, float]]:
+        dlat = radius_km / 111.0
+        dlon = radius_km / max(1e-6, 111.0 * math.cos(math.radians(latitude)))
+        lat_lo, lon_lo = self._bucket(latitude - dlat, longitude - dlon)
+        lat_hi, lon_hi = self._bucket(latitude + dlat, longitude + dlon)
+        best = None
+        with self._lock:
+            for i in range(lat_lo, lat_hi + 1):
+                for j in range(lon_lo, lon_hi + 1):
+                    for lat, lon, recorded_at in buckets.get((i, j), ()):
+                        if recorded_at < min_recorded_at:
+                            continue
+                        distance = haversine_km(latitude, longitude, lat, lon)
+                        if distance <= radius_km and (best is None or distance < best[2]):
+                            best = (lat, lon, distance)
+        return best
+
+    def nearest_covered(
+        self, latitude: float, longitude: float, radius_km: Optional[float] = None
+    ) -> Optional[Tuple[float, float, float]]:
+        """Return (latitude, longitude, distance_km) of the closest covered point within radius."""
+        radius = self.proxy_radius_km if radius_km is None else radius_km
+        return self._nearest(self._covered, float(latitude), float(longitude), radius)
+
+    def is_known_uncovered(self, latitude: float, longitude: float) -> bool:
+        cutoff = time.time() - self.uncovered_ttl_seconds
+        return self._nearest(
+            self._uncovered, float(latitude), float(longitude), self.uncovered_match_km, cutoff
+        ) is not None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "covered_points": sum(len(b) for b in self._covered.values()),
+                "uncovered_points": sum(len(b) for b in self._uncovered.values()),
+            }
+
+
+_index: Optional[CoverageIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_coverage_index() -> Optional[CoverageIndex]:
+    """Shared process-wide index; disabled when SOLAR_COVERAGE_INDEX_ENABLED is falsy."""
+    global _index
+    if os.getenv("SOLAR_COVERAGE_INDEX_ENABLED", "true").lower() in ("0", "false", "no"):
+        return None
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = CoverageIndex.from_env()
+    return _index
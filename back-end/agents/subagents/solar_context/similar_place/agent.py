@@ -1,5 +1,6 @@
 from google.adk.agents import Agent
 from google.adk.tools.tool_context import ToolContext
+from agents.fast_path import CodeSetterAgent, parse_json_output
 from . import prompt
 from models.schemas import ProxyLocation
 
@@ -19,10 +20,20 @@ def _apply_proxy_coordinates(tool_context: ToolContext):
     state["latitude"] = float(proxy.get("proxy_latitude"))
     state["longitude"] = float(proxy.get("proxy_longitude"))
 
-proxy_coordinate_setter_agent = Agent(
-	name="proxy_coordinate_setter_agent",
+proxy_coordinate_setter_llm = Agent(
+	name="proxy_coordinate_setter_llm",
 	description="Apply proxy lat/lon to session state for next loop iteration.",
 	model="gemini-2.0-flash-lite",
 	tools=[_apply_proxy_coordinates],
 	instruction="Call the tool (no arguments) to update session state with proxy coordinates if available",
-)
\ No newline at end of file
+)
+
+def _proxy_coordinates_from_state(state: dict) -> dict:
+    proxy = ProxyLocation.model_validate(parse_json_output(state["solar_proxy_location"]))
+    return {"latitude": proxy.proxy_latitude, "longitude": proxy.proxy_longitude}
+
+proxy_coordinate_setter_agent = CodeSetterAgent(
+    name="proxy_coordinate_setter_agent",
+    compute=_proxy_coordinates_from_state,
+    fallback=proxy_coordinate_setter_llm,
+)
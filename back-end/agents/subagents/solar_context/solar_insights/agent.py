@@ -1,32 +1,33 @@
 from google.adk.agents import Agent
 from google.adk.tools.tool_context import ToolContext
 from google.adk.agents.readonly_context import ReadonlyContext
+from agents.fast_path import CodeSetterAgent
 from . import solar_api
 from . import prompt
 
-def _find_insights_tool(tool_context: ToolContext):
+async def _find_insights_tool(tool_context: ToolContext):
 	"""Fetch insights using latitude/longitude from session state."""
 
 	state = tool_context.session.state
 	lat = state.get("latitude")
 	lon = state.get("longitude")
-	return solar_api.get_solar_insights(lat, lon)
+	return await solar_api.get_solar_insights_async(lat, lon)
 
 
-def _find_insights_and_exit_tool(tool_context: ToolContext):
+async def _find_insights_and_exit_tool(tool_context: ToolContext):
 	"""Fetch insights (session state) and escalate loop when a solarPotential object is present."""
 	state = tool_context.session.state
 	lat = state.get("latitude")
 	lon = state.get("longitude")
-	insights = solar_api.get_solar_insights(lat, lon)
+	insights = await solar_api.get_solar_insights_async(lat, lon)
 	# Escalate when the response looks like buildingInsights with solarPotential
 	if insights and isinstance(insights, dict) and insights.get("solarPotential"):
 		tool_context.actions.escalate = True
 	# Always return the tool output verbatim (or {} if None)
 	return insights or {}
 
-fetch_solar_insights_agent_1 = Agent(
-	name="fetch_solar_insights_agent_1",
+fetch_solar_insights_agent_1_llm = Agent(
+	name="fetch_solar_insights_agent_1_llm",
 	description="Fetch solar potential for initial coordinates from session state",
 	model="gemini-2.0-flash",
 	instruction=prompt.FETCH_SOLAR_INSIGHTS_INSTRUCTIONS_1,
@@ -34,11 +35,34 @@ fetch_solar_insights_agent_1 = Agent(
 	tools=[_find_insights_tool],
 )
 
-fetch_solar_insights_agent_2 = Agent(
-	name="fetch_solar_insights_agent_2",
+fetch_solar_insights_agent_2_llm = Agent(
+	name="fetch_solar_insights_agent_2_llm",
 	description="Iterative fetch; escalates loop when coverage is achieved",
 	model="gemini-2.0-flash",
 	instruction=prompt.FETCH_SOLAR_INSIGHTS_INSTRUCTIONS_2,
 	output_key="solar_building_insights",
 	tools=[_find_insights_and_exit_tool],
 )
+
+async def _insights_from_state(state: dict) -> dict:
+	"""Call the Solar API directly for the session coordinates; no model round trip needed."""
+	lat = float(state["latitude"])
+	lon = float(state["longitude"])
+	insights = await solar_api.get_solar_insights_async(lat, lon)
+	return {"solar_building_insights": insights or {}}
+
+def _has_solar_potential(delta: dict) -> bool:
+	return bool(delta["solar_building_insights"].get("solarPotential"))
+
+fetch_solar_insights_agent_1 = CodeSetterAgent(
+	name="fetch_solar_insights_agent_1",
+	compute=_insights_from_state,
+	fallback=fetch_solar_insights_agent_1_llm,
+)
+
+fetch_solar_insights_agent_2 = CodeSetterAgent(
+	name="fetch_solar_insights_agent_2",
+	compute=_insights_from_state,
+	fallback=fetch_solar_insights_agent_2_llm,
+	escalate_if=_has_solar_potential,
+)
@@ -0,0 +1,186 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Tuple
+
+import logging
+
+from .extract import slim_building_insights
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = ".cache/solar_insights.sqlite3"
+DEFAULT_GRID_DEGREES = 0.0001  # ~11 m at the equator
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+DEFAULT_STALE_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 50_000
+
+
+class SolarInsightsCache:
+    """Disk-backed LRU cache of buildingInsights responses keyed by snapped coordinates.
+
+    Coordinates are snapped to a square grid of `grid_degrees` so nearby lookups share
+    one entry. Entries younger than `ttl_seconds` are fresh; entries up to
+    `ttl_seconds + stale_seconds` old are served as stale so the caller can refresh
+    them in the background. Past that they are treated as misses.
+
+    Entries hold the slim payload from `slim_building_insights`, so a hit never parses
+    the per-panel arrays. With `keep_raw`, the full response is stored next to it and
+    can be read back with `get_raw(payload["raw_key"])`.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        grid_degrees: float = DEFAULT_GRID_DEGREES,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        stale_seconds: float = DEFAULT_STALE_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        keep_raw: bool = True,
+    ):
+        self.path = path
+        self.keep_raw = bool(keep_raw)
+        self.grid_degrees = float(grid_degrees)
+        self.ttl_seconds = float(ttl_seconds)
+        self.stale_seconds = float(stale_seconds)
+        self.max_entries = int(max_entries)
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS solar_insights ("
+            " key TEXT PRIMARY KEY,"
+            " payload TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS solar_insights_accessed_at ON solar_insights (accessed_at)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS solar_insights_raw ("
+            " key TEXT PRIMARY KEY,"
+            " payload TEXT NOT NULL)"
+        )
+
+    @classmethod
+    def from_env(cls) -> "SolarInsightsCache":
+        return cls(
+            path=os.getenv("SOLAR_CACHE_PATH", DEFAULT_CACHE_PATH),
+            grid_degrees=float(os.getenv("SOLAR_CACHE_GRID_DEGREES", DEFAULT_GRID_DEGREES)),
+            ttl_seconds=float(os.getenv("SOLAR_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS)),
+            stale_seconds=float(os.getenv("SOLAR_CACHE_STALE_SECONDS", DEFAULT_STALE_SECONDS)),
+            max_entries=int(os.getenv("SOLAR_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+            keep_raw=os.getenv("SOLAR_CACHE_KEEP_RAW", "true").lower() not in ("0", "false", "no"),
+        )
+
+    def key_for(self, latitude: float, longitude: float) -> str:
+        lat_idx = round(float(latitude) / self.grid_degrees)
+        lon_idx = round(float(longitude) / self.grid_degrees)
+        return f"{self.grid_degrees:g}:{lat_idx}:{lon_idx}"
+
+    def get(self, latitude: float, longitude: float) -> Tuple[Optional[dict], bool]:
+        """Return (payload, is_stale). payload is None on a miss or an expired entry."""
+        key = self.key_for(latitude, longitude)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, created_at FROM solar_insights WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None, False
+            payload, created_at = row
+            age = now - created_at
+            if age > self.ttl_seconds + self.stale_seconds:
+                self._conn.execute("DELETE FROM solar_insights WHERE key = ?", (key,))
+                self._conn.execute("DELETE FROM solar_insights_raw WHERE key = ?", (key,))
+                self.misses += 1
+                return None, False
+            self._conn.execute(
+                "UPDATE solar_insights SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            is_stale = age > self.ttl_seconds
+            if is_stale:
+                self.stale_hits += 1
+            else:
+                self.hits += 1
+        # Entries written before payloads were slimmed still hold the full response
+        return slim_building_insights(json.loads(payload)), is_stale
+
+    def get_raw(self, key: str) -> Optional[dict]:
+        """Full buildingInsights response stored for a `raw_key`, if it was kept."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM solar_insights_raw WHERE key = ?", (key,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, latitude: float, longitude: float, payload: dict) -> dict:
+        """Store a response and return its slim payload, as `get` would."""
+        key = self.key_for(latitude, longitude)
+        slim = slim_building_insights(payload, raw_key=key if self.keep_raw else None)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO solar_insights (key, payload, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?)",
+                (key, json.dumps(slim, separators=(",", ":")), now, now),
+            )
+            if self.keep_raw:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO solar_insights_raw (key, payload) VALUES (?, ?)",
+                    (key, json.dumps(payload, separators=(",", ":"))),
+                )
+            self._evict_locked()
+        return slim
+
+    def _evict_locked(self) -> None:
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM solar_insights").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM solar_insights WHERE key IN ("
+                " SELECT key FROM solar_insights ORDER BY accessed_at ASC LIMIT ?)",
+                (overflow,),
+            )
+            self._conn.execute(
+                "DELETE FROM solar_insights_raw WHERE key NOT IN (SELECT key FROM solar_insights)"
+            )
+
+    def stats(self) -> dict:
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM solar_insights").fetchone()
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+        }
+
+
+_cache: Optional[SolarInsightsCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> Optional[SolarInsightsCache]:
+    """Shared process-wide cache; disabled when SOLAR_CACHE_ENABLED is falsy."""
+    global _cache
+    if os.getenv("SOLAR_CACHE_ENABLED", "true").lower() in ("0", "false", "no"):
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SolarInsightsCache.from_env()
+    return _cache
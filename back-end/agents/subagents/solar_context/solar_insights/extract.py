@@ -0,0 +1,49 @@
+from typing import Any, Optional
+
+from models.schemas import SolarPanelConfig, SolarPotential
+
+# Top-level buildingInsights fields worth carrying along; everything else (imagery
+# dates, bounding box, roof segments, per-panel geometry) stays with the raw payload.
+BUILDING_FIELDS = ("name", "center", "imageryQuality", "postalCode", "regionCode")
+POTENTIAL_FIELDS = tuple(SolarPotential.model_fields)
+PANEL_CONFIG_FIELDS = tuple(SolarPanelConfig.model_fields)
+RAW_KEY = "raw_key"
+PANEL_YIELDS_KEY = "panelYieldsDcKwh"
+
+
+def slim_building_insights(insights: Optional[dict], raw_key: Optional[str] = None) -> Optional[dict]:
+    """Reduce a buildingInsights response to what the pipeline reads.
+
+    Keeps the SolarPotential fields (each solarPanelConfig cut down to its
+    SolarPanelConfig fields), a few identifying top-level fields and, from the
+    per-panel `solarPanels` list, only each panel's yearlyEnergyDcKwh, best first,
+    under `panelYieldsDcKwh` (for PanelYieldCurve). When the full response was kept
+    on disk, `raw_key` says where (see SolarInsightsCache.get_raw).
+    Already slim payloads pass through unchanged, so this is safe to apply twice.
+    """
+    if not isinstance(insights, dict):
+        return insights
+    slim: dict[str, Any] = {key: insights[key] for key in BUILDING_FIELDS if key in insights}
+    potential = insights.get("solarPotential")
+    if isinstance(potential, dict):
+        slim_potential = {key: potential[key] for key in POTENTIAL_FIELDS if key in potential}
+        configs = slim_potential.get("solarPanelConfigs")
+        if isinstance(configs, list):
+            slim_potential["solarPanelConfigs"] = [
+                {key: config[key] for key in PANEL_CONFIG_FIELDS if key in config}
+                for config in configs
+                if isinstance(config, dict)
+            ]
+        slim["solarPotential"] = slim_potential
+        panels = potential.get("solarPanels")
+        if isinstance(panels, list):
+            yields = [p.get("yearlyEnergyDcKwh") for p in panels if isinstance(p, dict)]
+            slim[PANEL_YIELDS_KEY] = sorted((y for y in yields if isinstance(y, (int, float))), reverse=True)
+    if PANEL_YIELDS_KEY in insights and PANEL_YIELDS_KEY not in slim:
+        slim[PANEL_YIELDS_KEY] = insights[PANEL_YIELDS_KEY]
+    if "fallback_used" in insights:
+        slim["fallback_used"] = insights["fallback_used"]
+    raw_key = raw_key or insights.get(RAW_KEY)
+    if raw_key:
+        slim[RAW_KEY] = raw_key
+    return slim
@@ -1,37 +1,250 @@
+import asyncio
 import os
+import random
+import threading
+import httpx
 import requests
 from typing import Optional
 from dotenv import load_dotenv
 import logging
 
+from agents.subagents.solar_context.coverage_index import get_coverage_index
+from services import metrics
+from services.single_flight import SingleFlight
+from .cache import get_cache
+from .extract import slim_building_insights
+
+load_dotenv()
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+# httpx logs full request URLs at INFO, which would leak the API key
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+_background_tasks = set()
+# Concurrent misses for the same cache cell (e.g. across a batch) share one request
+solar_lookups = SingleFlight("solar_insights")
 
 class SolarAPIClient:
+    """buildingInsights:findClosest client shared by every request in the worker.
+
+    The async path keeps one pooled keep-alive `httpx.AsyncClient`, bounds each lookup
+    by a total deadline, and retries transient failures (transport errors, 429, 5xx)
+    with full-jitter exponential backoff. The sync path is kept for non-async callers.
+    """
+
     def __init__(self):
-        load_dotenv()
         self.api_key = os.getenv("GOOGLE_SOLAR_KEY", "")
-        self.base_url = "https://solar.googleapis.com/v1/buildingInsights:findClosest"
+        # Overridable so benchmarks can point the client at a local fixture server
+        api_root = os.getenv("SOLAR_API_BASE_URL", "https://solar.googleapis.com/v1").rstrip("/")
+        self.base_url = f"{api_root}/buildingInsights:findClosest"
+        self.deadline_seconds = float(os.getenv("SOLAR_API_DEADLINE_SECONDS", 15))
+        self.max_retries = int(os.getenv("SOLAR_API_MAX_RETRIES", 2))
+        self.backoff_seconds = float(os.getenv("SOLAR_API_BACKOFF_SECONDS", 0.2))
+        self.max_connections = int(os.getenv("SOLAR_API_MAX_CONNECTIONS", 20))
+        self._session = requests.Session()
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._async_client_loop = None
 
-    def call_api(self, latitude: float, longitude: float) -> Optional[dict]:
-        params = {
+    def _params(self, latitude: float, longitude: float) -> dict:
+        return {
             "location.latitude": latitude,
             "location.longitude": longitude,
             "key": self.api_key,
             "experiments": "EXPANDED_COVERAGE",
             "requiredQuality": "BASE",
         }
+
+    def call_api(self, latitude: float, longitude: float) -> Optional[dict]:
+        """buildingInsights for a point, reduced by `slim_building_insights`."""
+        cache = get_cache()
+        if cache is not None:
+            cached, is_stale = cache.get(latitude, longitude)
+            if cached is not None:
+                if is_stale:
+                    self._refresh_in_background(latitude, longitude)
+                return cached
+        return self._store(latitude, longitude, self._fetch(latitude, longitude))
+
+    async def call_api_async(self, latitude: float, longitude: float) -> Optional[dict]:
+        cache = get_cache()
+        if cache is not None:
+            cached, is_stale = cache.get(latitude, longitude)
+            if cached is not None:
+                metrics.record_cache("solar_insights", "stale" if is_stale else "hit")
+                if is_stale:
+                    self._refresh_in_background_async(latitude, longitude)
+                return cached
+            metrics.record_cache("solar_insights", "miss")
+            key = cache.key_for(latitude, longitude)
+        else:
+            key = (float(latitude), float(longitude))
+        return await solar_lookups.do(key, lambda: self._fetch_and_store_async(latitude, longitude))
+
+    async def _fetch_and_store_async(self, latitude: float, longitude: float) -> Optional[dict]:
+        return self._store(latitude, longitude, await self._fetch_async(latitude, longitude))
+
+    @staticmethod
+    def _store(latitude: float, longitude: float, insights: Optional[dict]) -> Optional[dict]:
+        """Cache a raw response and hand back only its slim payload; the raw dict is dropped here."""
+        if insights is None:
+            return None
+        cache = get_cache()
+        if cache is not None:
+            return cache.put(latitude, longitude, insights)
+        return slim_building_insights(insights)
+
+    def _fetch(self, latitude: float, longitude: float) -> Optional[dict]:
         try:
-            resp = requests.get(self.base_url, params=params, timeout=15)
-            
+            resp = self._session.get(
+                self.base_url, params=self._params(latitude, longitude), timeout=self.deadline_seconds
+            )
+
             # If outside coverage, API may return 4xx
             if not resp.ok:
+                if resp.status_code == 404:
+                    self._record_coverage(latitude, longitude, None)
                 return None
-            return resp.json()
+            insights = resp.json()
+            self._record_coverage(latitude, longitude, insights)
+            return insights
         except requests.RequestException as e:
             return None
 
+    def _get_async_client(self) -> httpx.AsyncClient:
+        # httpx pools are bound to the event loop that created them
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client_loop is not loop:
+            self._async_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                timeout=self.deadline_seconds,
+            )
+            self._async_client_loop = loop
+        return self._async_client
+
+    async def _fetch_async(self, latitude: float, longitude: float) -> Optional[dict]:
+        client = self._get_async_client()
+        params = self._params(latitude, longitude)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.deadline_seconds
+        for attempt in range(self.max_retries + 1):
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            started = loop.time()
+            try:
+                resp = await client.get(self.base_url, params=params, timeout=remaining)
+            except httpx.HTTPError as e:
+                metrics.record_external("solar_api", loop.time() - started, type(e).__name__)
+                logger.warning(f"Solar API attempt {attempt + 1} failed: {e!r}")
+            else:
+                metrics.record_external("solar_api", loop.time() - started, str(resp.status_code))
+                if resp.is_success:
+                    insights = resp.json()
+                    self._record_coverage(latitude, longitude, insights)
+                    return insights
+                if resp.status_code == 404:
+                    self._record_coverage(latitude, longitude, None)
+                    return None
+                if resp.status_code not in RETRYABLE_STATUS:
+                    return None
+                logger.warning(f"Solar API attempt {attempt + 1} returned {resp.status_code}")
+            if attempt < self.max_retries:
+                backoff = random.uniform(0, self.backoff_seconds * (2 ** attempt))
+                await asyncio.sleep(min(backoff, max(0.0, deadline - loop.time())))
+        return None
+
+    @staticmethod
+    def _record_coverage(latitude: float, longitude: float, insights: Optional[dict]) -> None:
+        """Feed every definitive API answer into the coverage index used for proxy selection."""
+        index = get_coverage_index()
+        if index is None:
+            return
+        if isinstance(insights, dict) and insights.get("solarPotential"):
+            center = insights.get("center") or {}
+            index.record_covered(
+                center.get("latitude", latitude),
+                center.get("longitude", longitude),
+            )
+        else:
+            index.record_uncovered(latitude, longitude)
+
+    @staticmethod
+    def _claim_refresh(key: str) -> bool:
+        with _refreshing_lock:
+            if key in _refreshing:
+                return False
+            _refreshing.add(key)
+            return True
+
+    @staticmethod
+    def _release_refresh(key: str) -> None:
+        with _refreshing_lock:
+            _refreshing.discard(key)
+
+    def _refresh_in_background(self, latitude: float, longitude: float) -> None:
+        """Serve-stale-while-revalidate: refetch a stale entry without blocking the caller."""
+        cache = get_cache()
+        key = cache.key_for(latitude, longitude)
+        if not self._claim_refresh(key):
+            return
+
+        def refresh():
+            try:
+                insights = self._fetch(latitude, longitude)
+                if insights is not None:
+                    cache.put(latitude, longitude, insights)
+            finally:
+                self._release_refresh(key)
+
+        threading.Thread(target=refresh, name=f"solar-refresh-{key}", daemon=True).start()
+
+    def _refresh_in_background_async(self, latitude: float, longitude: float) -> None:
+        cache = get_cache()
+        key = cache.key_for(latitude, longitude)
+        if not self._claim_refresh(key):
+            return
+
+        async def refresh():
+            try:
+                insights = await self._fetch_async(latitude, longitude)
+                if insights is not None:
+                    cache.put(latitude, longitude, insights)
+            finally:
+                self._release_refresh(key)
+
+        task = asyncio.create_task(refresh())
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+    async def aclose(self) -> None:
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        self._session.close()
+
+_client: Optional[SolarAPIClient] = None
+
+def get_client() -> SolarAPIClient:
+    global _client
+    if _client is None:
+        _client = SolarAPIClient()
+    return _client
+
 def get_solar_insights(latitude: float, longitude: float) -> dict:
-    
-    client = SolarAPIClient()
-    return client.call_api(latitude, longitude)
\ No newline at end of file
+
+    return get_client().call_api(latitude, longitude)
+
+async def get_solar_insights_async(latitude: float, longitude: float) -> dict:
+    return await get_client().call_api_async(latitude, longitude)
+
+async def aclose_client() -> None:
+    if _client is not None:
+        await _client.aclose()
@@ -0,0 +1,89 @@
+"""Per-request cost of building the agent graph and Runner vs. reusing a prebuilt one.
+
+Run from back-end/:
+    python -m benchmarks.bench_agent_graph [--requests 200]
+
+"rebuild" is what every request used to pay: build_root_agent() (clones of every
+sub-agent, a new SolarContextAgent with its own SequentialAgent and LoopAgent, the
+DagAgent dependency analysis) plus a Runner. "reuse" is what a request pays now:
+creating its session. Allocations are measured with tracemalloc.
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+import uuid
+
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+
+from agents.agent import build_root_agent
+
+APP_NAME = "agents"
+USER_ID = "user"
+STATE = {"latitude": 37.4219999, "longitude": -122.0840575, "address": "1600 Amphitheatre Pkwy"}
+
+
+def rebuild(session_service) -> Runner:
+    return Runner(agent=build_root_agent(), app_name=APP_NAME, session_service=session_service)
+
+
+async def new_session(session_service) -> None:
+    await session_service.create_session(
+        app_name=APP_NAME, user_id=USER_ID, session_id=str(uuid.uuid4()), state=dict(STATE)
+    )
+
+
+def measure(fn, requests: int):
+    """Mean seconds and mean allocated bytes (net and peak) per call."""
+    keep = []
+    start = time.perf_counter()
+    for _ in range(requests):
+        keep.append(fn())
+    elapsed = time.perf_counter() - start
+    keep.clear()
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    for _ in range(requests):
+        keep.append(fn())
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed / requests, (after - before) / requests, (peak - before) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    session_service = InMemorySessionService()
+    rebuild(session_service)  # warm imports and pydantic validators
+
+    def reuse_request():
+        loop.run_until_complete(new_session(session_service))
+
+    def rebuild_request():
+        runner = rebuild(session_service)
+        reuse_request()
+        return runner
+
+    rows = [
+        ("rebuild", measure(rebuild_request, args.requests)),
+        ("reuse", measure(reuse_request, args.requests)),
+    ]
+    loop.close()
+
+    print(f"{'per request':>12} {'ms':>9} {'KiB kept':>10} {'KiB peak':>10}")
+    for name, (seconds, kept, peak) in rows:
+        print(f"{name:>12} {seconds * 1e3:>9.3f} {kept / 1024:>10.1f} {peak / 1024:>10.1f}")
+    (rebuild_s, rebuild_kept, _), (reuse_s, reuse_kept, _) = rows[0][1], rows[1][1]
+    print(
+        f"Prebuilt graph saves {(rebuild_s - reuse_s) * 1e3:.3f} ms and "
+        f"{(rebuild_kept - reuse_kept) / 1024:.1f} KiB of allocations per request"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""Offline load test of the full pipeline behind main.py, with no Gemini or Solar API keys.
+
+Run from back-end/:
+    python -m benchmarks.bench_load [--requests 200] [--concurrency 16] [--llm-latency 0.5]
+
+Every LlmAgent answers from a script after --llm-latency (+ --llm-jitter) seconds and
+buildingInsights comes from a local fixture server (benchmarks/fakes.py). main.app is
+served by uvicorn on a local port and driven through POST /stream, so stage timings
+are measured as clients see them. Caches start empty in a temporary directory unless
+--cache-dir is given. Reports per-stage p50/p95/p99 (time from request start until
+the stage's event arrived), requests per second and the process's peak RSS. Exits
+with status 1 when any request did not produce a result.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import httpx
+import uvicorn
+
+from .fakes import FixtureSolarServer, install_fake_llm
+
+CENTER = (37.3382, -121.8863)
+KM_PER_DEGREE = 111.32
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return float("nan")
+    rank = max(0, math.ceil(q / 100.0 * len(ordered)) - 1)
+    return ordered[rank]
+
+
+def make_payloads(count: int, spread_km: float, duplicate_fraction: float, seed: int) -> List[dict]:
+    rng = random.Random(seed)
+    payloads: List[dict] = []
+    for i in range(count):
+        if payloads and rng.random() < duplicate_fraction:
+            payloads.append(dict(rng.choice(payloads)))
+            continue
+        lat = CENTER[0] + rng.uniform(-spread_km, spread_km) / KM_PER_DEGREE
+        lon = CENTER[1] + rng.uniform(-spread_km, spread_km) / (KM_PER_DEGREE * math.cos(math.radians(lat)))
+        payloads.append({"latitude": round(lat, 6), "longitude": round(lon, 6), "address": f"{i} Fixture St"})
+    return payloads
+
+
+def configure_environment(cache_dir: str, solar_base_url: str) -> None:
+    """Point every store at `cache_dir` and the Solar client at the fixture server (before main is imported)."""
+    os.environ.update({
+        "GOOGLE_SOLAR_KEY": "fixture",
+        "SOLAR_API_BASE_URL": solar_base_url,
+        "SOLAR_CACHE_PATH": os.path.join(cache_dir, "solar_insights.sqlite3"),
+        "SOLAR_COVERAGE_INDEX_PATH": os.path.join(cache_dir, "solar_coverage.sqlite3"),
+        "REGIONAL_CACHE_PATH": os.path.join(cache_dir, "regional_context.sqlite3"),
+        "TARIFF_STORE_PATH": os.path.join(cache_dir, "tariffs.sqlite3"),
+        "TYPICAL_USAGE_PATH": os.path.join(cache_dir, "typical_usage.sqlite3"),
+        "RESULT_STORE_PATH": os.path.join(cache_dir, "results.sqlite3"),
+        "FX_RATES_PATH": os.path.join(cache_dir, "fx_rates.json"),
+    })
+    os.environ.pop("SESSION_STORE_PATH", None)
+    os.environ.pop("FX_RATES_URL", None)
+
+
+def start_server(app) -> tuple:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="uvicorn", daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("uvicorn failed to start")
+        time.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    return server, thread, f"http://127.0.0.1:{port}"
+
+
+async def run_one(client: httpx.AsyncClient, payload: dict, timings: Dict[str, List[float]], nodes: Dict[str, List[float]]) -> bool:
+    started = time.perf_counter()
+    event = None
+    ok = False
+    async with client.stream("POST", "/stream", json=payload) as response:
+        async for line in response.aiter_lines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                elapsed = time.perf_counter() - started
+                data = json.loads(line[len("data: "):])
+                if event == "stage":
+                    timings[data["stage"]].append(elapsed)
+                elif event == "result":
+                    timings["total"].append(elapsed)
+                    report = data.get("critical_path") or {}
+                    for name, node in (report.get("nodes") or {}).items():
+                        nodes[name].append(node["duration"])
+                    ok = True
+                elif event == "error":
+                    timings["error"].append(elapsed)
+    return ok
+
+
+async def drive(base_url: str, payloads: List[dict], concurrency: int, timeout: float) -> dict:
+    timings: Dict[str, List[float]] = defaultdict(list)
+    nodes: Dict[str, List[float]] = defaultdict(list)
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        async def bounded(payload):
+            async with semaphore:
+                try:
+                    return await run_one(client, payload, timings, nodes)
+                except httpx.HTTPError as e:
+                    logging.warning(f"Request failed: {e!r}")
+                    return False
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(bounded(p) for p in payloads))
+        wall = time.perf_counter() - started
+    return {"timings": timings, "nodes": nodes, "ok": sum(results), "wall_seconds": wall}
+
+
+def summarize(values: Dict[str, List[float]]) -> Dict[str, dict]:
+    return {
+        name: {
+            "count": len(v),
+            "p50_ms": percentile(v, 50) * 1e3,
+            "p95_ms": percentile(v, 95) * 1e3,
+            "p99_ms": percentile(v, 99) * 1e3,
+        }
+        for name, v in sorted(values.items())
+    }
+
+
+def print_table(title: str, rows: Dict[str, dict]) -> None:
+    print(f"\n{title}")
+    print(f"{'':>30} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, row in rows.items():
+        print(f"{name:>30} {row['count']:>6} {row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds per model turn")
+    parser.add_argument("--llm-jitter", type=float, default=0.1, help="extra uniform random seconds per turn")
+    parser.add_argument("--solar-latency", type=float, default=0.2, help="seconds per fixture Solar API response")
+    parser.add_argument("--uncovered-fraction", type=float, default=0.0, help="share of points the Solar API does not cover")
+    parser.add_argument("--spread-km", type=float, default=20.0, help="half-width of the area addresses are drawn from")
+    parser.add_argument("--duplicate-fraction", type=float, default=0.0, help="share of requests repeating an earlier address")
+    parser.add_argument("--cache-dir", help="reuse this directory for caches (default: fresh temp dir)")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    cache_dir = args.cache_dir or tempfile.mkdtemp(prefix="solar-load-test-")
+    with FixtureSolarServer(latency_seconds=args.solar_latency, uncovered_fraction=args.uncovered_fraction) as solar:
+        configure_environment(cache_dir, solar.base_url)
+        fake_llms = install_fake_llm(args.llm_latency, args.llm_jitter)
+        import main as app_module
+
+        if not args.verbose:
+            logging.getLogger().setLevel(logging.WARNING)
+        server, thread, base_url = start_server(app_module.app)
+        try:
+            payloads = make_payloads(args.requests, args.spread_km, args.duplicate_fraction, args.seed)
+            run = asyncio.run(drive(base_url, payloads, args.concurrency, args.timeout))
+        finally:
+            server.should_exit = True
+            thread.join(timeout=10)
+        solar_requests = solar.requests
+
+    report = {
+        "requests": args.requests,
+        "succeeded": run["ok"],
+        "concurrency": args.concurrency,
+        "wall_seconds": run["wall_seconds"],
+        "requests_per_second": run["ok"] / run["wall_seconds"] if run["wall_seconds"] else 0.0,
+        # ru_maxrss is KiB on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+        "llm_turns_per_request": sum(llm.calls for llm in fake_llms.values()) / max(1, args.requests),
+        "solar_api_requests": solar_requests,
+        "stages": summarize(run["timings"]),
+        "nodes": summarize(run["nodes"]),
+        "cache_dir": cache_dir,
+    }
+
+    print_table("Stage arrival (from request start)", report["stages"])
+    print_table("Agent graph node durations", report["nodes"])
+    print(
+        f"\n{report['succeeded']}/{report['requests']} ok in {report['wall_seconds']:.2f}s: "
+        f"{report['requests_per_second']:.1f} req/s at concurrency {args.concurrency}, "
+        f"peak RSS {report['peak_rss_mb']:.0f} MB, "
+        f"{report['llm_turns_per_request']:.2f} LLM turns and "
+        f"{report['solar_api_requests'] / max(1, args.requests):.2f} Solar API calls per request"
+    )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if report["succeeded"] < report["requests"]:
+        errors = len(run["timings"].get("error", []))
+        print(
+            f"FAILED: {report['requests'] - report['succeeded']} of {report['requests']} requests produced no result"
+            f" ({errors} error events); the timings above include the error path",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
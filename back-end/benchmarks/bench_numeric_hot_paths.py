@@ -0,0 +1,348 @@
+"""Microbenchmarks, with correctness oracles, for the pure-CPU tariff and bill functions.
+
+Run from back-end/:
+    python -m benchmarks.bench_numeric_hot_paths [--filter tiered] [--save-baseline | --no-baseline]
+
+Covers total_monthly_cost (flat, tiered with 2-50 tiers, TOU, hybrid), compute_tiered_plan,
+compute_tou_plan, convert_plan_to_usd and calculate_monthly_bill_with_solar (1-500
+configs) on generated corpora. Before timing, every case is checked against an
+independent oracle; a mismatch fails the run. Timings are compared with the saved
+baseline (benchmarks/baselines/numeric_hot_paths.json, written by --save-baseline on
+the reference machine); a median slower by more than --tolerance fails the run too.
+Without a baseline file the run fails unless --save-baseline writes one or
+--no-baseline asks for the oracle checks and timings only.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+from agents.subagents.financial_context.electricity_rate.agent import convert_plan_to_usd
+from agents.subagents.financial_context.helper import compute_tiered_plan, compute_tou_plan, total_monthly_cost
+from agents.subagents.financial_context.tariff_compiler import monthly_costs
+from agents.subagents.solar_calculator.batch import calculate_monthly_bills_for_sites
+from agents.subagents.solar_calculator.calculator import calculate_monthly_bill_with_solar
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "numeric_hot_paths.json")
+TIER_COUNTS = (2, 5, 10, 25, 50)
+CONFIG_COUNTS = (1, 10, 100, 500)
+KWH_VALUES = (0.0, 45.5, 180.0, 550.0, 1200.0, 4000.0)
+REL_TOLERANCE = 1e-9
+
+
+# ---- corpora ----------------------------------------------------------------
+
+def _fees(rng: random.Random, usd: bool = True) -> list:
+    key = "amount_usd" if usd else "amount"
+    return [
+        {"name": "distribution", key: round(rng.uniform(0.005, 0.04), 4), "unit": "kWh"},
+        {"name": "service", key: round(rng.uniform(2.0, 15.0), 2), "unit": "month"},
+    ][: rng.randint(0, 2)]
+
+
+def make_flat_plan(rng: random.Random) -> dict:
+    return {
+        "plan_type": "flat",
+        "price_per_kWh_usd": rng.uniform(0.05, 0.45),
+        "fixed_monthly_fee_usd": rng.uniform(0.0, 20.0),
+        "additional_fees": _fees(rng),
+    }
+
+
+def make_tiered_plan(rng: random.Random, tiers: int) -> dict:
+    bounds = sorted(rng.sample(range(10, 50 * tiers + 10), tiers - 1))
+    edges = [0] + bounds + [None]
+    return {
+        "plan_type": "tiered",
+        "tiers": [
+            {"start_kWh": float(edges[i]), "end_kWh": None if edges[i + 1] is None else float(edges[i + 1]),
+             "price_per_kWh_usd": rng.uniform(0.05, 0.6)}
+            for i in range(tiers)
+        ],
+        "fixed_monthly_fee_usd": rng.uniform(0.0, 20.0),
+        "additional_fees": _fees(rng),
+    }
+
+
+def make_tou_plan(rng: random.Random) -> dict:
+    cuts = sorted(rng.sample(range(24), rng.randint(2, 6)))
+    return {
+        "plan_type": "tou",
+        "tou_periods": [
+            {"period_name": f"p{i}", "start_hour": cuts[i], "end_hour": cuts[(i + 1) % len(cuts)],
+             "price_per_kWh_usd": rng.uniform(0.05, 0.6)}
+            for i in range(len(cuts))
+        ],
+        "fixed_monthly_fee_usd": rng.uniform(0.0, 20.0),
+        "additional_fees": _fees(rng),
+    }
+
+
+def make_hybrid_plan(rng: random.Random) -> dict:
+    inner = make_tiered_plan(rng, rng.choice(TIER_COUNTS)) if rng.random() < 0.5 else make_tou_plan(rng)
+    return {**inner, "plan_type": "hybrid"}
+
+
+def make_local_plan(rng: random.Random, tiers: int) -> dict:
+    """A plan in local currency, as electricity_rate_agent writes it, for convert_plan_to_usd."""
+    plan = make_tiered_plan(rng, tiers)
+    return {
+        "plan_type": "hybrid",
+        "currency_code": "EUR",
+        "price_per_kWh": rng.uniform(0.05, 0.45),
+        "tiers": [{"start_kWh": t["start_kWh"], "end_kWh": t["end_kWh"], "price_per_kWh": t["price_per_kWh_usd"]}
+                  for t in plan["tiers"]],
+        "tou_periods": [{"period_name": p["period_name"], "start_hour": p["start_hour"], "end_hour": p["end_hour"],
+                         "price_per_kWh": p["price_per_kWh_usd"]} for p in make_tou_plan(rng)["tou_periods"]],
+        "demand_charges": [{"name": "peak", "price_per_kW": rng.uniform(2.0, 20.0)}],
+        "fixed_monthly_fee": rng.uniform(0.0, 20.0),
+        "additional_fees": _fees(rng, usd=False),
+    }
+
+
+def make_solar_potential(rng: random.Random, configs: int) -> dict:
+    return {
+        "maxArrayPanelsCount": 4 + 2 * configs,
+        "maxSunshineHoursPerYear": rng.uniform(900.0, 2400.0),
+        "panelCapacityWatts": 400,
+        "solarPanelConfigs": [
+            {"panelsCount": 4 + 2 * i, "yearlyEnergyDcKwh": (4 + 2 * i) * rng.uniform(300.0, 550.0)}
+            for i in range(configs)
+        ],
+    }
+
+
+# ---- oracles ----------------------------------------------------------------
+
+def _close(got: float, want: float) -> bool:
+    return math.isclose(got, want, rel_tol=REL_TOLERANCE, abs_tol=1e-9)
+
+
+def _reference_fees(plan: dict, kwh: float) -> float:
+    return sum(f["amount_usd"] * (kwh if f["unit"] == "kWh" else 1.0) for f in plan.get("additional_fees") or [])
+
+
+def reference_tiered(plan: dict, kwh: float) -> float:
+    """Contiguous tiers from 0: each tier bills the part of kwh inside [start, end)."""
+    total = 0.0
+    for t in plan["tiers"]:
+        hi = math.inf if t["end_kWh"] is None else t["end_kWh"]
+        total += max(0.0, min(kwh, hi) - t["start_kWh"]) * t["price_per_kWh_usd"]
+    return total + plan.get("fixed_monthly_fee_usd", 0.0)
+
+
+def reference_tou(plan: dict, kwh: float) -> float:
+    """Hours-weighted mean price; a period whose start equals its end covers the whole day."""
+    spans = [((p["end_hour"] - p["start_hour"]) % 24) or 24 for p in plan["tou_periods"]]
+    price = sum(s * p["price_per_kWh_usd"] for s, p in zip(spans, plan["tou_periods"])) / sum(spans)
+    return kwh * price + plan.get("fixed_monthly_fee_usd", 0.0)
+
+
+def check_total_monthly_cost(plans: List[dict]) -> None:
+    for plan in plans:
+        compiled = monthly_costs(plan, np.array(KWH_VALUES))
+        for kwh, via_compiler in zip(KWH_VALUES, compiled):
+            got = total_monthly_cost(plan, {"energy_kWh": kwh})
+            assert _close(got, float(via_compiler)), f"{plan['plan_type']} at {kwh} kWh: {got} vs compiled {via_compiler}"
+            pt = plan["plan_type"] if plan["plan_type"] != "hybrid" else ("tiered" if plan.get("tiers") else "tou")
+            reference = {"flat": lambda p, k: k * p["price_per_kWh_usd"] + p["fixed_monthly_fee_usd"],
+                         "tiered": reference_tiered, "tou": reference_tou}[pt](plan, kwh)
+            want = reference + _reference_fees(plan, kwh)
+            assert _close(got, want), f"{plan['plan_type']} at {kwh} kWh: {got} vs reference {want}"
+
+
+def check_tiered(plans: List[dict]) -> None:
+    for plan in plans:
+        for kwh in KWH_VALUES:
+            got, want = compute_tiered_plan(plan, kwh), reference_tiered(plan, kwh)
+            assert _close(got, want), f"{len(plan['tiers'])} tiers at {kwh} kWh: {got} vs {want}"
+
+
+def check_tou(plans: List[dict]) -> None:
+    for plan in plans:
+        for kwh in KWH_VALUES:
+            got, want = compute_tou_plan(plan, kwh), reference_tou(plan, kwh)
+            assert _close(got, want), f"TOU at {kwh} kWh: {got} vs {want}"
+
+
+def check_convert(plans: List[dict], rate: float) -> None:
+    for plan in plans:
+        before = json.dumps(plan, sort_keys=True)
+        out = convert_plan_to_usd(plan, rate)
+        assert json.dumps(plan, sort_keys=True) == before, "convert_plan_to_usd mutated its input"
+        pairs = [(out, "price_per_kWh", "price_per_kWh_usd"), (out, "fixed_monthly_fee", "fixed_monthly_fee_usd")]
+        pairs += [(t, "price_per_kWh", "price_per_kWh_usd") for t in out["tiers"] + out["tou_periods"]]
+        pairs += [(d, "price_per_kW", "price_per_kW_usd") for d in out["demand_charges"]]
+        pairs += [(f, "amount", "amount_usd") for f in out["additional_fees"]]
+        for obj, local, usd in pairs:
+            assert obj[usd] == obj[local] * rate, f"{usd}: {obj[usd]} != {obj[local]} * {rate}"
+
+
+def check_monthly_bill(potentials: List[dict], bills: List[float], usages: List[float]) -> None:
+    batch = calculate_monthly_bills_for_sites(
+        potentials, monthly_bill_usd=bills, monthly_kwh_energy_consumption=usages
+    )
+    for i, (potential, bill, usage) in enumerate(zip(potentials, bills, usages)):
+        result = calculate_monthly_bill_with_solar(
+            potential, monthly_bill_usd=bill, monthly_kwh_energy_consumption=usage
+        )
+        per_config = [c["monthlyBillWithSolarUsd"] for c in result["per_config"]]
+        batched = batch["monthlyBillWithSolarUsd"][i, :len(per_config)]
+        assert all(_close(a, float(b)) for a, b in zip(per_config, batched)), f"site {i}: batch engine disagrees"
+        assert result["recommended"]["monthlyBillWithSolarUsd"] == min(per_config), f"site {i}: not the minimum"
+        for c in result["per_config"]:
+            expected_ac = c["yearlyEnergyDcKwh"] * result["dc_to_ac_derate"]
+            assert c["initialAcKwhPerYear"] == expected_ac, f"site {i}: AC derate"
+
+
+# ---- timing -----------------------------------------------------------------
+
+def measure(fn: Callable[[], Any], min_time: float, rounds: int) -> Dict[str, float]:
+    """pytest-benchmark style: calibrate iterations per round, then per-call stats over rounds."""
+    iterations = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        if time.perf_counter() - start >= min_time or iterations >= 1 << 20:
+            break
+        iterations *= 2
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        samples.append((time.perf_counter() - start) / iterations)
+    return {
+        "min_us": min(samples) * 1e6,
+        "median_us": statistics.median(samples) * 1e6,
+        "mean_us": statistics.fmean(samples) * 1e6,
+        "stddev_us": (statistics.stdev(samples) if len(samples) > 1 else 0.0) * 1e6,
+        "ops_per_second": 1.0 / statistics.median(samples),
+        "rounds": rounds,
+        "iterations": iterations,
+    }
+
+
+def _over(items: list, call: Callable[[Any], Any]) -> Callable[[], None]:
+    """One timed call = `call` over every corpus item, so case timings are per corpus."""
+    def run():
+        for item in items:
+            call(item)
+    return run
+
+
+def build_cases(seed: int, corpus_size: int) -> Dict[str, dict]:
+    rng = random.Random(seed)
+    flat = [make_flat_plan(rng) for _ in range(corpus_size)]
+    tiered = {n: [make_tiered_plan(rng, n) for _ in range(corpus_size)] for n in TIER_COUNTS}
+    tou = [make_tou_plan(rng) for _ in range(corpus_size)]
+    hybrid = [make_hybrid_plan(rng) for _ in range(corpus_size)]
+    local = [make_local_plan(rng, 10) for _ in range(corpus_size)]
+    kwh = 550.0
+    energy = {"energy_kWh": kwh}
+
+    cases = {
+        "total_monthly_cost[flat]": (lambda: check_total_monthly_cost(flat), _over(flat, lambda p: total_monthly_cost(p, energy))),
+        "total_monthly_cost[tou]": (lambda: check_total_monthly_cost(tou), _over(tou, lambda p: total_monthly_cost(p, energy))),
+        "total_monthly_cost[hybrid]": (lambda: check_total_monthly_cost(hybrid), _over(hybrid, lambda p: total_monthly_cost(p, energy))),
+        "compute_tou_plan": (lambda: check_tou(tou), _over(tou, lambda p: compute_tou_plan(p, kwh))),
+        "convert_plan_to_usd": (lambda: check_convert(local, 1.0834), _over(local, lambda p: convert_plan_to_usd(p, 1.0834))),
+    }
+    for n, plans in tiered.items():
+        cases[f"total_monthly_cost[tiered-{n}]"] = (
+            lambda plans=plans: check_total_monthly_cost(plans),
+            _over(plans, lambda p: total_monthly_cost(p, energy)),
+        )
+        cases[f"compute_tiered_plan[{n}]"] = (
+            lambda plans=plans: check_tiered(plans),
+            _over(plans, lambda p: compute_tiered_plan(p, kwh)),
+        )
+    for n in CONFIG_COUNTS:
+        potentials = [make_solar_potential(rng, n) for _ in range(corpus_size)]
+        usages = [rng.uniform(80.0, 1500.0) for _ in potentials]
+        bills = [u * rng.uniform(0.05, 0.45) for u in usages]
+        sites = list(zip(potentials, bills, usages))
+        cases[f"calculate_monthly_bill_with_solar[{n}]"] = (
+            lambda p=potentials, b=bills, u=usages: check_monthly_bill(p, b, u),
+            _over(sites, lambda s: calculate_monthly_bill_with_solar(
+                s[0], monthly_bill_usd=s[1], monthly_kwh_energy_consumption=s[2])),
+        )
+    return {name: {"check": check, "run": run} for name, (check, run) in cases.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filter", default="", help="only cases whose name contains this")
+    parser.add_argument("--corpus-size", type=int, default=100, help="items per case (plans or sites)")
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.05, help="seconds per round, for calibration")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="write this run's medians as the new baseline")
+    parser.add_argument("--no-baseline", action="store_true", help="check oracles and print timings without comparing")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed median slowdown vs baseline")
+    args = parser.parse_args()
+    if args.save_baseline and args.no_baseline:
+        parser.error("--save-baseline and --no-baseline are exclusive")
+
+    cases = {k: v for k, v in build_cases(args.seed, args.corpus_size).items() if args.filter in k}
+    baseline = {}
+    if not (args.save_baseline or args.no_baseline):
+        if not os.path.exists(args.baseline):
+            print(
+                f"No baseline at {args.baseline}: run with --save-baseline on the reference machine,"
+                " or --no-baseline to skip the regression check",
+                file=sys.stderr,
+            )
+            sys.exit(2)
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f).get("cases", {})
+
+    failures = []
+    results = {}
+    print(f"{'case':>42} {'median us':>11} {'min us':>10} {'stddev':>9} {'vs base':>8}")
+    for name, case in cases.items():
+        try:
+            case["check"]()
+        except AssertionError as e:
+            failures.append(f"{name}: oracle mismatch: {e}")
+            print(f"{name:>42} {'ORACLE MISMATCH':>40}")
+            continue
+        stats = measure(case["run"], args.min_time, args.rounds)
+        results[name] = stats
+        ratio = ""
+        base = baseline.get(name, {}).get("median_us")
+        if base:
+            change = stats["median_us"] / base - 1.0
+            ratio = f"{change:+.0%}"
+            if change > args.tolerance:
+                failures.append(f"{name}: median {stats['median_us']:.1f} us is {change:+.0%} vs baseline {base:.1f} us")
+        print(f"{name:>42} {stats['median_us']:>11.1f} {stats['min_us']:>10.1f} {stats['stddev_us']:>9.1f} {ratio:>8}")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({
+                "machine": {"python": platform.python_version(), "platform": platform.platform(), "numpy": np.__version__},
+                "corpus_size": args.corpus_size,
+                "seed": args.seed,
+                "cases": results,
+            }, f, indent=2, sort_keys=True)
+        print(f"Saved baseline to {args.baseline}")
+
+    if failures:
+        print("\n" + "\n".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Throughput of the batched monthly-bill engine vs. the scalar calculator.
+
+Run from back-end/:
+    python -m benchmarks.bench_solar_calculator_batch [--site-configs 100000 1000000]
+
+For every size, the scalar function is run on up to --scalar-limit site-configs and
+the batched results for those sites are checked for exact equality.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from agents.subagents.solar_calculator.batch import calculate_monthly_bills_batch
+from agents.subagents.solar_calculator.calculator import calculate_monthly_bill_with_solar
+
+
+def make_corpus(sites: int, configs: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    panels = np.tile(np.arange(4, 4 + 2 * configs, 2, dtype=np.float64), (sites, 1))
+    yearly_dc = panels * rng.uniform(300.0, 550.0, size=(sites, 1))
+    usage = rng.uniform(80.0, 1500.0, size=sites)
+    bill = usage * rng.uniform(0.05, 0.45, size=sites)
+    return panels, yearly_dc, usage, bill
+
+
+def run_scalar(panels, yearly_dc, usage, bill, sites):
+    results = []
+    for i in range(sites):
+        potential = {
+            "solarPanelConfigs": [
+                {"panelsCount": int(p), "yearlyEnergyDcKwh": float(y)}
+                for p, y in zip(panels[i], yearly_dc[i])
+            ]
+        }
+        results.append(calculate_monthly_bill_with_solar(
+            potential,
+            monthly_bill_usd=float(bill[i]),
+            monthly_kwh_energy_consumption=float(usage[i]),
+        ))
+    return results
+
+
+def check_exact(batch, scalar):
+    for i, expected in enumerate(scalar):
+        got = batch["monthlyBillWithSolarUsd"][i]
+        want = [c["monthlyBillWithSolarUsd"] for c in expected["per_config"]]
+        assert list(got) == want, f"site {i}: per-config bills differ"
+        assert batch["price_per_kWh_usd"][i] == expected["price_per_kWh_usd"]
+        assert batch["recommended_panelsCount"][i] == expected["recommended"]["panelsCount"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--site-configs", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--configs-per-site", type=int, default=20)
+    parser.add_argument("--scalar-limit", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'site-configs':>12} {'batch s':>9} {'batch /s':>12} {'scalar /s':>12} {'speedup':>8}")
+    for total in args.site_configs:
+        sites = max(1, total // args.configs_per_site)
+        panels, yearly_dc, usage, bill = make_corpus(sites, args.configs_per_site)
+
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            batch = calculate_monthly_bills_batch(
+                yearly_dc,
+                monthly_bill_usd=bill,
+                monthly_kwh_energy_consumption=usage,
+                panels_count=panels,
+            )
+            best = min(best, time.perf_counter() - start)
+
+        scalar_sites = max(1, min(sites, args.scalar_limit // args.configs_per_site))
+        start = time.perf_counter()
+        scalar = run_scalar(panels, yearly_dc, usage, bill, scalar_sites)
+        scalar_elapsed = time.perf_counter() - start
+        check_exact(batch, scalar)
+
+        batch_rate = sites * args.configs_per_site / best
+        scalar_rate = scalar_sites * args.configs_per_site / scalar_elapsed
+        print(
+            f"{sites * args.configs_per_site:>12,} {best:>9.4f} {batch_rate:>12,.0f} "
+            f"{scalar_rate:>12,.0f} {batch_rate / scalar_rate:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""Local stand-ins for Gemini and the Google Solar API, for offline benchmarks.
+
+- `install_fake_llm()` makes every LlmAgent in `agents/` answer from a script after a
+  configurable delay instead of calling a model.
+- `FixtureSolarServer` serves synthetic `buildingInsights:findClosest` responses over
+  HTTP; point the app at it with SOLAR_API_BASE_URL.
+"""
+import asyncio
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import AsyncGenerator, Callable, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+from google.adk.agents import LlmAgent
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+DEFAULT_MODEL = "gemini-2.0-flash"
+
+REGIONAL_IDENTIFIERS = {
+    "building_type": "residential",
+    "city": "San Jose",
+    "county_or_province": "Santa Clara County",
+    "state_or_region": "California",
+    "country": "United States",
+    "country_code": "US",
+    "currency_code": "USD",
+    "currency_name": "US Dollar",
+}
+LOCAL_RATES = {
+    "plan_type": "tiered",
+    "utility_name": "Fixture Power & Light",
+    "currency_code": "USD",
+    "tiers": [
+        {"start_kWh": 0, "end_kWh": 300, "price_per_kWh": 0.28},
+        {"start_kWh": 300, "end_kWh": None, "price_per_kWh": 0.36},
+    ],
+    "fixed_monthly_fee": 12.0,
+}
+# LOCAL_RATES converted at 1.0, as usd_converted_electricity_rates_agent would
+USD_RATES = {
+    "plan_type": "tiered",
+    "utility_name": "Fixture Power & Light",
+    "currency_code": "USD",
+    "tiers": [
+        {"start_kWh": 0, "end_kWh": 300, "price_per_kWh": 0.28, "price_per_kWh_usd": 0.28},
+        {"start_kWh": 300, "end_kWh": None, "price_per_kWh": 0.36, "price_per_kWh_usd": 0.36},
+    ],
+    "fixed_monthly_fee": 12.0,
+    "fixed_monthly_fee_usd": 12.0,
+}
+MONTHLY_KWH = 550.0
+MONTHLY_BILL_USD = 12.0 + 300 * 0.28 + 250 * 0.36
+
+
+def make_building_insights(latitude: float, longitude: float, panels: int = 60, seed: int = 0) -> dict:
+    """A buildingInsights response shaped like the real one, including per-panel arrays."""
+    rng = random.Random(seed)
+    yields = sorted((rng.uniform(330.0, 470.0) for _ in range(panels)), reverse=True)
+    solar_panels = [
+        {
+            "center": {"latitude": latitude + i * 1e-6, "longitude": longitude - i * 1e-6},
+            "orientation": "LANDSCAPE" if i % 3 else "PORTRAIT",
+            "segmentIndex": i % 4,
+            "yearlyEnergyDcKwh": y,
+        }
+        for i, y in enumerate(yields)
+    ]
+    configs = []
+    total = 0.0
+    for i, y in enumerate(yields, start=1):
+        total += y
+        if i >= 4 and i % 2 == 0:
+            configs.append({
+                "panelsCount": i,
+                "yearlyEnergyDcKwh": total,
+                "roofSegmentSummaries": [
+                    {"segmentIndex": s, "panelsCount": i // 4, "yearlyEnergyDcKwh": total / 4} for s in range(4)
+                ],
+            })
+    return {
+        "name": f"buildings/fixture-{latitude:.5f}-{longitude:.5f}",
+        "center": {"latitude": latitude, "longitude": longitude},
+        "imageryQuality": "HIGH",
+        "regionCode": "US",
+        "solarPotential": {
+            "maxArrayPanelsCount": panels,
+            "maxArrayAreaMeters2": panels * 1.88,
+            "maxSunshineHoursPerYear": 1850.0,
+            "panelCapacityWatts": 400,
+            "roofSegmentStats": [
+                {"pitchDegrees": 22.0, "azimuthDegrees": 90.0 * s, "stats": {"areaMeters2": 40.0}}
+                for s in range(4)
+            ],
+            "solarPanelConfigs": configs,
+            "solarPanels": solar_panels,
+        },
+    }
+
+
+def _solar_potential_subset(insights: dict) -> dict:
+    potential = insights["solarPotential"]
+    return {
+        "maxArrayPanelsCount": potential["maxArrayPanelsCount"],
+        "maxSunshineHoursPerYear": potential["maxSunshineHoursPerYear"],
+        "panelCapacityWatts": potential["panelCapacityWatts"],
+        "solarPanelConfigs": [
+            {"panelsCount": c["panelsCount"], "yearlyEnergyDcKwh": c["yearlyEnergyDcKwh"]}
+            for c in potential["solarPanelConfigs"]
+        ],
+    }
+
+
+def _text(value) -> types.Content:
+    text = value if isinstance(value, str) else json.dumps(value)
+    return types.Content(role="model", parts=[types.Part(text=text)])
+
+
+def _bill_agent_turn(request: LlmRequest) -> types.Content:
+    """First turn calls the calculator tool; once its response is in, write the paragraph."""
+    last = request.contents[-1] if request.contents else None
+    if last is not None and any(p.function_response for p in last.parts or []):
+        return _text(
+            "Installing solar panels could cut your monthly electricity bill substantially while "
+            "protecting you from future rate increases. Get a quote today."
+        )
+    tool_name = next(iter(request.tools_dict), "_monthly_bill_with_solar_tool")
+    call = types.FunctionCall(
+        name=tool_name,
+        args={
+            "solar_potential": _solar_potential_subset(make_building_insights(0.0, 0.0)),
+            "average_monthly_expense_usd": MONTHLY_BILL_USD,
+            "energy_kWh": MONTHLY_KWH,
+        },
+    )
+    return types.Content(role="model", parts=[types.Part(function_call=call)])
+
+
+def _tool_turn(args: Callable[[LlmRequest], dict] = lambda r: {}) -> Callable[[LlmRequest], types.Content]:
+    """Call the agent's first tool, then answer with the tool's response as JSON, like the echo agents."""
+
+    def turn(request: LlmRequest) -> types.Content:
+        last = request.contents[-1] if request.contents else None
+        responses = [p.function_response for p in (last.parts or []) if p.function_response] if last else []
+        if responses:
+            return _text(responses[0].response or {})
+        call = types.FunctionCall(name=next(iter(request.tools_dict)), args=args(request))
+        return types.Content(role="model", parts=[types.Part(function_call=call)])
+
+    return turn
+
+
+# Agent name -> reply, for every LlmAgent in agents/ (fallbacks included). Others answer "{}".
+Script = Dict[str, Callable[[LlmRequest], types.Content]]
+DEFAULT_SCRIPT: Script = {
+    "regional_context_search_agent": lambda r: _text(REGIONAL_IDENTIFIERS),
+    "currency_code_setter_llm": lambda r: _text("USD"),
+    "electricity_rate_agent": lambda r: _text(LOCAL_RATES),
+    "conversion_rate_agent": lambda r: _text("1.0"),
+    "usd_converted_electricity_rates_agent": _tool_turn(
+        lambda r: {"local_electricity_rates": LOCAL_RATES, "conversion_rate": 1.0}
+    ),
+    "usd_electricity_rates_setter_llm": lambda r: _text(USD_RATES),
+    "typical_energy_usage_agent": lambda r: _text({"kwh_per_month": MONTHLY_KWH, "source_url": "https://example.org/usage"}),
+    "energy_setter_llm": lambda r: _text({"energy_kWh": MONTHLY_KWH}),
+    "solar_coverage_similarity_agent": lambda r: _text({
+        "proxy_location_name": "Fixture covered neighborhood",
+        "proxy_latitude": 37.3382,
+        "proxy_longitude": -121.8863,
+        "reasoning": "Nearest covered area in the fixture set.",
+    }),
+    "proxy_coordinate_setter_llm": _tool_turn(),
+    "fetch_solar_insights_agent_1_llm": _tool_turn(),
+    "fetch_solar_insights_agent_2_llm": _tool_turn(),
+    "solar_potential_setter_llm": lambda r: _text(_solar_potential_subset(make_building_insights(0.0, 0.0))),
+    "solar_monthly_bill_agent": _bill_agent_turn,
+}
+
+
+class ScriptedLlm(BaseLlm):
+    """Replies from a script after `latency_seconds` (+ up to `jitter_seconds`) per turn."""
+
+    agent_name: str
+    latency_seconds: float = 0.5
+    jitter_seconds: float = 0.0
+    script: Script = DEFAULT_SCRIPT
+    calls: int = 0
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        self.calls += 1
+        await asyncio.sleep(self.latency_seconds + random.uniform(0.0, self.jitter_seconds))
+        reply = self.script.get(self.agent_name)
+        content = reply(llm_request) if reply else _text({})
+        yield LlmResponse(content=content, turn_complete=True)
+
+
+_fake_llms: Dict[str, ScriptedLlm] = {}
+
+
+def install_fake_llm(latency_seconds: float = 0.5, jitter_seconds: float = 0.0, script: Optional[Script] = None) -> Dict[str, ScriptedLlm]:
+    """Route every LlmAgent (including clones and agents run outside the graph) to a ScriptedLlm.
+
+    Returns the per-agent fakes, whose `calls` count model turns taken.
+    """
+
+    def canonical_model(agent: LlmAgent) -> BaseLlm:
+        llm = _fake_llms.get(agent.name)
+        if llm is None:
+            llm = _fake_llms[agent.name] = ScriptedLlm(
+                # Built-in tools such as google_search check for a Gemini model name
+                model=agent.model if isinstance(agent.model, str) and agent.model else DEFAULT_MODEL,
+                agent_name=agent.name,
+                latency_seconds=latency_seconds,
+                jitter_seconds=jitter_seconds,
+                script=script or DEFAULT_SCRIPT,
+            )
+        return llm
+
+    LlmAgent.canonical_model = property(canonical_model)
+    return _fake_llms
+
+
+class FixtureSolarServer:
+    """Threaded HTTP server answering buildingInsights:findClosest from synthetic fixtures.
+
+    A deterministic `uncovered_fraction` of coordinates get a 404, as outside coverage.
+    """
+
+    def __init__(self, latency_seconds: float = 0.2, uncovered_fraction: float = 0.0, panels: int = 60):
+        self.latency_seconds = float(latency_seconds)
+        self.uncovered_fraction = float(uncovered_fraction)
+        self.panels = int(panels)
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                server.requests += 1
+                time.sleep(server.latency_seconds)
+                if not url.path.endswith("buildingInsights:findClosest"):
+                    return self._reply(404, {"error": {"code": 404, "message": "Not found"}})
+                try:
+                    lat = float(query["location.latitude"][0])
+                    lon = float(query["location.longitude"][0])
+                except (KeyError, ValueError):
+                    return self._reply(400, {"error": {"code": 400, "message": "Bad coordinates"}})
+                if server.is_uncovered(lat, lon):
+                    return self._reply(404, {"error": {"code": 404, "message": "Entity not found"}})
+                return self._reply(200, make_building_insights(lat, lon, server.panels, seed=hash((lat, lon))))
+
+            def _reply(self, status: int, body: dict):
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="solar-fixture", daemon=True)
+
+    def is_uncovered(self, latitude: float, longitude: float) -> bool:
+        digest = hashlib.sha256(f"{latitude:.4f},{longitude:.4f}".encode()).digest()
+        return digest[0] / 256.0 < self.uncovered_fraction
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def __enter__(self) -> "FixtureSolarServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
@@ -0,0 +1 @@
+# Lets pytest import the app's packages (agents, services, models) from back-end/
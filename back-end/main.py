@@ -1,9 +1,12 @@
+import asyncio
 import json
 import os
+import time
 import uuid
-from typing import Optional
-from fastapi import FastAPI
-from google.adk.sessions import InMemorySessionService
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional
+from fastapi import FastAPI, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from google.adk.runners import Runner
 from google.genai import types
 from dotenv import load_dotenv
@@ -11,10 +14,34 @@ import uvicorn
 import logging
 
 from agents.agent import build_root_agent
-from models.schemas import AddressInput
+from agents.instrumentation import MetricsPlugin
+from agents.fast_path import fast_path_report, lookup_stats, parse_json_output
+from agents.scheduler import CRITICAL_PATH_STATE_KEY
+from agents.subagents.financial_context.electricity_rate.tariff_store import get_tariff_store
+from agents.subagents.financial_context.typical_usage.usage_table import get_usage_table
+from agents.subagents.regional_context.cache import get_regional_cache
+from agents.subagents.solar_calculator.what_if import recompute, resolved_inputs
+from agents.subagents.solar_context.coverage_index import get_coverage_index
+from agents.subagents.solar_context.solar_insights import solar_api
+from agents.subagents.solar_context.solar_insights.cache import get_cache as get_solar_cache
+from models.schemas import AddressInput, WhatIfInput
+from services import metrics
+from services.fx_rates import get_fx_rates
+from services.profiling import RequestProfiler, profile_requested
+from services.result_store import get_result_store
+from services.session_store import BoundedSessionService
+from services.single_flight import StreamFlight
 
 load_dotenv() 
-app = FastAPI(title="Solar Calculation API", version="1.0.0")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await solar_api.aclose_client()
+
+
+app = FastAPI(title="Solar Calculation API", version="1.0.0", lifespan=lifespan)
 APP_NAME = "agents"
 USER_ID = "user"
 
@@ -22,63 +49,314 @@ USER_ID = "user"
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-session_service = InMemorySessionService()
+# Sessions are dropped once their response is out; the raw Solar API payload is not kept
+session_service = BoundedSessionService.from_env(drop_keys=("solar_building_insights",))
 
-@app.api_route("/", methods=["POST", "GET"], summary="Run agent pipeline")
-async def run_agents(input_data: Optional[AddressInput] = None):
-    """Run the agent pipeline (POST with JSON body or GET fallback).
+# Built once and shared by every request; per-request inputs come from session state
+runner = Runner(
+    agent=build_root_agent(),
+    app_name=APP_NAME,
+    session_service=session_service,
+    # Agent, model and tool timings for /metrics and each result's "timings"
+    plugins=[MetricsPlugin()],
+)
 
-    - POST: pass an AddressInput JSON.
-    - GET: no body; sample payload is used.
-    - Each invocation uses a unique session id to avoid AlreadyExistsError.
+SAMPLE_PAYLOAD = {
+    "latitude": 10.809107,
+    "longitude": 106.705638,
+    "address": "122/46/11 bùi đình tý phường 12 quận bình thạnh tp hồ chí minh",
+}
+BATCH_MAX_CONCURRENCY = int(os.environ.get("BATCH_MAX_CONCURRENCY", 8))
+BATCH_MAX_ITEMS = int(os.environ.get("BATCH_MAX_ITEMS", 1000))
+
+# Identical requests in flight at the same time share one pipeline run
+pipeline_flights = StreamFlight("pipeline")
+
+
+# Session state keys pushed to /stream clients as soon as an agent writes them
+STREAMED_STATE_KEYS = (
+    "regional_identifiers",
+    "currency_code",
+    "usd_electricity_rates",
+    "energy_kWh",
+    "average_monthly_expense_usd",
+    "solar_proxy_location",
+    "solar_potentials",
+    "solar_monthly_bill_analysis",
+)
+
+
+def _decode_state_value(value):
+    """LLM agents without an output schema store JSON as text; decode it for clients when possible."""
+    try:
+        return parse_json_output(value)
+    except ValueError:
+        return value
+
+
+def _pipeline_key(payload: dict) -> tuple:
+    address = " ".join(str(payload.get("address") or "").lower().split())
+    return (
+        round(float(payload.get("latitude")), 6),
+        round(float(payload.get("longitude")), 6),
+        address,
+    )
+
+
+def stream_pipeline(payload: dict, profile: bool = False) -> AsyncIterator[dict]:
+    """Run the full agent graph for one address in its own session.
+
+    Yields `{"stage": key, "value": ...}` whenever an agent writes one of
+    STREAMED_STATE_KEYS, then a final `{"result": ...}`. Identical requests
+    (same coordinates to ~0.1 m and address) arriving while one is running share
+    that run: they replay its stages so far and then follow it.
+
+    With `profile`, the run gets its own session (it is never shared) and is
+    profiled by a RequestProfiler; the result then carries a `profile` summary.
     """
+    if profile:
+        return _run_pipeline_stream(payload, profile=True)
+    return pipeline_flights.subscribe(_pipeline_key(payload), lambda: _run_pipeline_stream(payload))
+
+
+async def _run_pipeline_stream(payload: dict, profile: bool = False) -> AsyncIterator[dict]:
     SESSION_ID = str(uuid.uuid4()) 
+    timings = metrics.start_run()
+    profiler = RequestProfiler(SESSION_ID).start() if profile else None
+    outcome = "error"
 
-    # Create a fresh session for this request
-    session = await session_service.create_session(
+    # Create a fresh session for this request, seeded with the inputs the agent graph reads
+    await session_service.create_session(
         app_name=APP_NAME,
         user_id=USER_ID,
         session_id=SESSION_ID,
+        in_flight=True,
+        state={
+            "latitude": payload.get("latitude"),
+            "longitude": payload.get("longitude"),
+            "address": payload.get("address"),
+            # latitude/longitude may later point at a Solar API proxy; these never change
+            "request_latitude": payload.get("latitude"),
+            "request_longitude": payload.get("longitude"),
+        },
     )
     
+    try:
+        content = types.Content(parts=[types.Part(text=json.dumps(payload))])
+
+        final_response_text = "Agent did not produce a final response."
+
+        # Stream agent responses asynchronously
+        async for event in runner.run_async(
+            user_id=USER_ID,
+            session_id=SESSION_ID,
+            new_message=content,
+        ):
+            for key, value in (event.actions.state_delta or {}).items():
+                if key in STREAMED_STATE_KEYS:
+                    yield {"stage": key, "value": _decode_state_value(value)}
+            if event.is_final_response():
+                if getattr(event, "content", None) and event.content.parts:
+                    final_response_text = event.content.parts[0].text
+                elif getattr(event, "actions", None) and event.actions.escalate:
+                    final_response_text = f"Agent escalated: {event.error_message or 'No specific message.'}"
+                logger.info(f"<<< Final Agent Response: {final_response_text}")
+
+        session = await session_service.get_session(app_name=APP_NAME, user_id=USER_ID, session_id=SESSION_ID)
+        paths = fast_path_report(session.state) if session else {}
+        critical_path = session.state.get(CRITICAL_PATH_STATE_KEY) if session else None
+        logger.info(f"Fast path report: {paths}")
+        result_id = await _store_resolved_inputs(SESSION_ID, session.state) if session else None
+
+        yield {
+            "result": {
+                "message": "OK",
+                "response": final_response_text,
+                "fast_path": paths,
+                "critical_path": critical_path,
+                "result_id": result_id,
+                "timings": timings.as_dict(),
+                **({"profile": profiler.stop()} if profiler is not None else {}),
+            }
+        }
+        outcome = "ok"
+    finally:
+        if profiler is not None:
+            profiler.stop()
+        metrics.record_pipeline(time.perf_counter() - timings.started, outcome)
+        await session_service.finish(app_name=APP_NAME, user_id=USER_ID, session_id=SESSION_ID)
+
+
+async def _store_resolved_inputs(result_id: str, state: dict) -> Optional[str]:
+    """Keep what `/what-if/{result_id}` needs; None when the run did not resolve every input."""
+    store = get_result_store()
+    inputs = resolved_inputs(state) if store is not None else None
+    if inputs is None:
+        return None
+    try:
+        # SQLite write, kept off the event loop
+        await asyncio.to_thread(store.put, result_id, inputs)
+    except Exception as e:
+        logger.warning(f"Could not store resolved inputs: {e!r}")
+        return None
+    return result_id
+
+
+async def run_pipeline(payload: dict, profile: bool = False) -> dict:
+    async for update in stream_pipeline(payload, profile):
+        if "result" in update:
+            # Coalesced callers share one result object
+            return dict(update["result"])
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+async def _stream_events(payload: dict, profile: bool = False) -> AsyncIterator[str]:
+    try:
+        async for update in stream_pipeline(payload, profile):
+            if "result" in update:
+                yield _sse("result", update["result"])
+            else:
+                yield _sse("stage", update)
+    except Exception as e:
+        logger.exception("Streaming pipeline failed")
+        yield _sse("error", {"error": str(e)})
+
+@app.api_route("/", methods=["POST", "GET"], summary="Run agent pipeline")
+async def run_agents(
+    input_data: Optional[AddressInput] = None,
+    profile: Optional[str] = Query(None, include_in_schema=False),
+    x_profile: Optional[str] = Header(None, include_in_schema=False),
+):
+    """Run the agent pipeline (POST with JSON body or GET fallback).
+
+    - POST: pass an AddressInput JSON.
+    - GET: no body; sample payload is used.
+    - Each invocation uses a unique session id to avoid AlreadyExistsError.
+    - With PROFILING_ENABLED, `?profile=` or an `X-Profile` header profiles this run.
+    """
     # Use provided input or fallback sample
-    payload = input_data.model_dump() if input_data else {
-        "latitude": 10.809107,
-        "longitude": 106.705638,
-        "address": "122/46/11 bùi đình tý phường 12 quận bình thạnh tp hồ chí minh",
-    }
-    
-    root_agent = build_root_agent(lat=payload.get("latitude"), lon=payload.get("longitude"))
-    
-    # Initialize Runner with the session service
-    runner = Runner(
-        agent=root_agent,
-        app_name=APP_NAME,
-        session_service=session_service,
+    payload = input_data.model_dump() if input_data else SAMPLE_PAYLOAD
+    return await run_pipeline(payload, profile_requested(x_profile or profile))
+
+@app.post("/stream", summary="Run agent pipeline, streaming stage results as server-sent events")
+async def stream_agents(
+    input_data: AddressInput,
+    profile: Optional[str] = Query(None, include_in_schema=False),
+    x_profile: Optional[str] = Header(None, include_in_schema=False),
+):
+    """Same pipeline as `/`, but each stage's result is pushed as soon as it lands in session state.
+
+    Emits `stage` events (`{"stage": key, "value": ...}`), then one `result` event with
+    the same body `/` returns, or an `error` event.
+    """
+    return StreamingResponse(
+        _stream_events(input_data.model_dump(), profile_requested(x_profile or profile)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    
-    content = types.Content(parts=[types.Part(text=json.dumps(payload))])
-    
-    session.state["latitude"] = payload.get("latitude")
-    session.state["longitude"] = payload.get("longitude")
-    session.state["address"] = payload.get("address")
 
-    final_response_text = "Agent did not produce a final response."
+async def _run_batch_item(index: int, payload: dict) -> dict:
+    try:
+        return {"index": index, "input": payload, "result": await run_pipeline(payload)}
+    except Exception as e:
+        logger.exception(f"Batch item {index} failed")
+        return {"index": index, "input": payload, "error": str(e)}
 
-    # Stream agent responses asynchronously
-    async for event in runner.run_async(
-        user_id=USER_ID,
-        session_id=SESSION_ID,
-        new_message=content,
-    ):
-        if event.is_final_response():
-            if getattr(event, "content", None) and event.content.parts:
-                final_response_text = event.content.parts[0].text
-            elif getattr(event, "actions", None) and event.actions.escalate:
-                final_response_text = f"Agent escalated: {event.error_message or 'No specific message.'}"
-            logger.info(f"<<< Final Agent Response: {final_response_text}")
-
-    return {"message": "OK", "response": final_response_text}
+async def _stream_batch(addresses: List[AddressInput], concurrency: int) -> AsyncIterator[str]:
+    """Keep at most `concurrency` pipelines in flight and emit each result as it completes."""
+    items = iter(enumerate(addresses))
+    in_flight = set()
+    try:
+        while True:
+            for index, address in items:
+                in_flight.add(asyncio.create_task(_run_batch_item(index, address.model_dump())))
+                if len(in_flight) >= concurrency:
+                    break
+            if not in_flight:
+                return
+            done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield json.dumps(task.result(), ensure_ascii=False) + "\n"
+    finally:
+        for task in in_flight:
+            task.cancel()
+
+@app.post("/batch", summary="Run the agent pipeline for many addresses (NDJSON stream)")
+async def run_batch(
+    addresses: List[AddressInput],
+    concurrency: int = Query(BATCH_MAX_CONCURRENCY, ge=1, le=BATCH_MAX_CONCURRENCY),
+):
+    """Evaluate many addresses concurrently, streaming one JSON line per address as it finishes.
+
+    Lines carry the input `index`, so callers can match results that arrive out of order.
+    Solar API caches and in-flight lookups are shared across the batch. Batches of more
+    than `BATCH_MAX_ITEMS` addresses are rejected with 413.
+    """
+    if len(addresses) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch of {len(addresses)} addresses exceeds the limit of {BATCH_MAX_ITEMS}",
+        )
+    return StreamingResponse(_stream_batch(addresses, concurrency), media_type="application/x-ndjson")
+
+@app.post("/what-if/{result_id}", summary="Recompute a finished run's bill analysis with overridden inputs")
+async def what_if(result_id: str, overrides: WhatIfInput):
+    """Re-price a finished run with new usage, bill, panel count or rate plan, without the agents.
+
+    `result_id` comes from a pipeline result. Only total_monthly_cost and
+    calculate_monthly_bill_with_solar run, on the run's stored solar potential,
+    rates, usage and bill; fields left unset keep the run's values.
+    """
+    started = time.perf_counter()
+    store = get_result_store()
+    inputs = await asyncio.to_thread(store.get, result_id) if store is not None else None
+    if inputs is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired result id {result_id}")
+    rates = overrides.usd_electricity_rates
+    try:
+        result = recompute(
+            inputs,
+            energy_kWh=overrides.energy_kWh,
+            average_monthly_expense_usd=overrides.average_monthly_expense_usd,
+            panels_count=overrides.panels_count,
+            usd_electricity_rates=rates.model_dump(exclude_none=True) if rates is not None else None,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {"result_id": result_id, **result, "seconds": round(time.perf_counter() - started, 6)}
+
+@app.get("/cache/stats", summary="Cache hit/miss counters")
+async def cache_stats():
+    solar_cache = get_solar_cache()
+    coverage_index = get_coverage_index()
+    regional_cache = get_regional_cache()
+    tariff_store = get_tariff_store()
+    fx_rates = get_fx_rates()
+    usage_table = get_usage_table()
+    result_store = get_result_store()
+    return {
+        "solar_insights": solar_cache.stats() if solar_cache else None,
+        "solar_coverage_index": coverage_index.stats() if coverage_index else None,
+        "solar_in_flight": solar_api.solar_lookups.stats(),
+        "pipeline_in_flight": pipeline_flights.stats(),
+        "sessions": session_service.stats(),
+        "what_if_results": result_store.stats() if result_store else None,
+        "regional_context": regional_cache.stats() if regional_cache else None,
+        "tariff_store": tariff_store.stats() if tariff_store else None,
+        "fx_rates": fx_rates.stats() if fx_rates else None,
+        "typical_usage": usage_table.stats() if usage_table else None,
+        # Per cached-lookup agent: hit rate and estimated latency saved
+        "agent_lookups": lookup_stats(),
+    }
+
+@app.get("/metrics", summary="Prometheus metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Histograms of pipeline, agent, model and tool wall time, model tokens and loop
+    iterations, and cache lookup counters, in the Prometheus text format."""
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=int(os.environ.get("PORT", 3001)))
\ No newline at end of file
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Literal, Optional, Dict, Any
 
 class AddressInput(BaseModel):
@@ -20,16 +20,17 @@ class RegionalIdentifiers(BaseModel):
     currency_name: str
     
 class Tier(BaseModel):
-    start_kWh: float = None
-    end_kWh: float = None
-    price_per_kWh: float = None
+    start_kWh: Optional[float] = None
+    # None (or absent) on the open-ended top tier
+    end_kWh: Optional[float] = None
+    price_per_kWh: Optional[float] = None
     price_per_kWh_usd: float
 
 class TOUPeriod(BaseModel):
     period_name: str
     start_hour: int
     end_hour: int
-    price_per_kWh: float = None
+    price_per_kWh: Optional[float] = None
     price_per_kWh_usd: float
 
 class DemandCharge(BaseModel):
@@ -88,4 +89,9 @@ class FinalAnalysis(BaseModel):
     
     proxy_location: Optional[ProxyLocation] = None
     electricity_rate_plan: Optional[USDConvertedElectricityRatePlan] = None
-    
\ No newline at end of file
+    
+class WhatIfInput(BaseModel):
+    energy_kWh: Optional[float] = Field(None, ge=0)
+    average_monthly_expense_usd: Optional[float] = Field(None, ge=0)
+    panels_count: Optional[int] = Field(None, ge=1)
+    usd_electricity_rates: Optional[USDConvertedElectricityRatePlan] = None
@@ -0,0 +1,144 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RATES_PATH = ".cache/fx_rates.json"
+DEFAULT_REFRESH_SECONDS = 24 * 3600
+DEFAULT_RETRY_SECONDS = 60.0
+
+
+class FxRateTable:
+    """Currency -> USD conversion rates from a local JSON table, refreshed at most daily.
+
+    The table holds units of each currency per 1 USD, as published by most rate feeds:
+    `{"base": "USD", "updated_at": <unix seconds>, "rates": {"EUR": 0.92, ...}}`.
+    When `url` is set and the table is older than `refresh_seconds`, the next lookup
+    answers from the current table and starts a background download of a fresh table (any feed returning `rates` against USD, e.g.
+    https://open.er-api.com/v6/latest/USD) and saves it to `path`. On failure the old
+    table keeps being used and the download is retried after `retry_seconds`, doubling
+    per consecutive failure up to `refresh_seconds`. Converted rates are cached in
+    memory per currency code.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_RATES_PATH,
+        url: Optional[str] = None,
+        refresh_seconds: float = DEFAULT_REFRESH_SECONDS,
+        retry_seconds: float = DEFAULT_RETRY_SECONDS,
+    ):
+        self.path = path
+        self.url = url or None
+        self.refresh_seconds = float(refresh_seconds)
+        self.retry_seconds = float(retry_seconds)
+        self.updated_at = 0.0
+        self._rates: Dict[str, float] = {}
+        self._to_usd: Dict[str, float] = {}
+        self._next_attempt = 0.0
+        self._failures = 0
+        self._refresh_lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._load_file()
+
+    @classmethod
+    def from_env(cls) -> "FxRateTable":
+        return cls(
+            path=os.getenv("FX_RATES_PATH", DEFAULT_RATES_PATH),
+            url=os.getenv("FX_RATES_URL"),
+            refresh_seconds=float(os.getenv("FX_RATES_REFRESH_SECONDS", DEFAULT_REFRESH_SECONDS)),
+            retry_seconds=float(os.getenv("FX_RATES_RETRY_SECONDS", DEFAULT_RETRY_SECONDS)),
+        )
+
+    def _load_file(self) -> None:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self._apply(json.load(f))
+        except FileNotFoundError:
+            logger.info(f"No FX rate table at {self.path}")
+        except (OSError, ValueError, TypeError, KeyError) as e:
+            logger.warning(f"Could not read FX rate table {self.path}: {e}")
+
+    def _apply(self, table: dict) -> None:
+        base = (table.get("base") or table.get("base_code") or "USD").upper()
+        if base != "USD":
+            raise ValueError(f"FX table base must be USD, got {base}")
+        rates = {code.upper(): float(rate) for code, rate in table["rates"].items() if float(rate) > 0}
+        self._rates = rates
+        self._to_usd = {}
+        self.updated_at = float(table.get("updated_at") or table.get("time_last_update_unix") or time.time())
+
+    def is_stale(self) -> bool:
+        return time.time() - self.updated_at > self.refresh_seconds
+
+    async def refresh(self) -> None:
+        async with self._refresh_lock:
+            # One download per window, however many lookups queue here: the refresh window
+            # after a success, a short backoff after a failure
+            now = time.time()
+            if not self.is_stale() or now < self._next_attempt:
+                return
+            try:
+                async with httpx.AsyncClient(timeout=10.0) as client:
+                    response = await client.get(self.url)
+                    response.raise_for_status()
+                    table = response.json()
+                self._apply(table)
+                table = {"base": "USD", "updated_at": self.updated_at, "rates": self._rates}
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                with open(self.path, "w", encoding="utf-8") as f:
+                    json.dump(table, f)
+                logger.info(f"Refreshed FX rate table ({len(self._rates)} currencies)")
+            except (httpx.HTTPError, OSError, ValueError, TypeError, KeyError) as e:
+                backoff = min(self.retry_seconds * 2 ** self._failures, self.refresh_seconds)
+                self._failures += 1
+                self._next_attempt = now + backoff
+                logger.warning(f"FX rate refresh failed, keeping current table; retrying in {backoff:.0f}s: {e}")
+            else:
+                self._failures = 0
+                self._next_attempt = now + self.refresh_seconds
+
+    async def rate_to_usd(self, currency_code: str) -> Optional[float]:
+        """USD per one unit of `currency_code`, or None if the table does not have it."""
+        code = (currency_code or "").strip().upper()
+        if code == "USD":
+            return 1.0
+        if self.url and self.is_stale():
+            if not self._rates:
+                # Nothing to answer from yet, so this lookup waits for the download
+                await self.refresh()
+            elif self._refresh_task is None or self._refresh_task.done():
+                if not self._refresh_lock.locked() and time.time() >= self._next_attempt:
+                    self._refresh_task = asyncio.create_task(self.refresh())
+        if code not in self._to_usd:
+            rate = self._rates.get(code)
+            if rate is None:
+                return None
+            self._to_usd[code] = 1.0 / rate
+        return self._to_usd[code]
+
+    def stats(self) -> dict:
+        return {
+            "currencies": len(self._rates),
+            "updated_at": self.updated_at or None,
+            "stale": self.is_stale(),
+        }
+
+
+_table: Optional[FxRateTable] = None
+
+
+def get_fx_rates() -> Optional[FxRateTable]:
+    """Shared process-wide table; disabled when FX_RATES_ENABLED is falsy."""
+    global _table
+    if os.getenv("FX_RATES_ENABLED", "true").lower() in ("0", "false", "no"):
+        return None
+    if _table is None:
+        _table = FxRateTable.from_env()
+    return _table
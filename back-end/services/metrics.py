@@ -0,0 +1,254 @@
+import bisect
+import contextvars
+import math
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Seconds; spans in-process code (ms) up to search-grounded model turns (tens of s)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+TOKEN_BUCKETS = (16, 64, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768, 65536)
+ITERATION_BUCKETS = (1, 2, 3, 4, 5, 8)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        with self._lock:
+            self._values[key] += amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, key)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram rendered in the Prometheus text exposition format."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # Per label set: [per-bucket counts..., sum]
+        self._series: Dict[LabelValues, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 1)
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0.0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    le = f'le="{_number(bound)}"'
+                    lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {_number(cumulative)}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(series[-1])}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {_number(cumulative)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List = []
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        metric = Histogram(*args, **kwargs)
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, *args, **kwargs) -> Counter:
+        metric = Counter(*args, **kwargs)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self._metrics for line in metric.render()) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+PIPELINE_SECONDS = REGISTRY.histogram(
+    "solar_pipeline_seconds", "Wall time of one full pipeline run.", ("outcome",)
+)
+AGENT_SECONDS = REGISTRY.histogram(
+    "solar_agent_run_seconds", "Wall time of one agent run, including its sub-agents.", ("agent",)
+)
+LLM_SECONDS = REGISTRY.histogram(
+    "solar_llm_call_seconds", "Wall time of one model call (built-in search grounding included).", ("agent", "model", "outcome")
+)
+LLM_TOKENS = REGISTRY.histogram(
+    "solar_llm_tokens", "Tokens per model call.", ("agent", "model", "kind"), buckets=TOKEN_BUCKETS
+)
+TOOL_SECONDS = REGISTRY.histogram(
+    "solar_tool_call_seconds", "Wall time of one function tool call.", ("tool", "outcome")
+)
+EXTERNAL_SECONDS = REGISTRY.histogram(
+    "solar_external_call_seconds", "Wall time of one outbound HTTP request made from code.", ("service", "outcome")
+)
+LOOP_ITERATIONS = REGISTRY.histogram(
+    "solar_loop_iterations", "Iterations per LoopAgent run.", ("agent",), buckets=ITERATION_BUCKETS
+)
+CACHE_LOOKUPS = REGISTRY.counter(
+    "solar_cache_lookups_total", "Cache lookups by outcome (hit, stale, miss, coalesced).", ("cache", "outcome")
+)
+
+
+class RunTimings:
+    """Per-request breakdown of where a pipeline run spent its time, returned with its result."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.agents: Dict[str, dict] = {}
+        self.llm: Dict[str, dict] = {}
+        self.tools: Dict[str, dict] = {}
+        self.external: Dict[str, dict] = {}
+        self.loops: Dict[str, List[int]] = defaultdict(list)
+        self.cache: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    @staticmethod
+    def _add(table: Dict[str, dict], name: str, seconds: float, **totals: float) -> None:
+        row = table.setdefault(name, {"calls": 0, "seconds": 0.0})
+        row["calls"] += 1
+        row["seconds"] += seconds
+        for key, value in totals.items():
+            row[key] = row.get(key, 0) + value
+
+    def as_dict(self) -> dict:
+        rounded = lambda table: {
+            name: {k: round(v, 4) if isinstance(v, float) else v for k, v in row.items()}
+            for name, row in table.items()
+        }
+        return {
+            "total_seconds": round(time.perf_counter() - self.started, 4),
+            "agents": rounded(self.agents),
+            "llm": rounded(self.llm),
+            "tools": rounded(self.tools),
+            "external": rounded(self.external),
+            "loop_iterations": dict(self.loops),
+            "cache": {name: dict(outcomes) for name, outcomes in self.cache.items()},
+        }
+
+
+# Set for the duration of one pipeline run; tasks it spawns (DAG branches, shared
+# Solar API lookups) inherit it, so their records land on the run that started them
+_current_run: contextvars.ContextVar[Optional[RunTimings]] = contextvars.ContextVar(
+    "metrics_current_run", default=None
+)
+
+
+def start_run() -> RunTimings:
+    run = RunTimings()
+    _current_run.set(run)
+    return run
+
+
+def current_run() -> Optional[RunTimings]:
+    return _current_run.get()
+
+
+def record_pipeline(seconds: float, outcome: str) -> None:
+    PIPELINE_SECONDS.observe(seconds, outcome=outcome)
+
+
+def record_agent(agent: str, seconds: float) -> None:
+    AGENT_SECONDS.observe(seconds, agent=agent)
+    run = current_run()
+    if run is not None:
+        run._add(run.agents, agent, seconds)
+
+
+def record_llm(
+    agent: str,
+    model: str,
+    seconds: float,
+    outcome: str = "ok",
+    prompt_tokens: Optional[int] = None,
+    response_tokens: Optional[int] = None,
+) -> None:
+    LLM_SECONDS.observe(seconds, agent=agent, model=model, outcome=outcome)
+    tokens = {}
+    if prompt_tokens is not None:
+        LLM_TOKENS.observe(prompt_tokens, agent=agent, model=model, kind="prompt")
+        tokens["prompt_tokens"] = prompt_tokens
+    if response_tokens is not None:
+        LLM_TOKENS.observe(response_tokens, agent=agent, model=model, kind="response")
+        tokens["response_tokens"] = response_tokens
+    run = current_run()
+    if run is not None:
+        run._add(run.llm, agent, seconds, **tokens)
+        run.llm[agent]["model"] = model
+
+
+def record_tool(tool: str, seconds: float, outcome: str = "ok") -> None:
+    TOOL_SECONDS.observe(seconds, tool=tool, outcome=outcome)
+    run = current_run()
+    if run is not None:
+        run._add(run.tools, tool, seconds)
+
+
+def record_external(service: str, seconds: float, outcome: str) -> None:
+    EXTERNAL_SECONDS.observe(seconds, service=service, outcome=outcome)
+    run = current_run()
+    if run is not None:
+        run._add(run.external, service, seconds)
+
+
+def record_loop(agent: str, iterations: int) -> None:
+    LOOP_ITERATIONS.observe(iterations, agent=agent)
+    run = current_run()
+    if run is not None:
+        run.loops[agent].append(iterations)
+
+
+def record_cache(cache: str, outcome: str) -> None:
+    CACHE_LOOKUPS.inc(cache=cache, outcome=outcome)
+    run = current_run()
+    if run is not None:
+        run.cache[cache][outcome] += 1
@@ -0,0 +1,240 @@
+import asyncio
+import contextvars
+import hmac
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SAMPLE_INTERVAL_MS = 5.0
+DEFAULT_BLOCKING_THRESHOLD_MS = 100.0
+DEFAULT_PROFILE_DIR = "profiles"
+TRUTHY = ("1", "true", "yes", "on")
+
+# The profile a task belongs to; tasks spawned by a profiled run inherit it
+_active_profile: contextvars.ContextVar[Optional["RequestProfiler"]] = contextvars.ContextVar(
+    "active_profile", default=None
+)
+
+
+def profiling_enabled() -> bool:
+    return os.getenv("PROFILING_ENABLED", "false").lower() in TRUTHY
+
+
+def profile_requested(flag: Optional[str]) -> bool:
+    """Whether a request's profile flag (header or query value) switches profiling on.
+
+    Needs PROFILING_ENABLED. When PROFILING_TOKEN is set the flag must equal it;
+    otherwise any truthy value ("1", "true", ...) is accepted.
+    """
+    if not flag or not profiling_enabled():
+        return False
+    token = os.getenv("PROFILING_TOKEN", "")
+    if token:
+        allowed = hmac.compare_digest(flag.encode(), token.encode())
+    else:
+        allowed = flag.lower() in TRUTHY
+    if not allowed:
+        logger.warning("Ignoring profile request with an invalid flag")
+    return allowed
+
+
+_labels: Dict[object, str] = {}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    label = _labels.get(code)
+    if label is None:
+        label = _labels[code] = _code_label(code)
+    return label
+
+
+def _code_label(code) -> str:
+    path = code.co_filename
+    for root in sys.path:
+        if root and path.startswith(root + os.sep):
+            path = path[len(root) + 1:]
+            break
+    # ';' separates frames in the folded format
+    return f"{code.co_qualname} ({path}:{code.co_firstlineno})".replace(";", ":")
+
+
+def _folded(frame) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class RequestProfiler:
+    """Samples the event-loop thread while one pipeline run is in flight.
+
+    A background thread wakes every `sample_interval_ms`, reads the loop thread's
+    stack and the task currently running on the loop, and keeps the stack when that
+    task belongs to this run (it, or a task it spawned, has this profiler in its
+    context), so concurrent requests do not show up. Stacks are written in the
+    folded format (`frame;frame;frame count`) read by flamegraph.pl, speedscope
+    and inferno.
+
+    The same thread pings the loop each tick; a ping answered more than
+    `blocking_threshold_ms` late marks an episode where one callback held the loop.
+    Each episode is reported with its lag, the task and the stack seen most while
+    it lasted, and whether that task belonged to this run.
+
+    Nothing of this exists unless a run is profiled: callers only create a
+    RequestProfiler when `profile_requested()` says so.
+    """
+
+    def __init__(
+        self,
+        run_id: str,
+        output_dir: Optional[str] = None,
+        sample_interval_ms: Optional[float] = None,
+        blocking_threshold_ms: Optional[float] = None,
+    ):
+        self.run_id = run_id
+        self.output_dir = output_dir or os.getenv("PROFILE_DIR", DEFAULT_PROFILE_DIR)
+        self.interval = float(
+            sample_interval_ms or os.getenv("PROFILE_SAMPLE_INTERVAL_MS", DEFAULT_SAMPLE_INTERVAL_MS)
+        ) / 1000.0
+        self.blocking_threshold = float(
+            blocking_threshold_ms or os.getenv("PROFILE_BLOCKING_THRESHOLD_MS", DEFAULT_BLOCKING_THRESHOLD_MS)
+        ) / 1000.0
+        self.stacks: Counter = Counter()
+        self.ticks = 0
+        self.blocking: List[dict] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._token = None
+        self._started = 0.0
+        self._report: Optional[dict] = None
+        # Outstanding loop ping: when it was sent and (task, stack) samples seen since
+        self._ping_sent: Optional[float] = None
+        self._ping_samples: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def start(self) -> "RequestProfiler":
+        """Start sampling; call from the run's own task, on the event loop."""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._token = _active_profile.set(self)
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._sample, name=f"profiler-{self.run_id}", daemon=True)
+        self._thread.start()
+        return self
+
+    def _owns(self, task: Optional[asyncio.Task]) -> bool:
+        # Task.get_context() is Python 3.12+; older runtimes record no samples
+        get_context = getattr(task, "get_context", None)
+        return get_context is not None and get_context().get(_active_profile) is self
+
+    def _pong(self, sent: float) -> None:
+        lag = time.perf_counter() - sent
+        with self._lock:
+            samples, self._ping_samples = self._ping_samples, Counter()
+            self._ping_sent = None
+        if lag < self.blocking_threshold or not samples:
+            return
+        (task_name, mine, stack), seen = samples.most_common(1)[0]
+        self.blocking.append({
+            "at_seconds": round(sent - self._started, 4),
+            "lag_ms": round(lag * 1000.0, 1),
+            "task": task_name,
+            "this_request": mine,
+            "share_of_samples": round(seen / sum(samples.values()), 2),
+            "stack": stack,
+        })
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._loop_thread_id)
+            try:
+                task = asyncio.current_task(self._loop)
+            except RuntimeError:
+                task = None
+            mine = self._owns(task)
+            stack = _folded(frame) if frame is not None and task is not None else None
+            self.ticks += 1
+            if mine and stack:
+                self.stacks[stack] += 1
+
+            now = time.perf_counter()
+            with self._lock:
+                if self._ping_sent is None:
+                    self._ping_sent = now
+                    send = True
+                else:
+                    send = False
+                    if stack:
+                        self._ping_samples[(task.get_name(), mine, stack)] += 1
+            if send:
+                try:
+                    self._loop.call_soon_threadsafe(self._pong, now)
+                except RuntimeError:
+                    return  # loop closed
+
+    def stop(self) -> dict:
+        """Stop sampling, write the profile files and return a summary (idempotent)."""
+        if self._report is not None:
+            return self._report
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._token is not None:
+            try:
+                _active_profile.reset(self._token)
+            except ValueError:
+                # Finalized from another context (e.g. client disconnect)
+                pass
+        wall = time.perf_counter() - self._started
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        folded_path = os.path.join(self.output_dir, f"{self.run_id}.folded")
+        report_path = os.path.join(self.output_dir, f"{self.run_id}.json")
+        with open(folded_path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        samples = sum(self.stacks.values())
+        self_time: Dict[str, int] = Counter()
+        for stack, count in self.stacks.items():
+            self_time[stack.rsplit(";", 1)[-1]] += count
+        report = {
+            "run_id": self.run_id,
+            "wall_seconds": round(wall, 4),
+            "sample_interval_ms": self.interval * 1000.0,
+            "ticks": self.ticks,
+            "samples": samples,
+            # Share of the run's wall time the loop thread spent in this request's code
+            "loop_busy_share": round(samples / self.ticks, 4) if self.ticks else 0.0,
+            "top_self": [
+                {"frame": frame, "samples": count, "share": round(count / samples, 4)}
+                for frame, count in self_time.most_common(25)
+            ] if samples else [],
+            "blocking_threshold_ms": self.blocking_threshold * 1000.0,
+            "blocking": sorted(self.blocking, key=lambda b: -b["lag_ms"]),
+            "folded_path": folded_path,
+        }
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        logger.info(
+            f"Profile {self.run_id}: {samples} samples, {len(self.blocking)} blocking episodes -> {folded_path}"
+        )
+        self._report = {
+            "run_id": self.run_id,
+            "samples": samples,
+            "blocking_episodes": len(self.blocking),
+            "folded_path": folded_path,
+            "report_path": report_path,
+        }
+        return self._report
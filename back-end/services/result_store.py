@@ -0,0 +1,149 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_PATH = ".cache/results.sqlite3"
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 50_000
+DEFAULT_MEMORY_ENTRIES = 1_000
+DEFAULT_TRIM_EVERY = 100
+
+
+class ResultStore:
+    """Resolved inputs of finished pipeline runs, keyed by result id, for what-if requests.
+
+    Rows live in SQLite and expire after `ttl_seconds`; beyond `max_entries` the least
+    recently read ones are evicted, checked every `trim_every` writes. The last `memory_entries` read or written are also
+    kept decoded in memory, so a user tweaking one input at a time never touches disk.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_STORE_PATH,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        memory_entries: int = DEFAULT_MEMORY_ENTRIES,
+        trim_every: int = DEFAULT_TRIM_EVERY,
+    ):
+        self.path = path
+        self.ttl_seconds = float(ttl_seconds)
+        self.max_entries = int(max_entries)
+        self.memory_entries = int(memory_entries)
+        self.trim_every = max(1, int(trim_every))
+        self._puts = 0
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " result_id TEXT PRIMARY KEY,"
+            " inputs TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_accessed_at ON results (accessed_at)")
+
+    @classmethod
+    def from_env(cls) -> "ResultStore":
+        return cls(
+            path=os.getenv("RESULT_STORE_PATH", DEFAULT_STORE_PATH),
+            ttl_seconds=float(os.getenv("RESULT_STORE_TTL_SECONDS", DEFAULT_TTL_SECONDS)),
+            max_entries=int(os.getenv("RESULT_STORE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+            memory_entries=int(os.getenv("RESULT_STORE_MEMORY_ENTRIES", DEFAULT_MEMORY_ENTRIES)),
+            trim_every=int(os.getenv("RESULT_STORE_TRIM_EVERY", DEFAULT_TRIM_EVERY)),
+        )
+
+    def _remember(self, result_id: str, inputs: dict, created_at: float) -> None:
+        self._memory[result_id] = (inputs, created_at)
+        self._memory.move_to_end(result_id)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, result_id: str) -> Optional[dict]:
+        now = time.time()
+        with self._lock:
+            cached = self._memory.get(result_id)
+            if cached is not None and cached[1] >= now - self.ttl_seconds:
+                self._memory.move_to_end(result_id)
+                self.memory_hits += 1
+                return cached[0]
+            row = self._conn.execute(
+                "SELECT inputs, created_at FROM results WHERE result_id = ? AND created_at >= ?",
+                (result_id, now - self.ttl_seconds),
+            ).fetchone()
+            if row is None:
+                self._memory.pop(result_id, None)
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE results SET accessed_at = ? WHERE result_id = ?", (now, result_id))
+            inputs = json.loads(row[0])
+            self._remember(result_id, inputs, row[1])
+            self.hits += 1
+        return inputs
+
+    def put(self, result_id: str, inputs: dict) -> None:
+        now = time.time()
+        payload = json.dumps(inputs, separators=(",", ":"), default=str)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (result_id, inputs, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (result_id, payload, now, now),
+            )
+            self._remember(result_id, inputs, now)
+            self._puts += 1
+            if self._puts % self.trim_every == 0:
+                self._trim_locked()
+
+    def _trim_locked(self) -> None:
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM results WHERE result_id IN ("
+                " SELECT result_id FROM results ORDER BY accessed_at ASC LIMIT ?)",
+                (overflow,),
+            )
+
+    def stats(self) -> dict:
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()
+            in_memory = len(self._memory)
+        lookups = self.hits + self.memory_hits + self.misses
+        return {
+            "entries": entries,
+            "in_memory": in_memory,
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.memory_hits) / lookups if lookups else 0.0,
+        }
+
+
+_store: Optional[ResultStore] = None
+_store_lock = threading.Lock()
+
+
+def get_result_store() -> Optional[ResultStore]:
+    """Shared process-wide store; disabled when RESULT_STORE_ENABLED is falsy."""
+    global _store
+    if os.getenv("RESULT_STORE_ENABLED", "true").lower() in ("0", "false", "no"):
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ResultStore.from_env()
+    return _store
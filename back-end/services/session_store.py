@@ -0,0 +1,332 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from google.adk.events import Event
+from google.adk.sessions import InMemorySessionService, Session
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+from typing_extensions import override
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 15 * 60
+DEFAULT_MAX_ENTRIES = 1_000
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_EVENTS = 50
+DEFAULT_STORE_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_STORE_MAX_ENTRIES = 10_000
+
+SessionKey = Tuple[str, str, str]
+
+
+def _nbytes(value: Any) -> int:
+    if isinstance(value, str):
+        return len(value)
+    try:
+        return len(json.dumps(value, ensure_ascii=False, default=str))
+    except (TypeError, ValueError):
+        return len(str(value))
+
+
+def _event_nbytes(event: Event) -> int:
+    """Approximate size of what an event adds besides its state delta (tracked per key)."""
+    size = 256
+    if event.content and event.content.parts:
+        for part in event.content.parts:
+            size += len(part.text or "")
+            if part.function_call is not None:
+                size += _nbytes(part.function_call.args)
+            if part.function_response is not None:
+                size += _nbytes(part.function_response.response)
+    return size
+
+
+class _Entry:
+    __slots__ = ("state_bytes", "event_bytes", "accessed_at")
+
+    def __init__(self, state: dict):
+        self.state_bytes: Dict[str, int] = {key: _nbytes(value) for key, value in state.items()}
+        self.event_bytes = 0
+        self.accessed_at = time.monotonic()
+
+    @property
+    def nbytes(self) -> int:
+        return sum(self.state_bytes.values()) + self.event_bytes
+
+
+class BoundedSessionService(InMemorySessionService):
+    """InMemorySessionService with TTL, max-entry and max-byte eviction.
+
+    Live sessions are evicted least recently used first once there are more than
+    `max_entries`, their estimated size exceeds `max_bytes`, or they have not been
+    touched for `ttl_seconds`. Sessions created with `in_flight=True` are never
+    evicted until `finish()`: their run still needs its events, and the final state
+    is read and persisted from them. They count towards the budget, so idle sessions
+    make room for them. The stored copy of a session keeps only its last
+    `max_events` events; a run works on its own copy (taken by the Runner at the
+    start of the invocation), so this never changes what the agents see.
+
+    `finish()` is called once a response has been sent: the session is dropped from
+    memory and, when `store_path` is set, its state (without `drop_keys`) is written
+    to SQLite, where `get_session` can still find it until `store_ttl_seconds`.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_events: int = DEFAULT_MAX_EVENTS,
+        store_path: Optional[str] = None,
+        store_ttl_seconds: float = DEFAULT_STORE_TTL_SECONDS,
+        store_max_entries: int = DEFAULT_STORE_MAX_ENTRIES,
+        drop_keys: Iterable[str] = (),
+    ):
+        super().__init__()
+        self.ttl_seconds = float(ttl_seconds)
+        self.max_entries = int(max_entries)
+        self.max_bytes = int(max_bytes)
+        self.max_events = int(max_events)
+        self.store_ttl_seconds = float(store_ttl_seconds)
+        self.store_max_entries = int(store_max_entries)
+        self.drop_keys = frozenset(drop_keys)
+        self.evicted = 0
+        self.expired = 0
+        self.finished = 0
+        self.compacted_events = 0
+        self._entries: "OrderedDict[SessionKey, _Entry]" = OrderedDict()
+        self._in_flight: set = set()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if store_path:
+            if store_path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(store_path)), exist_ok=True)
+            self._conn = sqlite3.connect(store_path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " app_name TEXT NOT NULL,"
+                " user_id TEXT NOT NULL,"
+                " session_id TEXT NOT NULL,"
+                " state TEXT NOT NULL,"
+                " event_count INTEGER NOT NULL,"
+                " last_update_time REAL NOT NULL,"
+                " PRIMARY KEY (app_name, user_id, session_id))"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS sessions_last_update_time ON sessions (last_update_time)"
+            )
+
+    @classmethod
+    def from_env(cls, drop_keys: Iterable[str] = ()) -> "BoundedSessionService":
+        return cls(
+            ttl_seconds=float(os.getenv("SESSION_TTL_SECONDS", DEFAULT_TTL_SECONDS)),
+            max_entries=int(os.getenv("SESSION_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+            max_bytes=int(os.getenv("SESSION_MAX_BYTES", DEFAULT_MAX_BYTES)),
+            max_events=int(os.getenv("SESSION_MAX_EVENTS", DEFAULT_MAX_EVENTS)),
+            store_path=os.getenv("SESSION_STORE_PATH") or None,
+            store_ttl_seconds=float(os.getenv("SESSION_STORE_TTL_SECONDS", DEFAULT_STORE_TTL_SECONDS)),
+            store_max_entries=int(os.getenv("SESSION_STORE_MAX_ENTRIES", DEFAULT_STORE_MAX_ENTRIES)),
+            drop_keys=drop_keys,
+        )
+
+    def _stored(self, key: SessionKey) -> Optional[Session]:
+        app_name, user_id, session_id = key
+        return self.sessions.get(app_name, {}).get(user_id, {}).get(session_id)
+
+    def _forget(self, key: SessionKey) -> None:
+        self._in_flight.discard(key)
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.nbytes
+        app_name, user_id, session_id = key
+        users = self.sessions.get(app_name, {})
+        users.get(user_id, {}).pop(session_id, None)
+        if user_id in users and not users[user_id]:
+            del users[user_id]
+
+    def _touch(self, key: SessionKey) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.accessed_at = time.monotonic()
+            self._entries.move_to_end(key)
+        return entry
+
+    def _evict(self, keep: Optional[SessionKey] = None) -> None:
+        cutoff = time.monotonic() - self.ttl_seconds
+        count, nbytes = len(self._entries), self._bytes
+        victims = []
+        for key, entry in self._entries.items():
+            if key == keep or key in self._in_flight:
+                continue
+            if entry.accessed_at < cutoff:
+                self.expired += 1
+            elif count > self.max_entries or nbytes > self.max_bytes:
+                self.evicted += 1
+            else:
+                break
+            victims.append((key, entry))
+            count -= 1
+            nbytes -= entry.nbytes
+        for key, entry in victims:
+            logger.info(f"Evicting session {key[2]} ({entry.nbytes} bytes)")
+            self._forget(key)
+
+    @override
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+        in_flight: bool = False,
+    ) -> Session:
+        """Create a session; with `in_flight` it is kept until `finish()` whatever the budget."""
+        session = await super().create_session(
+            app_name=app_name, user_id=user_id, state=state, session_id=session_id
+        )
+        key = (app_name, user_id, session.id)
+        entry = _Entry(session.state)
+        self._entries[key] = entry
+        if in_flight:
+            self._in_flight.add(key)
+        self._bytes += entry.nbytes
+        self._evict(keep=key)
+        return session
+
+    @override
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        self._evict()
+        key = (app_name, user_id, session_id)
+        if self._touch(key) is not None:
+            return await super().get_session(
+                app_name=app_name, user_id=user_id, session_id=session_id, config=config
+            )
+        return self._load(key)
+
+    @override
+    async def list_sessions(self, *, app_name: str, user_id: str) -> ListSessionsResponse:
+        self._evict()
+        return await super().list_sessions(app_name=app_name, user_id=user_id)
+
+    @override
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        key = (app_name, user_id, session_id)
+        self._forget(key)
+        if self._conn is not None:
+            with self._lock:
+                self._conn.execute(
+                    "DELETE FROM sessions WHERE app_name = ? AND user_id = ? AND session_id = ?", key
+                )
+
+    @override
+    async def append_event(self, session: Session, event: Event) -> Event:
+        event = await super().append_event(session=session, event=event)
+        if event.partial:
+            return event
+        key = (session.app_name, session.user_id, session.id)
+        entry = self._touch(key)
+        stored = self._stored(key)
+        if entry is None or stored is None:
+            return event
+        before = entry.nbytes
+        for state_key, value in (event.actions.state_delta or {}).items():
+            entry.state_bytes[state_key] = _nbytes(value)
+        entry.event_bytes += _event_nbytes(event)
+        # Keep the tail of the history; the state the dropped events wrote stays
+        overflow = len(stored.events) - self.max_events
+        if overflow > 0:
+            dropped = stored.events[:overflow]
+            del stored.events[:overflow]
+            entry.event_bytes -= sum(_event_nbytes(e) for e in dropped)
+            self.compacted_events += overflow
+        self._bytes += entry.nbytes - before
+        self._evict(keep=key)
+        return event
+
+    async def finish(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        """Release a session once its response is out, persisting a compacted copy if configured."""
+        key = (app_name, user_id, session_id)
+        stored = self._stored(key)
+        if stored is not None and self._conn is not None:
+            state = {k: v for k, v in stored.state.items() if k not in self.drop_keys}
+            try:
+                self._save(key, state, len(stored.events), stored.last_update_time)
+            except (sqlite3.Error, TypeError, ValueError) as e:
+                logger.warning(f"Could not persist session {session_id}: {e}")
+        self._forget(key)
+        self.finished += 1
+
+    def _save(self, key: SessionKey, state: dict, event_count: int, last_update_time: float) -> None:
+        payload = json.dumps(state, ensure_ascii=False, separators=(",", ":"), default=str)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions"
+                " (app_name, user_id, session_id, state, event_count, last_update_time)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (*key, payload, event_count, last_update_time),
+            )
+            self._conn.execute(
+                "DELETE FROM sessions WHERE last_update_time < ?",
+                (time.time() - self.store_ttl_seconds,),
+            )
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()
+            overflow = count - self.store_max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM sessions WHERE rowid IN ("
+                    " SELECT rowid FROM sessions ORDER BY last_update_time ASC LIMIT ?)",
+                    (overflow,),
+                )
+
+    def _load(self, key: SessionKey) -> Optional[Session]:
+        if self._conn is None:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state, last_update_time FROM sessions"
+                " WHERE app_name = ? AND user_id = ? AND session_id = ? AND last_update_time >= ?",
+                (*key, time.time() - self.store_ttl_seconds),
+            ).fetchone()
+        if row is None:
+            return None
+        app_name, user_id, session_id = key
+        return Session(
+            id=session_id,
+            app_name=app_name,
+            user_id=user_id,
+            state=json.loads(row[0]),
+            events=[],
+            last_update_time=row[1],
+        )
+
+    def stats(self) -> dict:
+        stored = None
+        if self._conn is not None:
+            with self._lock:
+                (stored,) = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()
+        return {
+            "live": len(self._entries),
+            "in_flight": len(self._in_flight),
+            "live_bytes": self._bytes,
+            "finished": self.finished,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "compacted_events": self.compacted_events,
+            "stored": stored,
+        }
@@ -0,0 +1,113 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key onto one in-flight task.
+
+    The first caller for a key starts the work as its own task; callers arriving
+    while it runs await the same result. The shared task is shielded, so one waiter
+    being cancelled (e.g. a client disconnect) does not cancel it for the others.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = 0
+        self.coalesced = 0
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+            self.started += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._inflight),
+            "started": self.started,
+            "coalesced": self.coalesced,
+        }
+
+
+class _Broadcast:
+    """Runs one async iterator as a task and lets any number of followers replay and tail it."""
+
+    def __init__(self, source: AsyncIterator[T]):
+        self.items: List[T] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self._changed = asyncio.Condition()
+        self.task = asyncio.ensure_future(self._pump(source))
+
+    async def _pump(self, source: AsyncIterator[T]) -> None:
+        try:
+            async for item in source:
+                async with self._changed:
+                    self.items.append(item)
+                    self._changed.notify_all()
+        except asyncio.CancelledError:
+            self.error = RuntimeError("shared stream was cancelled")
+            raise
+        except Exception as e:
+            self.error = e
+        finally:
+            async with self._changed:
+                self.done = True
+                self._changed.notify_all()
+
+    async def follow(self) -> AsyncIterator[T]:
+        seen = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: seen < len(self.items) or self.done)
+                batch = self.items[seen:]
+                finished = self.done
+            for item in batch:
+                yield item
+            seen += len(batch)
+            if finished and seen == len(self.items):
+                if self.error is not None:
+                    raise self.error
+                return
+
+
+class StreamFlight:
+    """SingleFlight for async generators.
+
+    The first subscriber for a key starts the generator as its own task; subscribers
+    arriving while it runs first get every item produced so far, then follow live.
+    Like SingleFlight, a subscriber going away does not stop the shared run.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = 0
+        self.coalesced = 0
+        self._inflight: Dict[Hashable, _Broadcast] = {}
+
+    async def subscribe(self, key: Hashable, fn: Callable[[], AsyncIterator[T]]) -> AsyncIterator[T]:
+        broadcast = self._inflight.get(key)
+        if broadcast is None:
+            broadcast = _Broadcast(fn())
+            self._inflight[key] = broadcast
+            broadcast.task.add_done_callback(lambda _: self._inflight.pop(key, None))
+            self.started += 1
+        else:
+            self.coalesced += 1
+        async for item in broadcast.follow():
+            yield item
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._inflight),
+            "started": self.started,
+            "coalesced": self.coalesced,
+        }
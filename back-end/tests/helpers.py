@@ -0,0 +1,46 @@
+import asyncio
+from typing import Optional, Tuple
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.adk.runners import Runner
+from google.adk.sessions import BaseSessionService, InMemorySessionService
+from google.genai import types
+
+APP_NAME = "tests"
+USER_ID = "user"
+
+
+class StateStep(BaseAgent):
+    """Sleeps for `delay` seconds, then writes `value` to each of its `state_outputs`."""
+
+    state_inputs: Optional[Tuple[str, ...]] = None
+    state_outputs: Tuple[str, ...] = ()
+    delay: float = 0.0
+    value: object = True
+
+    async def _run_async_impl(self, ctx: InvocationContext):
+        await asyncio.sleep(self.delay)
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=EventActions(state_delta={key: self.value for key in self.state_outputs}),
+        )
+
+
+async def run_agent(
+    agent: BaseAgent,
+    state: Optional[dict] = None,
+    session_service: Optional[BaseSessionService] = None,
+) -> dict:
+    """Run `agent` through a Runner on a new session and return the session's final state."""
+    session_service = session_service or InMemorySessionService()
+    runner = Runner(app_name=APP_NAME, agent=agent, session_service=session_service)
+    session = await session_service.create_session(app_name=APP_NAME, user_id=USER_ID, state=state or {})
+    message = types.Content(role="user", parts=[types.Part(text="run")])
+    async for _ in runner.run_async(user_id=USER_ID, session_id=session.id, new_message=message):
+        pass
+    session = await session_service.get_session(app_name=APP_NAME, user_id=USER_ID, session_id=session.id)
+    return session.state
@@ -0,0 +1,66 @@
+import time
+
+import pytest
+
+from agents.subagents.solar_context.coverage_index import CoverageIndex, haversine_km
+
+
+def _index(tmp_path, **kwargs) -> CoverageIndex:
+    return CoverageIndex(path=str(tmp_path / "coverage.sqlite3"), **kwargs)
+
+
+def test_haversine_km():
+    assert haversine_km(0.0, 0.0, 0.0, 1.0) == pytest.approx(111.19, abs=0.01)
+    assert haversine_km(37.0, -122.0, 37.0, -122.0) == 0.0
+
+
+def test_nearest_covered_point_within_the_radius(tmp_path):
+    index = _index(tmp_path, proxy_radius_km=25.0)
+    index.record_covered(37.80, -122.40)
+    index.record_covered(37.70, -122.40)
+
+    lat, lon, distance = index.nearest_covered(37.72, -122.40)
+
+    assert (lat, lon) == (37.70, -122.40)
+    assert distance == pytest.approx(haversine_km(37.72, -122.40, 37.70, -122.40))
+    assert index.nearest_covered(38.50, -122.40) is None
+    assert index.nearest_covered(37.72, -122.40, radius_km=1.0) is None
+
+
+def test_search_crosses_bucket_edges(tmp_path):
+    index = _index(tmp_path, bucket_degrees=0.1, proxy_radius_km=5.0)
+    # Either side of the 37.7 bucket boundary
+    index.record_covered(37.7001, -122.4)
+
+    assert index.nearest_covered(37.6999, -122.4) is not None
+
+
+def test_points_survive_a_restart(tmp_path):
+    index = _index(tmp_path)
+    index.record_covered(37.70, -122.40)
+    index.record_covered(37.70, -122.40)
+    index.record_uncovered(10.0, 10.0)
+
+    reloaded = _index(tmp_path)
+
+    assert reloaded.stats() == {"covered_points": 1, "uncovered_points": 1}
+    assert reloaded.nearest_covered(37.70, -122.40)[2] == 0.0
+    assert reloaded.is_known_uncovered(10.0, 10.0)
+
+
+def test_uncovered_points_match_only_close_by(tmp_path):
+    index = _index(tmp_path, uncovered_match_km=0.05)
+    index.record_uncovered(10.0, 10.0)
+
+    assert index.is_known_uncovered(10.0002, 10.0)
+    assert not index.is_known_uncovered(10.01, 10.0)
+
+
+def test_uncovered_points_expire(tmp_path):
+    index = _index(tmp_path, uncovered_ttl_seconds=0.01)
+    index.record_uncovered(10.0, 10.0)
+    time.sleep(0.02)
+
+    assert not index.is_known_uncovered(10.0, 10.0)
+    # Expired rows are dropped when the index is loaded again
+    assert _index(tmp_path, uncovered_ttl_seconds=0.01).stats()["uncovered_points"] == 0
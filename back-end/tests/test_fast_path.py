@@ -0,0 +1,75 @@
+import asyncio
+import json
+
+import pytest
+
+from agents.fast_path import CodeSetterAgent, fast_path_report, parse_json_output
+from helpers import StateStep, run_agent
+
+
+def _setter(name: str, compute) -> CodeSetterAgent:
+    return CodeSetterAgent(
+        name=name,
+        compute=compute,
+        fallback=StateStep(name=f"{name}_llm", state_outputs=("energy_kWh",), value="from llm"),
+    )
+
+
+def test_parse_json_output_strips_code_fences():
+    assert parse_json_output('```json\n{"energy_kWh": 500}\n```') == {"energy_kWh": 500}
+    assert parse_json_output('{"a": 1}') == {"a": 1}
+    assert parse_json_output({"a": 1}) == {"a": 1}
+    with pytest.raises(ValueError):
+        parse_json_output("not json")
+
+
+def test_code_path_skips_the_llm_fallback():
+    agent = _setter("energy_code", lambda state: {"energy_kWh": state["raw"] * 2})
+    state = asyncio.run(run_agent(agent, state={"raw": 250}))
+
+    assert state["energy_kWh"] == 500
+    assert fast_path_report(state) == {"energy_code": "code"}
+
+
+def test_async_compute_is_awaited():
+    async def compute(state):
+        await asyncio.sleep(0)
+        return {"energy_kWh": 1}
+
+    state = asyncio.run(run_agent(_setter("energy_async", compute), state={}))
+
+    assert state["energy_kWh"] == 1
+    assert fast_path_report(state) == {"energy_async": "code"}
+
+
+def test_failed_compute_falls_back_to_the_llm_agent():
+    agent = _setter("energy_fallback", lambda state: {"energy_kWh": float(state["missing"])})
+    state = asyncio.run(run_agent(agent, state={}))
+
+    assert state["energy_kWh"] == "from llm"
+    assert fast_path_report(state) == {"energy_fallback": "llm"}
+
+
+def test_disabled_fast_path_always_runs_the_fallback(monkeypatch):
+    monkeypatch.setenv("AGENT_FAST_PATH", "false")
+    agent = _setter("energy_disabled", lambda state: {"energy_kWh": 1})
+    state = asyncio.run(run_agent(agent, state={}))
+
+    assert state["energy_kWh"] == "from llm"
+    assert fast_path_report(state) == {"energy_disabled": "llm"}
+
+
+def test_usd_rates_setter_accepts_an_open_ended_top_tier():
+    from agents.subagents.financial_context.electricity_rate.agent import usd_electricity_rates_setter
+
+    rates = {
+        "plan_type": "tiered",
+        "tiers": [
+            {"start_kWh": 0, "end_kWh": 300, "price_per_kWh": 0.28, "price_per_kWh_usd": 0.28},
+            {"start_kWh": 300, "end_kWh": None, "price_per_kWh": 0.36, "price_per_kWh_usd": 0.36},
+        ],
+    }
+    state = asyncio.run(run_agent(usd_electricity_rates_setter.clone(), state={"usd_electricity_rates": json.dumps(rates)}))
+
+    assert state["fast_path:usd_electricity_rates_setter"] == "code"
+    assert state["usd_electricity_rates"]["tiers"][1] == {"start_kWh": 300.0, "price_per_kWh": 0.36, "price_per_kWh_usd": 0.36}
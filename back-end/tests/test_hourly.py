@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+
+from agents.subagents.solar_calculator.calculator import calculate_monthly_bill_with_solar
+from agents.subagents.solar_calculator.hourly import (
+    HOURS_PER_YEAR,
+    MONTH_START_HOURS,
+    generation_shape,
+    hourly_bill_analysis,
+    hourly_prices,
+    load_shape,
+    needs_hourly_pricing,
+    simulate_hourly_bills,
+)
+
+MONTHLY_KWH = 500.0
+LATITUDE = 37.7
+# Small enough that no month exports, so monthly and annual netting agree
+YEARLY_DC_KWH = np.array([600.0, 1_200.0, 2_400.0])
+FLAT = {"plan_type": "flat", "price_per_kWh_usd": 0.2}
+
+
+def _simulate(plan, **kwargs):
+    return simulate_hourly_bills(plan, monthly_kwh=MONTHLY_KWH, yearly_dc_kwh=YEARLY_DC_KWH, latitude=LATITUDE, **kwargs)
+
+
+def test_shapes_cover_the_year_and_sum_to_one():
+    assert load_shape().shape == (HOURS_PER_YEAR,)
+    assert load_shape().sum() == pytest.approx(1.0)
+    assert generation_shape(LATITUDE).sum() == pytest.approx(1.0)
+    # Nothing is generated at solar midnight
+    assert generation_shape(LATITUDE)[0] == 0.0
+
+
+def test_flat_plan_matches_the_blended_calculator():
+    configs = [{"panelsCount": i + 1, "yearlyEnergyDcKwh": y} for i, y in enumerate(YEARLY_DC_KWH)]
+    blended = calculate_monthly_bill_with_solar(
+        {"solarPanelConfigs": configs}, monthly_bill_usd=100.0, monthly_kwh_energy_consumption=MONTHLY_KWH
+    )
+
+    sim = _simulate(FLAT)
+
+    assert sim["baseline_monthly_bill_usd"].mean() == pytest.approx(100.0)
+    assert sim["average_monthly_bill_usd"] == pytest.approx([c["monthlyBillWithSolarUsd"] for c in blended["per_config"]])
+
+
+def test_tou_plan_with_equal_prices_matches_flat():
+    tou = {
+        "plan_type": "tou",
+        "tou_periods": [
+            {"name": "peak", "start_hour": 16, "end_hour": 21, "price_per_kWh_usd": 0.2},
+            {"name": "off-peak", "start_hour": 21, "end_hour": 16, "price_per_kWh_usd": 0.2},
+        ],
+    }
+
+    assert needs_hourly_pricing(tou)
+    assert _simulate(tou)["monthly_bill_usd"] == pytest.approx(_simulate(FLAT)["monthly_bill_usd"])
+
+
+def test_evening_peak_prices_make_solar_save_less_than_flat():
+    tou = {
+        "plan_type": "tou",
+        "tou_periods": [
+            {"name": "peak", "start_hour": 16, "end_hour": 21, "price_per_kWh_usd": 0.5},
+            {"name": "off-peak", "start_hour": 21, "end_hour": 16, "price_per_kWh_usd": 0.1},
+        ],
+    }
+    flat_price = (5 * 0.5 + 19 * 0.1) / 24
+    tou_sim = _simulate(tou)
+    flat_sim = _simulate({"plan_type": "flat", "price_per_kWh_usd": flat_price})
+
+    tou_savings = tou_sim["baseline_monthly_bill_usd"].mean() - tou_sim["average_monthly_bill_usd"]
+    flat_savings = flat_sim["baseline_monthly_bill_usd"].mean() - flat_sim["average_monthly_bill_usd"]
+    # Midday production offsets off-peak hours only
+    assert np.all(tou_savings < flat_savings)
+
+
+def test_hourly_prices_wrap_past_midnight():
+    prices = hourly_prices({
+        "plan_type": "tou",
+        "price_per_kWh_usd": 0.15,
+        "tou_periods": [{"name": "night", "start_hour": 22, "end_hour": 6, "price_per_kWh_usd": 0.05}],
+    })
+
+    assert prices[[22, 23, 0, 5]].tolist() == [0.05] * 4
+    assert prices[[6, 12, 21]].tolist() == [0.15] * 3
+    assert hourly_prices({"plan_type": "tou", "tou_periods": [{"price_per_kWh_usd": 0.1}]}) is None
+    assert not needs_hourly_pricing(FLAT)
+
+
+def test_demand_charges_bill_the_monthly_peak_import():
+    plan = {**FLAT, "demand_charges": [{"name": "peak", "price_per_kW_usd": 10.0}]}
+
+    sim = _simulate(plan)
+
+    assert needs_hourly_pricing(plan)
+    assert sim["demand_charge_usd"].shape == (len(YEARLY_DC_KWH), 12)
+    assert sim["monthly_bill_usd"] == pytest.approx(_simulate(FLAT)["monthly_bill_usd"] + sim["demand_charge_usd"])
+    baseline_peak_kw = np.maximum.reduceat(load_shape() * MONTHLY_KWH * 12, MONTH_START_HOURS)
+    assert sim["baseline_monthly_bill_usd"] - _simulate(FLAT)["baseline_monthly_bill_usd"] == pytest.approx(
+        baseline_peak_kw * 10.0
+    )
+    # Solar can only lower the peak import
+    assert np.all(sim["demand_charge_usd"] <= baseline_peak_kw * 10.0 + 1e-9)
+
+
+def test_hourly_bill_analysis_reports_every_config():
+    potential = {"solarPanelConfigs": [{"panelsCount": 4, "yearlyEnergyDcKwh": 1_200.0},
+                                       {"panelsCount": 8, "yearlyEnergyDcKwh": 2_400.0}]}
+
+    result = hourly_bill_analysis(potential, FLAT, monthly_kwh=MONTHLY_KWH, latitude=LATITUDE)
+
+    assert [c["panelsCount"] for c in result["per_config"]] == [4, 8]
+    assert result["recommended"]["panelsCount"] == 8
+    assert result["monthly_bill_baseline_usd"] == pytest.approx(100.0)
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from agents.subagents.solar_calculator.calculator import calculate_monthly_bill_with_solar
+from agents.subagents.solar_calculator.panel_yield import PanelYieldCurve, panel_yields_from_insights
+
+# Unsorted on purpose: the curve adds the best panels first
+YIELDS = [200.0, 400.0, 100.0, 300.0]
+# $10 for 50 kWh: $0.20/kWh, 600 kWh a year, covered between the second and third panel
+BILL = {"monthly_bill_usd": 10.0, "monthly_kwh_energy_consumption": 50.0}
+
+
+def test_yearly_dc_kwh_sums_the_best_panels():
+    curve = PanelYieldCurve(YIELDS)
+
+    assert curve.max_panels == 4
+    assert [curve.yearly_dc_kwh(n) for n in range(5)] == [0.0, 400.0, 700.0, 900.0, 1000.0]
+    # Out-of-range counts are clamped to the roof
+    assert curve.yearly_dc_kwh(-1) == 0.0
+    assert curve.yearly_dc_kwh(10) == 1000.0
+
+
+def test_max_panels_keeps_only_the_best_panels():
+    curve = PanelYieldCurve(YIELDS, max_panels=2)
+
+    assert curve.max_panels == 2
+    assert curve.yearly_dc_kwh(4) == 700.0
+
+
+def test_from_building_insights_reads_raw_and_slim_insights():
+    raw = {
+        "solarPotential": {
+            "maxArrayPanelsCount": 3,
+            "solarPanels": [{"yearlyEnergyDcKwh": y} for y in YIELDS] + [{"yearlyEnergyDcKwh": None}],
+        }
+    }
+
+    assert panel_yields_from_insights({"panelYieldsDcKwh": YIELDS}).tolist() == YIELDS
+    assert PanelYieldCurve.from_building_insights(raw).yearly_dc_kwh(3) == 900.0
+    assert PanelYieldCurve.from_building_insights({"solarPotential": {}}) is None
+
+
+def test_evaluate_matches_calculate_monthly_bill_with_solar():
+    curve = PanelYieldCurve(YIELDS)
+    configs = [{"panelsCount": n, "yearlyEnergyDcKwh": curve.yearly_dc_kwh(n)} for n in range(1, 5)]
+    bill = {"monthly_bill_usd": 100.0, "monthly_kwh_energy_consumption": 500.0}
+
+    expected = calculate_monthly_bill_with_solar({"solarPanelConfigs": configs}, **bill)["per_config"]
+
+    for record in expected:
+        actual = curve.evaluate(record["panelsCount"], **bill)
+        for field in ("panelsCount", "yearlyEnergyDcKwh", "initialAcKwhPerYear", "monthlyBillWithSolarUsd"):
+            assert actual[field] == pytest.approx(record[field])
+        assert actual["monthlySavingsUsd"] == pytest.approx(100.0 - record["monthlyBillWithSolarUsd"])
+
+
+def test_monthly_bills_cover_every_panel_count():
+    bills = PanelYieldCurve(YIELDS).monthly_bills(**BILL)
+
+    # AC per year: 0, 340, 595, 765, 850 against 600 kWh of usage
+    assert bills == pytest.approx(np.array([600.0, 260.0, 5.0, 0.0, 0.0]) * 0.2 / 12.0)
+
+
+def test_optimize_on_a_hand_computed_curve():
+    curve = PanelYieldCurve(YIELDS)
+
+    # Annual savings: 0, 68, 119, 120, 120; marginal payback at $300 a panel: 4.4, 5.9, 300 years, never
+    result = curve.optimize(**BILL, cost_per_panel_usd=300.0, lifetime_years=25, max_payback_years=5)
+
+    # Net value over 25 years: 0, 1400, 2375, 2100, 1800
+    assert result["optimal"]["panelsCount"] == 2
+    assert result["optimal"]["lifetimeNetSavingsUsd"] == pytest.approx(2375.0)
+    assert result["optimal"]["simplePaybackYears"] == pytest.approx(600.0 / 119.0)
+    assert result["marginal_payback"]["panelsCount"] == 1
+    assert result["marginal_payback"]["installedCostUsd"] == 300.0
+    assert result["max_panels"] == 4
+
+    relaxed = curve.optimize(**BILL, cost_per_panel_usd=300.0, max_payback_years=10)
+    assert relaxed["marginal_payback"]["panelsCount"] == 2
+
+
+def test_optimize_without_savings_keeps_zero_panels():
+    result = PanelYieldCurve(YIELDS).optimize(**BILL, cost_per_panel_usd=1e6)
+
+    assert result["optimal"]["panelsCount"] == 0
+    assert result["optimal"]["simplePaybackYears"] is None
+    assert result["marginal_payback"]["panelsCount"] == 0
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from agents.subagents.solar_calculator.projection import project_cash_flows, scenario_grid, summary_table
+
+# $100 for 500 kWh: $0.20/kWh; 750 kWh DC is 637.5 kWh AC, so $127.50 saved a year
+USAGE = {"monthly_bill_usd": 100.0, "monthly_kwh_energy_consumption": 500.0}
+NO_RATES = scenario_grid((0.0,), (0.0,), (0.0,))
+
+
+def test_scenario_grid_is_the_cartesian_product():
+    grid = scenario_grid((0.0, 0.01), (0.02,), (0.03, 0.05, 0.07))
+
+    assert grid["degradation_rate"].shape == (6,)
+    assert set(zip(grid["degradation_rate"], grid["discount_rate"])) == {
+        (d, r) for d in (0.0, 0.01) for r in (0.03, 0.05, 0.07)
+    }
+
+
+def test_payback_is_interpolated_within_the_year():
+    result = project_cash_flows([750.0], system_cost_usd=600.0, scenarios=NO_RATES, years=10, **USAGE)
+
+    assert result["annual_savings_usd"][0, :, 0] == pytest.approx([127.5] * 10)
+    assert result["payback_years"][0, 0] == pytest.approx(600.0 / 127.5)  # 4.705
+
+
+def test_payback_is_nan_when_never_reached():
+    result = project_cash_flows([750.0], system_cost_usd=10_000.0, scenarios=NO_RATES, years=10, **USAGE)
+
+    assert np.isnan(result["payback_years"][0, 0])
+    assert summary_table(result)[0]["payback_years"] is None
+
+
+def test_npv_without_rates_is_the_undiscounted_sum_minus_cost():
+    result = project_cash_flows([750.0, 1_500.0], system_cost_usd=[600.0, 1_100.0], scenarios=NO_RATES, years=25, **USAGE)
+
+    assert result["lifetime_savings_usd"][:, 0] == pytest.approx([127.5 * 25, 255.0 * 25])
+    assert result["npv_usd"][:, 0] == pytest.approx(result["lifetime_savings_usd"][:, 0] - [600.0, 1_100.0])
+    assert result["cumulative_cash_flow_usd"][:, -1, 0] == pytest.approx(result["npv_usd"][:, 0])
+
+
+def test_rates_degrade_escalate_and_discount_savings():
+    scenarios = scenario_grid((0.01,), (0.03,), (0.05,))
+
+    result = project_cash_flows([750.0], system_cost_usd=600.0, scenarios=scenarios, years=3, **USAGE)
+
+    year = np.arange(3)
+    expected = 127.5 * 0.99 ** year * 1.03 ** year
+    assert result["annual_savings_usd"][0, :, 0] == pytest.approx(expected)
+    assert result["npv_usd"][0, 0] == pytest.approx((expected / 1.05 ** (year + 1)).sum() - 600.0)
+
+
+def test_arrays_cover_every_config_year_and_scenario():
+    scenarios = scenario_grid((0.0, 0.005), (0.0, 0.025), (0.05,))
+
+    result = project_cash_flows([500.0, 750.0, 1_000.0], system_cost_usd=600.0, scenarios=scenarios, years=20, **USAGE)
+
+    assert result["annual_savings_usd"].shape == (3, 20, 4)
+    assert result["npv_usd"].shape == (3, 4)
+    assert len(summary_table(result, panels_count=[4, 6, 8])) == 12
+
+
+def test_flat_plan_prices_like_the_blended_rate():
+    plan = {"plan_type": "flat", "price_per_kWh_usd": 0.2}
+
+    with_plan = project_cash_flows([750.0], system_cost_usd=600.0, plan=plan, scenarios=NO_RATES, years=10,
+                                   monthly_kwh_energy_consumption=500.0)
+    blended = project_cash_flows([750.0], system_cost_usd=600.0, scenarios=NO_RATES, years=10, **USAGE)
+
+    assert with_plan["npv_usd"] == pytest.approx(blended["npv_usd"])
+    assert with_plan["payback_years"] == pytest.approx(blended["payback_years"])
+
+
+def test_tiered_plan_saves_at_the_marginal_tier_price():
+    plan = {
+        "plan_type": "tiered",
+        "tiers": [
+            {"start_kWh": 0, "end_kWh": 400, "price_per_kWh_usd": 0.10},
+            {"start_kWh": 400, "price_per_kWh_usd": 0.30},
+        ],
+    }
+
+    # 10 kWh a month of production, all taken off the top tier
+    result = project_cash_flows([120.0 / 0.85], system_cost_usd=0.0, plan=plan, scenarios=NO_RATES, years=1,
+                                monthly_kwh_energy_consumption=500.0)
+
+    assert result["annual_savings_usd"][0, 0, 0] == pytest.approx(10 * 0.30 * 12)
@@ -0,0 +1,84 @@
+import time
+
+from agents.subagents.regional_context.cache import RegionalContextCache, geohash_encode
+
+SF = {
+    "city": "San Francisco",
+    "county_or_province": "San Francisco County",
+    "state_or_region": "CA",
+    "country_code": "US",
+    "currency_code": "USD",
+    "building_type": "house",
+    "neighborhood": "Mission",
+    "regional_level_1": "CA",
+    "regional_level_2": "San Francisco County",
+}
+
+
+def _cache(tmp_path, **kwargs) -> RegionalContextCache:
+    return RegionalContextCache(path=str(tmp_path / "regional.sqlite3"), **kwargs)
+
+
+def test_geohash_encode():
+    assert geohash_encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    assert geohash_encode(37.77, -122.42) == "9q8yy7b6p"
+
+
+def test_same_address_keeps_every_field(tmp_path):
+    cache = _cache(tmp_path)
+    cache.put(37.77, -122.42, SF)
+
+    # Shares 8 geohash characters, i.e. well within the ~150 m address cell
+    assert _cache(tmp_path).get(37.7701, -122.4201) == SF
+
+
+def test_same_cell_reuses_only_region_fields(tmp_path):
+    cache = _cache(tmp_path)
+    cache.put(37.77, -122.42, SF)
+
+    found = cache.get(37.771, -122.421)
+
+    assert found["city"] == "San Francisco" and found["currency_code"] == "USD"
+    assert all(found[field] is None for field in ("building_type", "neighborhood", "regional_level_1"))
+    assert cache.stats()["hits"] == 1
+
+
+def test_enclosing_cell_answers_when_its_points_agree(tmp_path):
+    cache = _cache(tmp_path, precision=5)
+    # 9q8yy and 9q8yv, queried from the empty 9q8yx cell
+    cache.put(37.77, -122.42, SF)
+    cache.put(37.75, -122.45, {**SF, "neighborhood": "Sunset"})
+
+    found = cache.get(37.73, -122.38)
+
+    assert found["state_or_region"] == "CA" and found["neighborhood"] is None
+    assert cache.stats()["prefix_hits"] == 1
+
+
+def test_enclosing_cell_needs_agreeing_points(tmp_path):
+    cache = _cache(tmp_path, precision=5)
+    cache.put(37.77, -122.42, SF)
+
+    assert cache.get(37.73, -122.38) is None  # a single point is not enough
+    cache.put(37.75, -122.45, {**SF, "city": "Daly City"})
+    assert cache.get(37.73, -122.38) is None
+    assert cache.stats()["misses"] == 2
+
+
+def test_entries_expire_after_ttl(tmp_path):
+    cache = _cache(tmp_path, ttl_seconds=0.01)
+    cache.put(37.77, -122.42, SF)
+    time.sleep(0.02)
+
+    assert cache.get(37.77, -122.42) is None
+
+
+def test_oldest_entries_are_evicted_past_max_entries(tmp_path):
+    cache = _cache(tmp_path, max_entries=2)
+    for lat in (10.0, 20.0, 30.0):
+        cache.put(lat, 10.0, SF)
+        time.sleep(0.001)
+
+    assert cache.stats()["entries"] == 2
+    assert cache.get(10.0, 10.0) is None
+    assert cache.get(30.0, 10.0) is not None
@@ -0,0 +1,58 @@
+import time
+
+from services.result_store import ResultStore
+
+
+def test_put_and_get_round_trip_through_sqlite(tmp_path):
+    path = str(tmp_path / "results.sqlite3")
+    ResultStore(path=path).put("r1", {"energy_kWh": 500})
+
+    store = ResultStore(path=path)
+
+    assert store.get("r1") == {"energy_kWh": 500}
+    assert store.get("r1") == {"energy_kWh": 500}
+    assert store.get("missing") is None
+    assert store.stats()["hits"] == 1 and store.stats()["memory_hits"] == 1 and store.stats()["misses"] == 1
+
+
+def test_entries_expire_after_ttl(tmp_path):
+    store = ResultStore(path=str(tmp_path / "results.sqlite3"), ttl_seconds=0.01, memory_entries=0)
+    store.put("r1", {"a": 1})
+    time.sleep(0.02)
+
+    assert store.get("r1") is None
+
+
+def test_memory_copy_expires_with_the_row(tmp_path):
+    store = ResultStore(path=str(tmp_path / "results.sqlite3"), ttl_seconds=0.01)
+    store.put("r1", {"a": 1})
+    time.sleep(0.02)
+
+    assert store.get("r1") is None
+    assert store.stats()["in_memory"] == 0
+
+
+def test_least_recently_read_entries_are_evicted_past_max_entries(tmp_path):
+    store = ResultStore(path=str(tmp_path / "results.sqlite3"), max_entries=2, memory_entries=0, trim_every=1)
+    store.put("a", {"n": 1})
+    time.sleep(0.001)
+    store.put("b", {"n": 2})
+    time.sleep(0.001)
+    store.get("a")  # b is now the least recently read
+    time.sleep(0.001)
+    store.put("c", {"n": 3})
+
+    assert store.stats()["entries"] == 2
+    assert store.get("b") is None
+    assert store.get("a") == {"n": 1} and store.get("c") == {"n": 3}
+
+
+def test_max_entries_is_enforced_every_trim_every_writes(tmp_path):
+    store = ResultStore(path=str(tmp_path / "results.sqlite3"), max_entries=2, trim_every=3)
+    for i in range(5):
+        store.put(str(i), {"n": i})
+
+    # Trimmed at the third write, not yet at the fifth
+    assert store.stats()["entries"] == 4
+    store.put("5", {"n": 5})
+    assert store.stats()["entries"] == 2
@@ -0,0 +1,122 @@
+import asyncio
+
+from google.adk.events import Event, EventActions
+
+from agents.scheduler import CRITICAL_PATH_STATE_KEY, DagAgent, wait_for_state
+from helpers import StateStep, run_agent
+
+
+class WaitingStep(StateStep):
+    """Waits for `wait_keys` mid-run, then records what it saw before writing its outputs."""
+
+    wait_keys: tuple = ()
+
+    async def _run_async_impl(self, ctx):
+        await wait_for_state(*self.wait_keys)
+        seen = {key: ctx.session.state.get(key) for key in self.wait_keys}
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=EventActions(state_delta={f"{self.name}_saw": seen, **{k: True for k in self.state_outputs}}),
+        )
+
+
+def _run(dag: DagAgent, timeout: float = 5.0) -> dict:
+    return asyncio.run(asyncio.wait_for(run_agent(dag), timeout))
+
+
+def test_dependencies_are_read_from_declared_inputs_and_outputs():
+    dag = DagAgent(
+        name="dag",
+        sub_agents=[
+            StateStep(name="a", state_outputs=("a",)),
+            StateStep(name="b", state_inputs=("a",), state_outputs=("b",)),
+            StateStep(name="c", state_outputs=("c",)),
+            StateStep(name="d", state_inputs=("b", "c"), state_outputs=("d",)),
+        ],
+    )
+    assert dag.dependencies_of("a") == set()
+    assert dag.dependencies_of("b") == {"a"}
+    assert dag.dependencies_of("d") == {"b", "c"}
+    assert dag.ancestors_of("d") == {"a", "b", "c"}
+
+
+def test_nodes_start_when_their_producers_finish():
+    dag = DagAgent(
+        name="dag",
+        sub_agents=[
+            StateStep(name="a", state_outputs=("a",), delay=0.05),
+            StateStep(name="b", state_inputs=("a",), state_outputs=("b",), delay=0.05),
+            StateStep(name="c", state_outputs=("c",), delay=0.02),
+            StateStep(name="d", state_inputs=("b", "c"), state_outputs=("d",)),
+        ],
+    )
+    state = _run(dag)
+    nodes = state[CRITICAL_PATH_STATE_KEY]["nodes"]
+
+    assert state["d"] is True
+    assert nodes["b"]["start"] >= nodes["a"]["end"]
+    assert nodes["d"]["start"] >= max(nodes["b"]["end"], nodes["c"]["end"])
+    # Independent branch overlaps instead of queueing behind a
+    assert nodes["c"]["start"] < nodes["a"]["end"]
+    assert state[CRITICAL_PATH_STATE_KEY]["critical_path"] == ["a", "b", "d"]
+
+
+def test_dependency_cycle_falls_back_to_declaration_order():
+    dag = DagAgent(
+        name="dag",
+        sub_agents=[
+            StateStep(name="x", state_inputs=("y",), state_outputs=("x",)),
+            StateStep(name="y", state_inputs=("x",), state_outputs=("y",)),
+        ],
+    )
+    state = _run(dag)
+    nodes = state[CRITICAL_PATH_STATE_KEY]["nodes"]
+
+    assert state["x"] is True and state["y"] is True
+    assert nodes["y"]["start"] >= nodes["x"]["end"]
+
+
+def test_wait_for_state_waits_for_an_independent_producer():
+    dag = DagAgent(
+        name="dag",
+        sub_agents=[
+            WaitingStep(name="waiter", wait_keys=("slow",), state_outputs=("waiter",)),
+            StateStep(name="producer", state_outputs=("slow",), delay=0.05, value="ready"),
+        ],
+    )
+    state = _run(dag)
+    nodes = state[CRITICAL_PATH_STATE_KEY]["nodes"]
+
+    assert state["waiter_saw"] == {"slow": "ready"}
+    assert nodes["waiter"]["end"] >= nodes["producer"]["end"]
+
+
+def test_wait_for_state_on_own_output_does_not_deadlock():
+    dag = DagAgent(
+        name="dag",
+        sub_agents=[WaitingStep(name="self_waiter", wait_keys=("self_waiter",), state_outputs=("self_waiter",))],
+    )
+    state = _run(dag)
+
+    assert state["self_waiter"] is True
+
+
+def test_wait_for_state_on_a_dependent_node_does_not_deadlock():
+    # "after" only starts once "before" is done, so "before" must not wait for it
+    dag = DagAgent(
+        name="dag",
+        sub_agents=[
+            WaitingStep(name="before", wait_keys=("after",), state_outputs=("before",)),
+            StateStep(name="after", state_inputs=("before",), state_outputs=("after",)),
+        ],
+    )
+    state = _run(dag)
+
+    assert state["before_saw"] == {"after": None}
+    assert state["after"] is True
+
+
+def test_wait_for_state_outside_a_dag_returns_immediately():
+    asyncio.run(asyncio.wait_for(wait_for_state("anything"), 1.0))
@@ -0,0 +1,214 @@
+import asyncio
+
+import pytest
+from google.adk.sessions import InMemorySessionService
+
+from agents.fast_path import CachedLookupAgent, fast_path_report, lookup_stats
+from helpers import StateStep, run_agent
+from services.single_flight import SingleFlight, StreamFlight
+
+
+class CountingSearch(StateStep):
+    """Stands in for an LLM search chain: slow, and counts how often it runs."""
+
+    runs: int = 0
+
+    async def _run_async_impl(self, ctx):
+        self.runs += 1
+        async for event in super()._run_async_impl(ctx):
+            yield event
+
+
+def _cached_tariff_agent(name: str, table: dict) -> CachedLookupAgent:
+    def lookup(state):
+        if state["region"] in table:
+            return {"usd_electricity_rates": table[state["region"]]}
+        return None
+
+    def store(state):
+        table[state["region"]] = state["usd_electricity_rates"]
+
+    return CachedLookupAgent(
+        name=name,
+        lookup=lookup,
+        fallback=CountingSearch(
+            name=f"{name}_search", state_outputs=("usd_electricity_rates",), delay=0.05, value={"price": 0.3}
+        ),
+        store=store,
+        key=lambda state: state["region"],
+    )
+
+
+def test_concurrent_identical_misses_run_one_fallback():
+    table = {}
+    agent = _cached_tariff_agent("tariff_coalesce", table)
+    sessions = InMemorySessionService()
+
+    async def main():
+        return await asyncio.gather(*(run_agent(agent, {"region": "ca"}, sessions) for _ in range(4)))
+
+    states = asyncio.run(main())
+
+    assert agent.fallback.runs == 1
+    assert table == {"ca": {"price": 0.3}}
+    assert all(state["usd_electricity_rates"] == {"price": 0.3} for state in states)
+    paths = sorted(fast_path_report(state)["tariff_coalesce"] for state in states)
+    assert paths == ["coalesced", "coalesced", "coalesced", "llm"]
+    stats = lookup_stats()["tariff_coalesce"]
+    assert (stats["misses"], stats["coalesced"]) == (1, 3)
+
+
+def test_later_lookup_is_a_cache_hit():
+    table = {}
+    agent = _cached_tariff_agent("tariff_hit", table)
+
+    first = asyncio.run(run_agent(agent, {"region": "tx"}))
+    second = asyncio.run(run_agent(agent, {"region": "tx"}))
+
+    assert agent.fallback.runs == 1
+    assert fast_path_report(first) == {"tariff_hit": "llm"}
+    assert fast_path_report(second) == {"tariff_hit": "cache"}
+    assert second["usd_electricity_rates"] == {"price": 0.3}
+
+
+def test_different_keys_do_not_coalesce():
+    agent = _cached_tariff_agent("tariff_keys", {})
+    sessions = InMemorySessionService()
+
+    async def main():
+        return await asyncio.gather(run_agent(agent, {"region": "ca"}, sessions), run_agent(agent, {"region": "ny"}, sessions))
+
+    asyncio.run(main())
+
+    assert agent.fallback.runs == 2
+
+
+def test_single_flight_shares_one_call():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return {"solarPotential": {}}
+
+    async def main():
+        flight = SingleFlight("solar")
+        results = await asyncio.gather(*(flight.do(("37.4", "-122.1"), fetch) for _ in range(5)))
+        return flight, results
+
+    flight, results = asyncio.run(main())
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {"in_flight": 0, "started": 1, "coalesced": 4}
+
+
+def test_single_flight_waiter_cancellation_does_not_cancel_the_call():
+    async def main():
+        flight = SingleFlight("solar")
+
+        async def fetch():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        cancelled = asyncio.ensure_future(flight.do("key", fetch))
+        follower = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        return await follower
+
+    assert asyncio.run(main()) == "done"
+
+
+async def _collect(stream):
+    return [item async for item in stream]
+
+
+def test_stream_flight_late_joiner_replays_then_follows():
+    async def main():
+        flight = StreamFlight("pipeline")
+        second_item = asyncio.Event()
+        release = asyncio.Event()
+
+        async def source():
+            yield 1
+            yield 2
+            second_item.set()
+            await release.wait()
+            yield 3
+
+        first = asyncio.ensure_future(_collect(flight.subscribe("key", source)))
+        await second_item.wait()
+        # Joins after two items went out; must still see all three
+        late = asyncio.ensure_future(_collect(flight.subscribe("key", source)))
+        await asyncio.sleep(0)
+        release.set()
+        return flight, await first, await late
+
+    flight, first, late = asyncio.run(main())
+
+    assert first == [1, 2, 3]
+    assert late == [1, 2, 3]
+    assert flight.stats() == {"in_flight": 0, "started": 1, "coalesced": 1}
+
+
+def test_stream_flight_propagates_errors_to_every_subscriber():
+    async def main():
+        flight = StreamFlight("pipeline")
+
+        async def source():
+            yield "partial"
+            await asyncio.sleep(0.01)
+            raise RuntimeError("agent failed")
+
+        received = [[], []]
+
+        async def consume(i):
+            async for item in flight.subscribe("key", source):
+                received[i].append(item)
+
+        results = await asyncio.gather(consume(0), consume(1), return_exceptions=True)
+        return flight, received, results
+
+    flight, received, results = asyncio.run(main())
+
+    assert received == [["partial"], ["partial"]]
+    assert all(isinstance(r, RuntimeError) and str(r) == "agent failed" for r in results)
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_stream_flight_runs_again_after_the_shared_run_ends():
+    runs = []
+
+    async def source():
+        runs.append(1)
+        yield len(runs)
+
+    async def main():
+        flight = StreamFlight("pipeline")
+        first = await _collect(flight.subscribe("key", source))
+        await asyncio.sleep(0.01)
+        second = await _collect(flight.subscribe("key", source))
+        return first, second
+
+    assert asyncio.run(main()) == ([1], [2])
+
+
+def test_stream_flight_subscriber_leaving_does_not_stop_the_run():
+    async def main():
+        flight = StreamFlight("pipeline")
+
+        async def source():
+            for i in range(3):
+                await asyncio.sleep(0.01)
+                yield i
+
+        leaving = asyncio.ensure_future(_collect(flight.subscribe("key", source)))
+        staying = asyncio.ensure_future(_collect(flight.subscribe("key", source)))
+        await asyncio.sleep(0.015)
+        leaving.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leaving
+        return await staying
+
+    assert asyncio.run(main()) == [0, 1, 2]
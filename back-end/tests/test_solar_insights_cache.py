@@ -0,0 +1,78 @@
+import time
+
+from agents.subagents.solar_context.solar_insights.cache import SolarInsightsCache
+
+INSIGHTS = {
+    "name": "buildings/abc",
+    "imageryDate": {"year": 2023, "month": 5, "day": 1},
+    "solarPotential": {
+        "maxArrayPanelsCount": 3,
+        "solarPanelConfigs": [{"panelsCount": 3, "yearlyEnergyDcKwh": 1_200.0, "roofSegmentSummaries": []}],
+        "solarPanels": [{"yearlyEnergyDcKwh": y, "center": {}} for y in (350.0, 450.0, 400.0)],
+    },
+}
+
+
+def _cache(tmp_path, **kwargs) -> SolarInsightsCache:
+    return SolarInsightsCache(path=str(tmp_path / "solar.sqlite3"), **kwargs)
+
+
+def test_nearby_coordinates_snap_to_one_entry(tmp_path):
+    cache = _cache(tmp_path, grid_degrees=0.001)
+    cache.put(37.77490, -122.41940, INSIGHTS)
+
+    assert cache.key_for(37.77490, -122.41940) == cache.key_for(37.77512, -122.41921)
+    assert cache.get(37.77512, -122.41921)[0] is not None
+    assert cache.get(37.77700, -122.41940) == (None, False)
+    assert cache.stats()["entries"] == 1
+
+
+def test_entries_are_slim_and_keep_the_raw_response(tmp_path):
+    cache = _cache(tmp_path)
+    slim = cache.put(37.7749, -122.4194, INSIGHTS)
+
+    payload, stale = _cache(tmp_path).get(37.7749, -122.4194)
+
+    assert payload == slim and not stale
+    assert "imageryDate" not in payload and "solarPanels" not in payload["solarPotential"]
+    assert payload["panelYieldsDcKwh"] == [450.0, 400.0, 350.0]
+    assert payload["solarPotential"]["solarPanelConfigs"] == [{"panelsCount": 3, "yearlyEnergyDcKwh": 1_200.0}]
+    assert cache.get_raw(payload["raw_key"]) == INSIGHTS
+
+
+def test_old_entries_are_stale_then_expire(tmp_path):
+    cache = _cache(tmp_path, ttl_seconds=0.01, stale_seconds=0.05)
+    cache.put(37.7749, -122.4194, INSIGHTS)
+    time.sleep(0.02)
+
+    payload, stale = cache.get(37.7749, -122.4194)
+    assert payload is not None and stale
+    time.sleep(0.05)
+
+    assert cache.get(37.7749, -122.4194) == (None, False)
+    assert cache.stats()["entries"] == 0
+    assert cache.stats()["stale_hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = _cache(tmp_path, max_entries=2)
+    cache.put(1.0, 1.0, INSIGHTS)
+    time.sleep(0.001)
+    cache.put(2.0, 2.0, INSIGHTS)
+    time.sleep(0.001)
+    raw_key = cache.get(1.0, 1.0)[0]["raw_key"]
+    time.sleep(0.001)
+    cache.put(3.0, 3.0, INSIGHTS)
+
+    assert cache.get(2.0, 2.0) == (None, False)
+    assert cache.get(1.0, 1.0)[0] is not None and cache.get(3.0, 3.0)[0] is not None
+    assert cache.get_raw(raw_key) == INSIGHTS
+    assert cache.get_raw(cache.key_for(2.0, 2.0)) is None
+
+
+def test_keep_raw_off_stores_only_the_slim_payload(tmp_path):
+    cache = _cache(tmp_path, keep_raw=False)
+    payload = cache.put(37.7749, -122.4194, INSIGHTS)
+
+    assert "raw_key" not in payload
+    assert cache.get_raw(cache.key_for(37.7749, -122.4194)) is None
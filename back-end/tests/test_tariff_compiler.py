@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+
+from agents.subagents.financial_context.helper import total_monthly_cost
+from agents.subagents.financial_context.tariff_compiler import compile_tariff, monthly_costs
+
+USAGE_KWH = [0.0, 50.0, 100.0, 250.0, 400.0, 1_000.0, 2_500.5]
+
+PLANS = {
+    "flat": {
+        "plan_type": "flat",
+        "price_per_kWh_usd": 0.21,
+        "fixed_monthly_fee_usd": 9.5,
+    },
+    "flat_with_fees": {
+        "plan_type": "flat",
+        "price_per_kWh_usd": 0.18,
+        "additional_fees": [
+            {"name": "meter", "amount_usd": 4.0, "unit": "month"},
+            {"name": "levy", "amount_usd": 0.02, "unit": "kWh"},
+        ],
+    },
+    "tiered_bounded": {
+        "plan_type": "tiered",
+        "fixed_monthly_fee_usd": 5.0,
+        "tiers": [
+            {"start_kWh": 0, "end_kWh": 100, "price_per_kWh_usd": 0.10},
+            {"start_kWh": 100, "end_kWh": 400, "price_per_kWh_usd": 0.15},
+        ],
+    },
+    "tiered_open_ended": {
+        "plan_type": "tiered",
+        "tiers": [
+            {"end_kWh": 100, "price_per_kWh_usd": 0.10},
+            {"start_kWh": 100, "end_kWh": 400, "price_per_kWh_usd": 0.15},
+            {"start_kWh": 400, "price_per_kWh_usd": 0.30},
+        ],
+    },
+    "tou_hours": {
+        "plan_type": "tou",
+        "fixed_monthly_fee_usd": 12.0,
+        "tou_periods": [
+            {"name": "peak", "start_hour": 16, "end_hour": 21, "price_per_kWh_usd": 0.45},
+            {"name": "off-peak", "start_hour": 21, "end_hour": 16, "price_per_kWh_usd": 0.20},
+        ],
+    },
+    "tou_without_hours": {
+        "plan_type": "tou",
+        "tou_periods": [
+            {"name": "peak", "price_per_kWh_usd": 0.40},
+            {"name": "off-peak", "price_per_kWh_usd": 0.10},
+        ],
+    },
+    "hybrid_tiered": {
+        "plan_type": "hybrid",
+        "tiers": [
+            {"start_kWh": 0, "end_kWh": 300, "price_per_kWh_usd": 0.12},
+            {"start_kWh": 300, "price_per_kWh_usd": 0.25},
+        ],
+        "tou_periods": [{"name": "all", "price_per_kWh_usd": 0.99}],
+    },
+    "hybrid_tou": {
+        "plan_type": "hybrid",
+        "fixed_monthly_fee_usd": 3.0,
+        "tou_periods": [
+            {"name": "day", "start_hour": 7, "end_hour": 19, "price_per_kWh_usd": 0.30},
+            {"name": "night", "start_hour": 19, "end_hour": 7, "price_per_kWh_usd": 0.12},
+        ],
+    },
+}
+
+
+@pytest.mark.parametrize("name", sorted(PLANS))
+@pytest.mark.parametrize("kwh", USAGE_KWH)
+def test_compiled_cost_matches_total_monthly_cost(name, kwh):
+    plan = PLANS[name]
+
+    expected = total_monthly_cost(plan, {"energy_kWh": kwh})
+
+    assert compile_tariff(plan).cost(kwh) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("name", sorted(PLANS))
+def test_vectorized_costs_match_the_scalar_path(name):
+    plan = PLANS[name]
+
+    costs = monthly_costs(plan, np.asarray(USAGE_KWH))
+
+    assert costs.shape == (len(USAGE_KWH),)
+    assert costs == pytest.approx([total_monthly_cost(plan, {"energy_kWh": v}) for v in USAGE_KWH])
+
+
+def test_zero_usage_bills_only_fixed_fees():
+    assert compile_tariff(PLANS["flat"]).cost(0) == pytest.approx(9.5)
+    assert compile_tariff(PLANS["flat_with_fees"]).cost(0) == pytest.approx(4.0)
+    assert compile_tariff(PLANS["tiered_open_ended"]).cost(0) == 0.0
+
+
+def test_open_ended_last_tier_bills_everything_past_its_start():
+    compiled = compile_tariff(PLANS["tiered_open_ended"])
+
+    # 100 * 0.10 + 300 * 0.15 + 600 * 0.30
+    assert compiled.cost(1_000) == pytest.approx(235.0)
+
+
+def test_compiled_plans_are_cached_by_content():
+    plan = dict(PLANS["flat"])
+
+    assert compile_tariff(plan) is compile_tariff(dict(plan))
+    assert compile_tariff({**plan, "price_per_kWh_usd": 0.22}) is not compile_tariff(plan)
@@ -0,0 +1,142 @@
+import time
+
+import pytest
+
+from agents.subagents.financial_context.electricity_rate.tariff_store import (
+    DAYS_PER_MONTH_AVG,
+    SOURCE_URDB,
+    TariffStore,
+    import_urdb,
+    urdb_item_to_plan,
+)
+from models.schemas import USDConvertedElectricityRatePlan
+
+
+def _store(tmp_path, **kwargs) -> TariffStore:
+    return TariffStore(path=str(tmp_path / "tariffs.sqlite3"), **kwargs)
+
+
+def _plan(name: str, utility: str = "PG&E", price: float = 0.3) -> USDConvertedElectricityRatePlan:
+    return USDConvertedElectricityRatePlan(plan_type="flat", plan_name=name, utility_name=utility, price_per_kWh_usd=price)
+
+
+def _urdb_item(**fields) -> dict:
+    item = {
+        "label": "abc123",
+        "name": "E-1 Residential",
+        "utility": "Pacific Gas & Electric Co",
+        "sector": "Residential",
+        "country": "USA",
+        "state": "CA",
+        "energyratestructure": [[{"rate": 0.30, "adj": 0.02}]],
+    }
+    item.update(fields)
+    return item
+
+
+def test_flat_urdb_rate_adds_adjustments_and_daily_fixed_charges():
+    plan = urdb_item_to_plan(_urdb_item(fixedchargefirstmeter=0.5, fixedchargeunits="$/day"))
+
+    assert plan.plan_type == "flat"
+    assert plan.price_per_kWh_usd == pytest.approx(0.32)
+    assert plan.fixed_monthly_fee_usd == pytest.approx(0.5 * DAYS_PER_MONTH_AVG)
+    assert plan.source_url == "https://apps.openei.org/USURDB/rate/view/abc123"
+
+
+def test_tiered_urdb_rate_keeps_an_open_ended_top_tier():
+    structure = [[{"max": 300, "rate": 0.20}, {"max": 600, "rate": 0.30}, {"rate": 0.40}]]
+
+    plan = urdb_item_to_plan(_urdb_item(energyratestructure=structure))
+
+    assert plan.plan_type == "tiered"
+    assert [(t.start_kWh, t.end_kWh, t.price_per_kWh_usd) for t in plan.tiers] == [
+        (0.0, 300.0, 0.20),
+        (300.0, 600.0, 0.30),
+        (600.0, None, 0.40),
+    ]
+
+
+def test_tou_urdb_rate_collapses_the_weekday_schedule():
+    # Peak 16-21 in summer months, off-peak otherwise; the most common period wins per hour
+    summer = [0] * 16 + [1] * 5 + [0] * 3
+    winter = [0] * 24
+    schedule = [winter] * 5 + [summer] * 7
+    structure = [[{"rate": 0.25}], [{"rate": 0.45}]]
+
+    plan = urdb_item_to_plan(_urdb_item(energyratestructure=structure, energyweekdayschedule=schedule))
+
+    assert plan.plan_type == "tou"
+    assert [(p.start_hour, p.end_hour, p.price_per_kWh_usd) for p in plan.tou_periods] == [
+        (0, 16, 0.25),
+        (16, 21, 0.45),
+        (21, 0, 0.25),
+    ]
+
+
+def test_tou_schedule_skips_periods_without_rates():
+    schedule = [[0] * 12 + [1] * 12] * 12
+    structure = [[{"rate": 0.25}], [], [{"rate": 0.45}]]
+
+    plan = urdb_item_to_plan(_urdb_item(energyratestructure=structure, energyweekdayschedule=schedule))
+
+    assert [(p.start_hour, p.end_hour) for p in plan.tou_periods] == [(0, 12)]
+
+
+def test_demand_charges_and_rates_without_energy_prices():
+    plan = urdb_item_to_plan(_urdb_item(flatdemandstructure=[[{"rate": 8.0}], [{"rate": 12.0}]]))
+
+    assert [(d.name, d.price_per_kW_usd) for d in plan.demand_charges] == [("flat demand", 12.0)]
+    assert urdb_item_to_plan(_urdb_item(energyratestructure=[[]])) is None
+
+
+def test_import_skips_other_sectors_and_expired_rates(tmp_path):
+    store = _store(tmp_path)
+    items = [
+        _urdb_item(),
+        _urdb_item(name="A-1 Commercial", sector="Commercial"),
+        _urdb_item(name="Old", enddate=time.time() - 1),
+        _urdb_item(name="Empty", energyratestructure=[]),
+    ]
+
+    assert import_urdb(store, items) == 1
+    assert store.stats()["entries"] == {SOURCE_URDB: 1}
+
+
+def test_keys_are_normalized_on_write_and_lookup(tmp_path):
+    store = _store(tmp_path)
+    import_urdb(store, [_urdb_item()])
+
+    # USA -> us, California -> ca, case and whitespace ignored
+    plan = _store(tmp_path).find(" us ", "California", "Oakland")
+
+    assert plan is not None and plan.plan_name == "E-1 Residential"
+    assert store.find("USA", "ca", utility="pacific gas & electric co") is not None
+    assert store.find("US", "NV") is None
+
+
+def test_most_specific_level_wins(tmp_path):
+    store = _store(tmp_path)
+    store.put(_plan("State plan"), country_code="US", region="CA", source=SOURCE_URDB)
+    store.put(_plan("City plan", utility="SMUD"), country_code="US", region="CA", city="Sacramento", source=SOURCE_URDB)
+
+    assert store.find("US", "CA", "Sacramento").plan_name == "City plan"
+    assert store.find("US", "CA", "Fresno").plan_name == "State plan"
+
+
+def test_llm_write_backs_then_defaults_win_within_a_level(tmp_path):
+    store = _store(tmp_path)
+    store.put(_plan("EV rate"), country_code="US", region="CA", source=SOURCE_URDB)
+    store.put(_plan("Standard"), country_code="US", region="CA", source=SOURCE_URDB, is_default=True)
+
+    assert store.find("US", "CA").plan_name == "Standard"
+    store.put(_plan("Found by search"), country_code="US", region="CA")
+    assert store.find("US", "CA").plan_name == "Found by search"
+
+
+def test_llm_write_backs_expire(tmp_path):
+    store = _store(tmp_path, llm_ttl_seconds=0.01)
+    store.put(_plan("Found by search"), country_code="US", region="CA")
+    store.put(_plan("Imported"), country_code="US", region="CA", source=SOURCE_URDB)
+    time.sleep(0.02)
+
+    assert _store(tmp_path, llm_ttl_seconds=0.01).find("US", "CA").plan_name == "Imported"
@@ -0,0 +1,125 @@
+import pytest
+
+from agents.subagents.solar_calculator.calculator import DC_TO_AC_DERATE
+from agents.subagents.solar_calculator.what_if import recompute, resolved_inputs
+
+PLAN = {"plan_type": "flat", "price_per_kWh_usd": 0.2, "fixed_monthly_fee_usd": 10.0}
+
+
+def _inputs(**overrides):
+    inputs = {
+        "solar_potentials": {
+            "solarPanelConfigs": [
+                {"panelsCount": 4, "yearlyEnergyDcKwh": 2_000.0},
+                {"panelsCount": 8, "yearlyEnergyDcKwh": 4_000.0},
+                {"panelsCount": 12, "yearlyEnergyDcKwh": 6_000.0},
+            ]
+        },
+        "usd_electricity_rates": PLAN,
+        "energy_kWh": {"energy_kWh": 500.0},
+        "average_monthly_expense_usd": 110.0,
+        "panel_yields_dc_kwh": None,
+    }
+    inputs.update(overrides)
+    return inputs
+
+
+def _configs(result):
+    return [(c["panelsCount"], c["yearlyEnergyDcKwh"]) for c in result["solar_monthly_bill_analysis"]["per_config"]]
+
+
+def test_without_overrides_the_stored_bill_is_kept():
+    result = recompute(_inputs())
+
+    assert result["energy_kWh"] == 500.0
+    assert result["average_monthly_expense_usd"] == 110.0
+    assert len(_configs(result)) == 3
+
+
+def test_new_usage_is_repriced_with_the_rate_plan():
+    result = recompute(_inputs(), energy_kWh=600)
+
+    assert result["average_monthly_expense_usd"] == pytest.approx(600 * 0.2 + 10.0)
+    assert result["solar_monthly_bill_analysis"]["monthly_kwh_consumption"] == 600.0
+
+
+def test_new_rate_plan_reprices_the_stored_usage():
+    plan = {"plan_type": "tiered", "tiers": [
+        {"start_kWh": 0, "end_kWh": 300, "price_per_kWh_usd": 0.1},
+        {"start_kWh": 300, "price_per_kWh_usd": 0.3},
+    ]}
+
+    result = recompute(_inputs(), usd_electricity_rates=plan)
+
+    assert result["average_monthly_expense_usd"] == pytest.approx(300 * 0.1 + 200 * 0.3)
+
+
+def test_a_given_bill_wins_over_repricing():
+    result = recompute(_inputs(), energy_kWh=600, average_monthly_expense_usd=99.0)
+
+    assert result["average_monthly_expense_usd"] == 99.0
+
+
+def test_without_a_usable_plan_the_blended_price_is_kept():
+    result = recompute(_inputs(usd_electricity_rates={}), energy_kWh=250)
+
+    assert result["average_monthly_expense_usd"] == pytest.approx(110.0 / 500.0 * 250.0)
+
+
+def test_without_stored_usage_the_stored_bill_is_kept():
+    result = recompute(_inputs(usd_electricity_rates={}, energy_kWh=None), energy_kWh=250)
+
+    assert result["average_monthly_expense_usd"] == 110.0
+
+
+def test_panels_count_uses_the_best_panels_when_yields_are_known():
+    inputs = _inputs(panel_yields_dc_kwh=[400.0, 600.0, 500.0, 300.0, 550.0])
+
+    assert _configs(recompute(inputs, panels_count=2)) == [(2, 1_150.0)]
+    # Capped at the roof's panels
+    assert _configs(recompute(inputs, panels_count=50)) == [(5, 2_350.0)]
+
+
+def test_panels_count_falls_back_to_the_largest_fitting_config():
+    result = recompute(_inputs(), panels_count=10)
+
+    assert _configs(result) == [(8, 4_000.0)]
+    assert result["solar_monthly_bill_analysis"]["recommended"]["initialAcKwhPerYear"] == pytest.approx(
+        4_000.0 * DC_TO_AC_DERATE
+    )
+    with pytest.raises(ValueError):
+        recompute(_inputs(), panels_count=2)
+
+
+@pytest.mark.parametrize("plan", [
+    {"plan_type": "tiered"},
+    {"plan_type": "tou", "tou_periods": []},
+    {"plan_type": "flat"},
+    {"plan_type": "hybrid"},
+    {"price_per_kWh_usd": None},
+])
+def test_rate_plans_missing_their_fields_are_rejected(plan):
+    with pytest.raises(ValueError):
+        recompute(_inputs(), usd_electricity_rates=plan)
+
+
+def test_hybrid_plan_with_any_priced_part_is_accepted():
+    result = recompute(_inputs(), usd_electricity_rates={"plan_type": "hybrid", "price_per_kWh_usd": 0.3})
+
+    assert result["average_monthly_expense_usd"] == pytest.approx(150.0)
+
+
+def test_resolved_inputs_needs_every_key():
+    state = {
+        "solar_potentials": '{"solarPanelConfigs": []}',
+        "usd_electricity_rates": PLAN,
+        "energy_kWh": '```json\n{"energy_kWh": 500}\n```',
+        "average_monthly_expense_usd": 110.0,
+        "solar_building_insights": {"panelYieldsDcKwh": [300.0, 400.0]},
+    }
+
+    inputs = resolved_inputs(state)
+
+    assert inputs["energy_kWh"] == {"energy_kWh": 500}
+    assert inputs["panel_yields_dc_kwh"] == [400.0, 300.0]
+    assert resolved_inputs({**state, "average_monthly_expense_usd": None}) is None
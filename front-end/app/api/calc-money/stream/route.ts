@@ -0,0 +1,80 @@
+import { NextRequest, NextResponse } from 'next/server';
+
+const DEFAULT_BACKEND_URL = 'http://localhost:3001/';
+
+function getBackendBaseUrl(): string {
+  const envUrl = process.env.BACKEND_BASE_URL ?? process.env.BACKEND_URL;
+  if (!envUrl) {
+    return DEFAULT_BACKEND_URL;
+  }
+  return envUrl.endsWith('/') ? envUrl : `${envUrl}/`;
+}
+
+export const dynamic = 'force-dynamic';
+
+// Proxies the backend's server-sent events so the page can render each stage
+// (`stage` events) as it lands instead of waiting for the final `result` event.
+export async function POST(req: NextRequest): Promise<Response> {
+  let parsed: unknown;
+  try {
+    parsed = await req.json();
+  } catch {
+    return NextResponse.json(
+      { success: false, error: 'Invalid JSON body' },
+      { status: 400 }
+    );
+  }
+
+  const body = (parsed ?? {}) as Record<string, unknown>;
+  const latitude = Number(body.latitude ?? body.lat);
+  const longitude = Number(body.longitude ?? body.lng);
+  const address =
+    typeof body.address === 'string' && body.address.trim().length > 0 ? body.address.trim() : '';
+
+  if (!Number.isFinite(latitude) || !Number.isFinite(longitude)) {
+    return NextResponse.json(
+      { success: false, error: 'Latitude and longitude must be valid numbers' },
+      { status: 400 }
+    );
+  }
+
+  try {
+    const response = await fetch(`${getBackendBaseUrl()}stream`, {
+      method: 'POST',
+      headers: {
+        Accept: 'text/event-stream',
+        'Content-Type': 'application/json',
+      },
+      cache: 'no-store',
+      body: JSON.stringify({
+        address,
+        latitude,
+        longitude,
+      }),
+      signal: req.signal,
+    });
+
+    if (!response.ok || !response.body) {
+      return NextResponse.json(
+        { success: false, error: `Backend responded with status ${response.status}` },
+        { status: response.ok ? 502 : response.status }
+      );
+    }
+
+    return new Response(response.body, {
+      headers: {
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache, no-transform',
+        Connection: 'keep-alive',
+      },
+    });
+  } catch (error) {
+    return NextResponse.json(
+      {
+        success: false,
+        error: error instanceof Error ? error.message : 'Unknown backend error',
+      },
+      { status: 500 }
+    );
+  }
+}